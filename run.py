@@ -10,12 +10,8 @@ sys.path.insert(0, current_dir)
 
 # 設置日誌
 import logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 創建資料目錄
-os.makedirs('data', exist_ok=True)
-
 def parse_arguments():
     """解析命令行參數"""
     parser = argparse.ArgumentParser(description='區塊鏈眾包感知系統模擬')
@@ -29,22 +25,48 @@ def parse_arguments():
     parser.add_argument('-l', '--lambda', type=float, dest='lambda_param', default=0.7,
                         help='泊松分佈的λ參數，控制平均參與率 (0-1之間) (默認: 0.7)')
     
+    parser.add_argument('-d', '--difficulty', type=int, default=0,
+                        help='區塊工作量證明難度，前導零位元數 (默認: 0，不啟用)')
+    
+    parser.add_argument('--pow-workers', type=int, default=None,
+                        help='搜尋 nonce 的進程數 (默認: 所有CPU)')
+    
+    parser.add_argument('-m', '--metrics-interval', type=int, default=0,
+                        help='每隔幾輪將經濟指標寫入 data/metrics.jsonl (默認: 0，不啟用)')
+    
+    parser.add_argument('--state-db', default=None,
+                        help='逐區塊將節點狀態寫入此 SQLite 檔案，取代結束時的狀態JSON (默認: 不啟用)')
+    
+    parser.add_argument('--memory-profile', type=int, default=0,
+                        help='每隔幾輪將記憶體剖析寫入 data/memory.jsonl (默認: 0，不啟用)')
+    
+    parser.add_argument('--memory-budget', type=float, default=0,
+                        help='每輪允許的記憶體增長位元組數，超過時以錯誤結束 (默認: 0，不限制)')
+    
     return parser.parse_args()
 
 try:
     # 執行 main.py
     from src.simulation.main import main
+    from src.config.system_config import SystemConfig
     
     if __name__ == "__main__":
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         args = parse_arguments()
         
         logger.info("開始執行模擬...")
-        logger.info(f"參數設置: worker數量={args.workers}, 模擬輪數={args.rounds}, λ參數={args.lambda_param}")
+        logger.info(f"參數設置: worker數量={args.workers}, 模擬輪數={args.rounds}, λ參數={args.lambda_param}, "
+                    f"難度={args.difficulty}")
         
         result = main(
             worker_count=args.workers,
             simulation_rounds=args.rounds,
-            lambda_param=args.lambda_param
+            lambda_param=args.lambda_param,
+            config=SystemConfig(pow_difficulty=args.difficulty, pow_workers=args.pow_workers,
+                                metrics_interval=args.metrics_interval,
+                                state_db_path=args.state_db,
+                                memory_profile_interval=args.memory_profile,
+                                memory_budget_per_round=args.memory_budget)
         )
         
         logger.info("模擬已完成!")
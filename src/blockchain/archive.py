@@ -0,0 +1,310 @@
+import argparse
+import json
+import logging
+import lzma
+import os
+import struct
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .records import from_iso, to_iso
+from .replay import load_chain
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MCSA1"
+CODECS = {
+    "lzma": (lzma.compress, lzma.decompress),
+    "zlib": (lambda data: zlib.compress(data, 9), zlib.decompress),
+}
+
+SUBMISSION_KEYS = ["worker_id", "task_hash", "timestamp", "signature", "task_id"]
+EVALUATION_KEYS = ["worker_id", "task_completion", "status", "r_coin_before", "r_coin_after",
+                   "r_coin_change", "timestamp", "task_id"]
+
+# 欄位名稱 -> NumPy 型別 (小端序)
+COLUMN_TYPES = {
+    "sub_worker": "<i8",
+    "sub_hash": "<u4",
+    "sub_ts": "<i8",
+    "sub_task": "<u4",
+    "eval_worker": "<i8",
+    "eval_completion": "<f8",
+    "eval_status": "<u4",
+    "eval_r_before": "<i8",
+    "eval_r_after": "<i8",
+    "eval_r_change": "<i8",
+    "eval_ts": "<i8",
+    "eval_task": "<u4",
+}
+
+
+def _to_micros(timestamp: str) -> Optional[int]:
+    """ISO 時間字串轉為微秒，無法無損還原時返回 None"""
+    try:
+        return from_iso(timestamp)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_digest(value: Any) -> bool:
+    return isinstance(value, str) and len(value) == 64 and value == value.lower() and \
+        all(c in "0123456789abcdef" for c in value)
+
+
+def _is_int(value: Any) -> bool:
+    return type(value) is int
+
+
+class _SegmentWriter:
+    """將一段區塊編碼為字典表 + 欄位陣列"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.string_index: Dict[str, int] = {}
+        self.digests: List[bytes] = []
+        self.digest_index: Dict[str, int] = {}
+        self.signatures: List[bytes] = []
+        self.columns: Dict[str, List] = {name: [] for name in COLUMN_TYPES}
+        self.blocks: List[Dict[str, Any]] = []
+
+    def _string(self, value: str) -> int:
+        if value not in self.string_index:
+            self.string_index[value] = len(self.strings)
+            self.strings.append(value)
+        return self.string_index[value]
+
+    def _digest(self, value: str) -> int:
+        if value not in self.digest_index:
+            self.digest_index[value] = len(self.digests)
+            self.digests.append(bytes.fromhex(value))
+        return self.digest_index[value]
+
+    def _can_encode_submissions(self, transaction: Dict[str, Any]) -> bool:
+        if list(transaction) != ["type", "task_id", "submissions", "timestamp"]:
+            return False
+        for submission in transaction["submissions"]:
+            if list(submission) != SUBMISSION_KEYS or not _is_int(submission["worker_id"]):
+                return False
+            if not (_is_digest(submission["task_hash"]) and _is_digest(submission["signature"])):
+                return False
+            if not isinstance(submission["task_id"], str) or _to_micros(submission["timestamp"]) is None:
+                return False
+        return True
+
+    def _can_encode_evaluations(self, transaction: Dict[str, Any]) -> bool:
+        if list(transaction) != ["type", "task_id", "evaluations", "verifier_id", "timestamp"]:
+            return False
+        for evaluation in transaction["evaluations"]:
+            if list(evaluation) != EVALUATION_KEYS or type(evaluation["task_completion"]) is not float:
+                return False
+            if not all(_is_int(evaluation[key]) for key in
+                       ("worker_id", "r_coin_before", "r_coin_after", "r_coin_change")):
+                return False
+            if not isinstance(evaluation["status"], str) or not isinstance(evaluation["task_id"], str):
+                return False
+            if _to_micros(evaluation["timestamp"]) is None:
+                return False
+        return True
+
+    def add_block(self, block: Dict[str, Any]):
+        """加入一個區塊，提交與評估按欄位存放，其他交易保持原樣"""
+        layout = []
+        for transaction in block["transactions"]:
+            tx_type = transaction.get("type")
+            if tx_type == "task_submissions" and self._can_encode_submissions(transaction):
+                for submission in transaction["submissions"]:
+                    self.columns["sub_worker"].append(submission["worker_id"])
+                    self.columns["sub_hash"].append(self._digest(submission["task_hash"]))
+                    self.columns["sub_ts"].append(_to_micros(submission["timestamp"]))
+                    self.columns["sub_task"].append(self._string(submission["task_id"]))
+                    self.signatures.append(bytes.fromhex(submission["signature"]))
+                layout.append(["sub", transaction["task_id"], transaction["timestamp"],
+                               len(transaction["submissions"])])
+            elif tx_type == "task_evaluations" and self._can_encode_evaluations(transaction):
+                for evaluation in transaction["evaluations"]:
+                    self.columns["eval_worker"].append(evaluation["worker_id"])
+                    self.columns["eval_completion"].append(evaluation["task_completion"])
+                    self.columns["eval_status"].append(self._string(evaluation["status"]))
+                    self.columns["eval_r_before"].append(evaluation["r_coin_before"])
+                    self.columns["eval_r_after"].append(evaluation["r_coin_after"])
+                    self.columns["eval_r_change"].append(evaluation["r_coin_change"])
+                    self.columns["eval_ts"].append(_to_micros(evaluation["timestamp"]))
+                    self.columns["eval_task"].append(self._string(evaluation["task_id"]))
+                layout.append(["eval", transaction["task_id"], transaction["verifier_id"],
+                               transaction["timestamp"], len(transaction["evaluations"])])
+            else:
+                layout.append(["json", transaction])
+
+        header = {key: value for key, value in block.items() if key != "transactions"}
+        header["transactions"] = layout
+        self.blocks.append(header)
+
+    def encode(self) -> bytes:
+        """輸出未壓縮的段落內容"""
+        blobs = []
+        lengths = {}
+        for name, dtype in COLUMN_TYPES.items():
+            values = np.asarray(self.columns[name], dtype=dtype)
+            if name.endswith("_ts") and len(values):
+                values = np.diff(values, prepend=0)  # 時間戳差分編碼
+            blobs.append(values.tobytes())
+            lengths[name] = len(values)
+        blobs.append(b"".join(self.digests))
+        blobs.append(b"".join(self.signatures))
+
+        meta = json.dumps({
+            "blocks": self.blocks,
+            "strings": self.strings,
+            "digests": len(self.digests),
+            "columns": lengths
+        }, separators=(",", ":")).encode()
+        return struct.pack("<I", len(meta)) + meta + b"".join(blobs)
+
+
+def _decode_segment(payload: bytes) -> List[Dict[str, Any]]:
+    """將段落內容還原為區塊字典列表"""
+    (meta_length,) = struct.unpack_from("<I", payload)
+    meta = json.loads(payload[4:4 + meta_length])
+    offset = 4 + meta_length
+
+    columns = {}
+    for name, dtype in COLUMN_TYPES.items():
+        count = meta["columns"][name]
+        values = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += values.nbytes
+        if name.endswith("_ts"):
+            values = np.cumsum(values)
+        columns[name] = values.tolist()
+
+    digest_bytes = payload[offset:offset + 32 * meta["digests"]]
+    offset += len(digest_bytes)
+    digests = [digest_bytes[i:i + 32].hex() for i in range(0, len(digest_bytes), 32)]
+    signature_bytes = payload[offset:]
+    strings = meta["strings"]
+
+    blocks = []
+    sub_row = 0
+    eval_row = 0
+    for header in meta["blocks"]:
+        transactions = []
+        for entry in header["transactions"]:
+            if entry[0] == "sub":
+                _, task_id, timestamp, count = entry
+                submissions = []
+                for row in range(sub_row, sub_row + count):
+                    submissions.append({
+                        "worker_id": columns["sub_worker"][row],
+                        "task_hash": digests[columns["sub_hash"][row]],
+                        "timestamp": to_iso(columns["sub_ts"][row]),
+                        "signature": signature_bytes[32 * row:32 * row + 32].hex(),
+                        "task_id": strings[columns["sub_task"][row]]
+                    })
+                sub_row += count
+                transactions.append({
+                    "type": "task_submissions",
+                    "task_id": task_id,
+                    "submissions": submissions,
+                    "timestamp": timestamp
+                })
+            elif entry[0] == "eval":
+                _, task_id, verifier_id, timestamp, count = entry
+                evaluations = []
+                for row in range(eval_row, eval_row + count):
+                    evaluations.append({
+                        "worker_id": columns["eval_worker"][row],
+                        "task_completion": columns["eval_completion"][row],
+                        "status": strings[columns["eval_status"][row]],
+                        "r_coin_before": columns["eval_r_before"][row],
+                        "r_coin_after": columns["eval_r_after"][row],
+                        "r_coin_change": columns["eval_r_change"][row],
+                        "timestamp": to_iso(columns["eval_ts"][row]),
+                        "task_id": strings[columns["eval_task"][row]]
+                    })
+                eval_row += count
+                transactions.append({
+                    "type": "task_evaluations",
+                    "task_id": task_id,
+                    "evaluations": evaluations,
+                    "verifier_id": verifier_id,
+                    "timestamp": timestamp
+                })
+            else:
+                transactions.append(entry[1])
+
+        # 保持與 Block.to_dict 相同的欄位順序
+        block = {"index": header["index"], "transactions": transactions}
+        block.update((key, value) for key, value in header.items() if key not in block)
+        blocks.append(block)
+    return blocks
+
+
+def write_archive(chain: List[Dict[str, Any]], filename: str, segment_size: int = 256, codec: str = "lzma"):
+    """將區塊鏈寫入壓縮的欄位式存檔，每 segment_size 個區塊為一個段落"""
+    compress, _ = CODECS[codec]
+    with open(filename, 'wb') as file:
+        file.write(MAGIC + codec.encode().ljust(8, b"\0"))
+        for start in range(0, len(chain), segment_size):
+            writer = _SegmentWriter()
+            for block in chain[start:start + segment_size]:
+                writer.add_block(block)
+            data = compress(writer.encode())
+            file.write(struct.pack("<I", len(data)))
+            file.write(data)
+    logger.info(f"區塊鏈存檔已保存到 {filename}")
+
+
+def read_archive(filename: str) -> List[Dict[str, Any]]:
+    """讀取欄位式存檔，還原為與 blockchain.json 相同結構的區塊字典列表"""
+    with open(filename, 'rb') as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"不是有效的區塊鏈存檔: {filename}")
+
+    codec = data[len(MAGIC):len(MAGIC) + 8].rstrip(b"\0").decode()
+    _, decompress = CODECS[codec]
+    offset = len(MAGIC) + 8
+    chain = []
+    while offset < len(data):
+        (length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        chain.extend(_decode_segment(decompress(data[offset:offset + length])))
+        offset += length
+    return chain
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='區塊鏈欄位式壓縮存檔')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pack = subparsers.add_parser('pack', help='將 blockchain.json 轉為存檔')
+    pack.add_argument('chain_file')
+    pack.add_argument('archive_file')
+    pack.add_argument('--segment-size', type=int, default=256, help='每個段落的區塊數 (默認: 256)')
+    pack.add_argument('--codec', choices=sorted(CODECS), default='lzma', help='壓縮方式 (默認: lzma)')
+
+    unpack = subparsers.add_parser('unpack', help='將存檔還原為 blockchain.json')
+    unpack.add_argument('archive_file')
+    unpack.add_argument('chain_file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.command == 'pack':
+        write_archive(load_chain(args.chain_file), args.archive_file, args.segment_size, args.codec)
+        original = os.path.getsize(args.chain_file)
+        packed = os.path.getsize(args.archive_file)
+        logger.info(f"原始大小: {original} bytes, 存檔大小: {packed} bytes ({original / max(1, packed):.1f}x)")
+    else:
+        with open(args.chain_file, 'w') as file:
+            json.dump(read_archive(args.archive_file), file, indent=4)
+        logger.info(f"區塊鏈已還原到 {args.chain_file}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -1,34 +1,57 @@
 import hashlib
 import json
-from typing import Dict, List, Any
+from typing import Dict, Any, Optional, Sequence
+from .pow import pow_hash
+from .records import export_transaction
 
 class Block:
-    def __init__(self, index: int, transactions: List[Dict], timestamp: str, previous_hash: str, verifier_id: int):
+    def __init__(self, index: int, transactions: Sequence[Any], timestamp: str, previous_hash: str, verifier_id: int,
+                 state_root: Optional[str] = None, lottery: Optional[Dict[str, Any]] = None,
+                 difficulty: Optional[int] = None, nonce: Optional[int] = None):
         self.index = index
-        self.transactions = transactions
+        self.transactions = transactions  # 交易記錄 (或已保存區塊的交易字典)
         self.timestamp = timestamp
         self.previous_hash = previous_hash
         self.verifier_id = verifier_id
+        self.state_root = state_root  # 區塊提交後所有節點餘額的狀態根
+        self.lottery = lottery  # 驗證者抽籤的種子與S-coin快照承諾
+        self.difficulty = difficulty  # 工作量證明難度 (前導零位元數)
+        self.nonce = nonce
         self.hash = self.calculate_hash()
 
-    def calculate_hash(self) -> str:
-        """計算區塊的哈希值"""
-        block_string = json.dumps({
+    def header(self) -> Dict[str, Any]:
+        """區塊中參與哈希計算的欄位，交易記錄在此轉為JSON形狀"""
+        header = {
             "index": self.index,
-            "transactions": self.transactions,
+            "transactions": [export_transaction(transaction) for transaction in self.transactions],
             "timestamp": self.timestamp,
             "previous_hash": self.previous_hash,
             "verifier_id": self.verifier_id
-        }, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        }
+        # 選用欄位只在設定時加入，保持舊區塊的哈希不變
+        if self.state_root is not None:
+            header["state_root"] = self.state_root
+        if self.lottery is not None:
+            header["lottery"] = self.lottery
+        if self.difficulty is not None:
+            header["difficulty"] = self.difficulty
+        return header
+
+    def content_digest(self) -> bytes:
+        """區塊內容 (不含 nonce) 的哈希"""
+        block_string = json.dumps(self.header(), sort_keys=True)
+        return hashlib.sha256(block_string.encode()).digest()
+
+    def calculate_hash(self) -> str:
+        """計算區塊的哈希值，有 nonce 時為內容哈希加上 nonce 的密封哈希"""
+        if self.nonce is None:
+            return self.content_digest().hex()
+        return pow_hash(self.content_digest(), self.nonce)
 
     def to_dict(self) -> Dict[str, Any]:
         """將區塊轉為字典"""
-        return {
-            "index": self.index,
-            "transactions": self.transactions,
-            "timestamp": self.timestamp,
-            "previous_hash": self.previous_hash,
-            "verifier_id": self.verifier_id,
-            "hash": self.hash
-        } 
\ No newline at end of file
+        block_dict = self.header()
+        if self.nonce is not None:
+            block_dict["nonce"] = self.nonce
+        block_dict["hash"] = self.hash
+        return block_dict
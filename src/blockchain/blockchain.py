@@ -1,58 +1,170 @@
 import json
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Any, List, Dict, Optional
 from .block import Block
+from .ledger import InsufficientFunds, Ledger
+from .records import CoinAllocation, TaskRefund, to_iso
+from src.utils.clock import now_micros
+from .state_tree import SparseMerkleTree
+from .pow import ProofOfWork, meets_target
+from src.models.node import Node
 from src.models.worker import Worker
 
 logger = logging.getLogger(__name__)
 
 class Blockchain:
-    def __init__(self):
+    def __init__(self, initial_nodes: Optional[List[Node]] = None, difficulty: int = 0,
+                 pow_workers: Optional[int] = None):
         self.chain = []
+        # 難度為 0 時不進行工作量證明
+        self.pow = ProofOfWork(difficulty, pow_workers) if difficulty > 0 else None
         self.pending_transactions = []
-        self.create_genesis_block()
+        self.state_tree = SparseMerkleTree()
+        self.pending_nodes = {}  # 本區塊中幣值有變動的節點
+        self.pending_lottery = None  # 本區塊驗證者的抽籤記錄
+        self.validator = None  # 選用的交易驗證管線
+        self.dedup = None  # 選用的重複提交偵測
+        self.state_store = None  # 選用的節點狀態持久化
+        self.ledger = Ledger()  # 幣值分錄，交易被接受時記帳，區塊提交時結算
+        self.create_genesis_block(initial_nodes or [])
+
+    def create_genesis_block(self, initial_nodes: List[Node]):
+        """創建創世區塊，並記錄節點的初始幣值分配"""
+        allocations = []
+        for node in initial_nodes:
+            self.ledger.open_account(node)
+            allocations.append(CoinAllocation(node.id, node.r_coin, node.s_coin))
+        self.state_tree.update_many((node.id, node.r_coin, node.s_coin) for node in initial_nodes)
 
-    def create_genesis_block(self):
-        """創建創世區塊"""
         genesis_block = Block(
             index=0,
-            transactions=[],
-            timestamp=datetime.now().isoformat(),
+            transactions=tuple(allocations),
+            timestamp=to_iso(now_micros()),
             previous_hash="0",
-            verifier_id=-1  # 特殊ID表示系統創建
+            verifier_id=-1,  # 特殊ID表示系統創建
+            state_root=self.state_tree.root
         )
         self.chain.append(genesis_block)
         logger.info("創世區塊已創建")
 
-    def add_transaction(self, transaction: Dict[str, any]):
-        """添加交易到待處理列表"""
+    def attach_validator(self, validator):
+        """在 add_transaction 前加上驗證管線"""
+        self.validator = validator
+
+    def attach_dedup(self, dedup):
+        """加上重複提交與重放偵測 (DuplicateDetector)"""
+        self.dedup = dedup
+
+    def attach_state_store(self, state_store, initial_nodes: Optional[List[Node]] = None):
+        """加上節點狀態持久化 (如 SQLiteStateStore)，並以創世區塊保存初始節點"""
+        self.state_store = state_store
+        if initial_nodes:
+            state_store.commit_block(self.chain[0], initial_nodes)
+
+    def add_transaction(self, transaction: Any):
+        """
+        添加交易記錄到待處理列表，有驗證管線時先經過驗證
+
+        經過驗證管線的交易先暫掛其分錄 (使區塊內的餘額查詢包含尚在管線中的交易)，
+        被接受時確認、被拒絕時沖銷。
+        """
+        if self.validator is not None:
+            try:
+                self.ledger.post(transaction, provisional=True)
+            except InsufficientFunds:
+                pass  # 無法記帳的交易 (如超過託管的退款) 不暫掛，由驗證管線拒絕
+            self.validator.submit(transaction)
+        else:
+            self.admit_transaction(transaction)
+
+    def admit_transaction(self, transaction: Any) -> bool:
+        """經過重複偵測後加入待處理列表並記帳，重複時返回 False"""
+        if self.dedup is not None and not self.dedup.check_and_reserve(transaction):
+            logger.warning(f"拒絕重複的提交: {str(transaction)[:120]}")
+            self.ledger.reverse(transaction)
+            return False
+        self.ledger.confirm(transaction)
         self.pending_transactions.append(transaction)
+        return True
+
+    def reject_transaction(self, transaction: Any):
+        """驗證管線拒絕交易時沖銷其暫掛的分錄"""
+        self.ledger.reverse(transaction)
+
+    def refund_escrow(self, task_id: str):
+        """任務結束 (評估完成或無法進行) 時，以退款交易將未支付的託管獎勵退還請求者"""
+        escrow = self.ledger.escrows.get(task_id)
+        if escrow is not None:
+            self.add_transaction(TaskRefund(task_id, escrow[0], escrow[1], escrow[2], now_micros()))
+
+    def has_pending_transactions(self) -> bool:
+        """是否有待處理 (或仍在驗證管線中) 的交易"""
+        return bool(self.pending_transactions) or (self.validator is not None and bool(self.validator.buffer))
+
+    def touch_nodes(self, nodes: List[Node]):
+        """標記幣值有變動的節點，於下一個區塊提交其餘額"""
+        for node in nodes:
+            self.pending_nodes[node.id] = node
+
+    def record_lottery(self, lottery: Dict[str, any]):
+        """記錄驗證者抽籤結果，寫入下一個區塊"""
+        self.pending_lottery = lottery
+
+    def get_balance_proof(self, node_id: int) -> Dict[str, any]:
+        """生成節點餘額相對於最新區塊狀態根的證明"""
+        return self.state_tree.prove(node_id)
 
     def add_block(self, verifier: Worker) -> Optional[Block]:
         """添加新區塊到區塊鏈"""
+        if self.validator is not None:
+            self.validator.flush()
+
         if not self.pending_transactions:
             logger.warning("沒有待處理的交易，無法創建區塊")
             return None
 
         last_block = self.get_last_block()
 
+        # 暫存本區塊所有分錄的結算結果，區塊通過驗證後才套用
+        settlement = self.ledger.stage()
+        touched = dict(self.pending_nodes)
+        touched.update((node.id, node) for node in settlement.nodes)
+
+        # 狀態根只涵蓋本區塊中被修改的節點 (以結算後的餘額計算)
+        balances = [(node.id, *settlement.balance(node)) for node in touched.values()]
+        state_root = self.state_tree.root_after(balances)
+
         new_block = Block(
             index=last_block.index + 1,
-            transactions=self.pending_transactions.copy(),
-            timestamp=datetime.now().isoformat(),
+            transactions=tuple(self.pending_transactions),
+            timestamp=to_iso(now_micros()),
             previous_hash=last_block.hash,
-            verifier_id=verifier.id
+            verifier_id=verifier.id,
+            state_root=state_root,
+            lottery=self.pending_lottery,
+            difficulty=self.pow.difficulty if self.pow else None
         )
+        if self.pow:
+            new_block.nonce = self.pow.seal(new_block.content_digest())
+            new_block.hash = new_block.calculate_hash()
 
         # 驗證區塊
         if self.is_valid_block(new_block, last_block):
+            self.ledger.commit(settlement)
+            self.touch_nodes(settlement.nodes)
+            self.state_tree.update_many(balances)
             self.chain.append(new_block)
+            if self.dedup is not None:
+                self.dedup.commit_block(new_block)
+            if self.state_store is not None:
+                self.state_store.commit_block(new_block, self.pending_nodes.values())
             self.pending_transactions = []  # 清空待處理交易
+            self.pending_nodes = {}
+            self.pending_lottery = None
             logger.info(f"區塊 {new_block.index} 已添加到鏈，驗證者: {verifier.id}")
             return new_block
         else:
-            logger.error(f"區塊 {new_block.index} 驗證失敗，未添加到鏈")
+            logger.error(f"區塊 {new_block.index} 驗證失敗，未添加到鏈 (分錄保持未結算)")
             return None
 
     def is_valid_block(self, block: Block, previous_block: Block) -> bool:
@@ -69,6 +181,14 @@ class Blockchain:
             logger.error("區塊哈希計算錯誤")
             return False
 
+        if block.difficulty and not meets_target(block.hash, block.difficulty):
+            logger.error(f"區塊哈希未達到難度目標: {block.difficulty}")
+            return False
+
+        if self.pow and block.difficulty != self.pow.difficulty:
+            logger.error(f"區塊難度不符: 預期 {self.pow.difficulty}，得到 {block.difficulty}")
+            return False
+
         return True
 
     def get_last_block(self) -> Block:
@@ -86,6 +206,17 @@ class Blockchain:
 
         return True
 
+    def close(self):
+        """釋放工作量證明、驗證管線、去重索引與狀態存儲的資源"""
+        if self.pow:
+            self.pow.close()
+        if self.validator is not None:
+            self.validator.close()
+        if self.dedup is not None:
+            self.dedup.close()
+        if self.state_store is not None:
+            self.state_store.close()
+
     def to_dict(self) -> List[Dict[str, any]]:
         """將區塊鏈轉為字典列表"""
         return [block.to_dict() for block in self.chain]
@@ -0,0 +1,274 @@
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .records import Record
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 16
+
+
+def digest_key(key: str) -> bytes:
+    """將去重鍵壓縮為 16 位元組摘要 (全零保留給空槽位)"""
+    digest = hashlib.blake2b(key.encode(), digest_size=KEY_BYTES).digest()
+    return digest if any(digest) else digest[:-1] + b"\x01"
+
+
+class _BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: bytes) -> Iterable[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, digest: bytes):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[position >> 3] >> (position & 7) & 1 for position in self._positions(digest))
+
+    def add_many(self, digests: np.ndarray):
+        """批次加入摘要 (N x 16 的 uint8 陣列)，位置與 add 相同"""
+        halves = digests.view("<u8")
+        h1 = halves[:, 0] % np.uint64(self.size)
+        h2 = (halves[:, 1] | np.uint64(1)) % np.uint64(self.size)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        positions = (h1[:, None] + steps * h2[:, None]) % np.uint64(self.size)
+        flags = np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), bitorder="little")
+        flags[positions.ravel()] = 1
+        self.bits[:] = np.packbits(flags, bitorder="little").tobytes()
+        self.count += len(digests)
+
+
+class ScalableBloomFilter:
+    """可擴展的布隆過濾器，滿載時加入容量加倍、誤判率減半的新層"""
+
+    def __init__(self, initial_capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters: List[_BloomFilter] = []
+
+    def add(self, digest: bytes):
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            level = len(self.filters)
+            self.filters.append(_BloomFilter(self.initial_capacity * 2 ** level,
+                                             self.error_rate * 0.5 ** (level + 1)))
+        self.filters[-1].add(digest)
+
+    def add_many(self, digests: np.ndarray):
+        """批次加入摘要 (N x 16 的 uint8 陣列)，依序填滿各層"""
+        while len(digests):
+            if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+                level = len(self.filters)
+                self.filters.append(_BloomFilter(self.initial_capacity * 2 ** level,
+                                                 self.error_rate * 0.5 ** (level + 1)))
+            bloom = self.filters[-1]
+            take = bloom.capacity - bloom.count
+            bloom.add_many(digests[:take])
+            digests = digests[take:]
+
+    def __contains__(self, digest: bytes) -> bool:
+        return any(digest in bloom for bloom in self.filters)
+
+
+class DiskHashIndex:
+    """
+    以 mmap 存取的開放定址雜湊檔，保存 16 位元組摘要的精確集合
+
+    線性探測，負載超過 max_load 時容量加倍並重建，查詢與插入平均 O(1)。
+    """
+    MAGIC = b"MCSDEDUP"
+    HEADER = struct.Struct("<8sQQ")  # (魔術字, 容量, 數量)
+
+    def __init__(self, path: str, initial_capacity: int = 1 << 16, max_load: float = 0.7):
+        self.path = path
+        self.max_load = max_load
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._create(path, initial_capacity)
+        self._open()
+
+    @classmethod
+    def _create(cls, path: str, capacity: int):
+        capacity = 1 << max(4, (capacity - 1).bit_length())
+        with open(path, 'wb') as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, capacity, 0))
+            file.truncate(cls.HEADER.size + capacity * KEY_BYTES)
+
+    def _open(self):
+        self._file = open(self.path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.capacity, self.count = self.HEADER.unpack_from(self._map)
+        if magic != self.MAGIC:
+            raise ValueError(f"不是有效的去重索引檔: {self.path}")
+
+    def _probe(self, digest: bytes) -> int:
+        """返回摘要所在或應插入的槽位"""
+        mask = self.capacity - 1
+        slot = int.from_bytes(digest[:8], "little") & mask
+        empty = bytes(KEY_BYTES)
+        while True:
+            offset = self.HEADER.size + slot * KEY_BYTES
+            current = self._map[offset:offset + KEY_BYTES]
+            if current == digest or current == empty:
+                return offset
+            slot = (slot + 1) & mask
+
+    def __contains__(self, digest: bytes) -> bool:
+        offset = self._probe(digest)
+        return self._map[offset:offset + KEY_BYTES] == digest
+
+    def add(self, digest: bytes) -> bool:
+        """加入摘要，已存在時返回 False"""
+        if (self.count + 1) > self.capacity * self.max_load:
+            self._grow()
+        offset = self._probe(digest)
+        if self._map[offset:offset + KEY_BYTES] == digest:
+            return False
+        self._map[offset:offset + KEY_BYTES] = digest
+        self.count += 1
+        self.HEADER.pack_into(self._map, 0, self.MAGIC, self.capacity, self.count)
+        return True
+
+    def keys(self) -> np.ndarray:
+        """所有已保存的摘要 (N x 16 的 uint8 陣列)"""
+        slots = np.frombuffer(self._map, dtype=np.uint8, offset=self.HEADER.size).reshape(-1, KEY_BYTES)
+        return slots[slots.any(axis=1)].copy()
+
+    @staticmethod
+    def _place(keys: np.ndarray, capacity: int) -> np.ndarray:
+        """
+        以線性探測批次計算每個摘要在新容量下的槽位
+
+        每輪讓所有仍在探測的摘要同時嘗試目前槽位，空槽位由第一個申請者取得，其餘前進一格；
+        被跳過的槽位都已佔用，因此結果與逐一插入一樣可由 _probe 找到。
+        """
+        mask = np.uint64(capacity - 1)
+        slots = keys[:, :8].copy().view("<u8").ravel() & mask
+        occupied = np.zeros(capacity, dtype=bool)
+        pending = np.arange(len(keys))
+        while len(pending):
+            targets = slots[pending]
+            free = ~occupied[targets]
+            claimed, first = np.unique(targets[free], return_index=True)
+            occupied[claimed] = True
+            placed = np.zeros(len(pending), dtype=bool)
+            placed[np.flatnonzero(free)[first]] = True
+            pending = pending[~placed]
+            slots[pending] = (slots[pending] + np.uint64(1)) & mask
+        return slots
+
+    def _grow(self):
+        """在暫存檔以向量化重雜湊建立加倍容量的索引，完成後才取代原檔，中途失敗不影響原索引"""
+        keys = self.keys()
+        capacity = self.capacity * 2
+        table = np.zeros((capacity, KEY_BYTES), dtype=np.uint8)
+        table[self._place(keys, capacity)] = keys
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(self.HEADER.pack(self.MAGIC, capacity, len(keys)))
+            file.write(table.tobytes())
+        self.close()
+        os.replace(temp_path, self.path)
+        self._open()
+
+    def close(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+
+class DuplicateDetector:
+    """
+    重放與重複提交偵測
+
+    以 (worker_id, task_id) 與簽名作為鍵，布隆過濾器快速排除未出現過的鍵，
+    可能重複時再以磁碟上的精確雜湊索引確認。已上鏈的鍵於 commit_block 時寫入，
+    待處理中的鍵另存於記憶體集合。
+    """
+
+    def __init__(self, path: Optional[str] = None, initial_capacity: int = 1_000_000, error_rate: float = 0.001):
+        self._owned_path = None  # 未指定路徑時自行建立的暫存索引檔，close 時刪除
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix="mcs-dedup-", suffix=".idx")
+            os.close(handle)
+            self._owned_path = path
+        self.index = DiskHashIndex(path)
+        self.bloom = ScalableBloomFilter(initial_capacity, error_rate)
+        self.pending = set()
+        self.stats = {"checked": 0, "bloom_hits": 0, "duplicates": 0}
+
+        # 從既有索引批次重建布隆過濾器
+        self.bloom.add_many(self.index.keys())
+        if self.index.count:
+            logger.info(f"已從 {path} 載入 {self.index.count} 個去重鍵")
+
+    @staticmethod
+    def transaction_keys(transaction: Any) -> List[bytes]:
+        """交易 (交易記錄或JSON形狀的字典) 中需要去重的鍵，兩種形式產生相同的鍵"""
+        if isinstance(transaction, Record):
+            if transaction.TYPE != "task_submissions":
+                return []
+            pairs = [(submission.worker_id, submission.task_id, submission.signature.hex())
+                     for submission in transaction.submissions]
+        else:
+            if transaction.get("type") != "task_submissions":
+                return []
+            pairs = [(submission["worker_id"], submission["task_id"], submission["signature"])
+                     for submission in transaction["submissions"]]
+        keys = []
+        for worker_id, task_id, signature in pairs:
+            keys.append(digest_key(f"sub:{worker_id}:{task_id}"))
+            keys.append(digest_key(f"sig:{signature}"))
+        return keys
+
+    def _seen(self, digest: bytes) -> bool:
+        self.stats["checked"] += 1
+        if digest in self.pending:
+            return True
+        if digest not in self.bloom:
+            return False
+        self.stats["bloom_hits"] += 1
+        return digest in self.index
+
+    def check_and_reserve(self, transaction: Dict[str, Any]) -> bool:
+        """交易沒有重複時保留其鍵並返回 True，有重複時返回 False"""
+        keys = self.transaction_keys(transaction)
+        if len(set(keys)) != len(keys) or any(self._seen(key) for key in keys):
+            self.stats["duplicates"] += 1
+            return False
+        self.pending.update(keys)
+        return True
+
+    def commit_block(self, block):
+        """區塊上鏈後將其中的鍵寫入布隆過濾器與磁碟索引"""
+        for transaction in block.transactions:
+            for key in self.transaction_keys(transaction):
+                self.pending.discard(key)
+                if self.index.add(key):
+                    self.bloom.add(key)
+
+    def close(self):
+        self.index.close()
+        if self._owned_path is not None:
+            for path in (self._owned_path, self._owned_path + ".tmp"):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._owned_path = None
@@ -0,0 +1,275 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .export import load_any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class NotFound(Exception):
+    pass
+
+
+class ChainIndex:
+    """
+    已保存區塊鏈的唯讀索引
+
+    載入時建立 哈希 -> 高度、任務ID -> 交易位置、worker -> 評估位置 的索引；
+    檔案修改時間改變時 (最多每 refresh_interval 秒檢查一次) 重新載入。
+    """
+
+    def __init__(self, filename: str, refresh_interval: float = 1.0):
+        self.filename = filename
+        self.refresh_interval = refresh_interval
+        self.version = 0  # 每次重新載入遞增，用於使回應快取失效
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        檔案有變動時重新載入，返回是否重新載入
+
+        已有索引時，載入失敗 (檔案寫到一半、暫時不存在等) 只記錄警告並繼續使用先前的索引，
+        下次檢查時重試；首次載入失敗時拋出例外。
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.refresh_interval:
+            return False
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.path.getmtime(self.filename)
+                if not force and mtime == self._mtime:
+                    return False
+                chain = load_any(self.filename)
+            except Exception as e:
+                if self.version == 0:
+                    raise
+                logger.warning(f"重新載入 {self.filename} 失敗，繼續使用先前的索引: {e}")
+                return False
+            self._load(chain)
+            self._mtime = mtime
+            self.version += 1
+        return True
+
+    def _load(self, chain: List[Dict[str, Any]]):
+        by_hash = {}
+        tasks: Dict[str, List[Tuple[int, int]]] = {}
+        evaluations: Dict[int, List[Tuple[int, int, int]]] = {}
+        for height, block in enumerate(chain):
+            by_hash[block["hash"]] = height
+            for tx_index, transaction in enumerate(block["transactions"]):
+                task_id = transaction.get("task_id")
+                if task_id is not None:
+                    tasks.setdefault(task_id, []).append((height, tx_index))
+                if transaction.get("type") == "task_evaluations":
+                    for eval_index, evaluation in enumerate(transaction["evaluations"]):
+                        evaluations.setdefault(evaluation["worker_id"], []).append((height, tx_index, eval_index))
+        # 整批替換，讀取端不會看到一半的索引
+        self.chain, self.by_hash, self.tasks, self.evaluations = chain, by_hash, tasks, evaluations
+
+    @property
+    def height(self) -> int:
+        return len(self.chain) - 1
+
+    def block_at(self, height: int) -> Dict[str, Any]:
+        if height >= len(self.chain):
+            raise NotFound(f"找不到區塊 {height}")
+        return self.chain[height]
+
+    def block_by_hash(self, block_hash: str) -> Dict[str, Any]:
+        height = self.by_hash.get(block_hash)
+        if height is None:
+            raise NotFound(f"找不到區塊 {block_hash}")
+        return self.chain[height]
+
+
+def _page(items: List[Any], query: Dict[str, List[str]]) -> Tuple[List[Any], Dict[str, int]]:
+    """以 offset/limit 分頁，參數不是整數時拋出 ValueError"""
+    try:
+        offset = max(0, int(query.get("offset", ["0"])[0]))
+        limit = min(MAX_PAGE_SIZE, max(1, int(query.get("limit", [str(DEFAULT_PAGE_SIZE)])[0])))
+    except ValueError:
+        raise ValueError("offset 與 limit 必須是整數") from None
+    return items[offset:offset + limit], {"offset": offset, "limit": limit, "total": len(items)}
+
+
+class ExplorerAPI:
+    """
+    區塊瀏覽器的路由與回應快取
+
+    回應序列化後放入 LRU 快取 (鍵為路徑與查詢字串)，附帶內容哈希作為 ETag；
+    只有以哈希定址且深度達到 finality 的區塊視為不可變，以長效 Cache-Control 回應並在重新載入後繼續使用，
+    其他回應 (以高度或任務ID定址的內容可能因重組或重新載入而改變) 只在同一索引版本內有效。
+    """
+
+    ROUTES = [
+        (re.compile(r"^/head$"), "_head"),
+        (re.compile(r"^/blocks$"), "_blocks"),
+        (re.compile(r"^/blocks/(?P<block_hash>[0-9a-f]{64})$"), "_block_by_hash"),
+        (re.compile(r"^/blocks/(?P<height>\d+)$"), "_block_at"),
+        (re.compile(r"^/tasks/(?P<task_id>[^/]+)$"), "_task"),
+        (re.compile(r"^/workers/(?P<worker_id>\d+)/evaluations$"), "_worker_evaluations"),
+    ]
+
+    def __init__(self, index: ChainIndex, cache_size: int = 1024, finality: int = 6):
+        self.index = index
+        self.cache_size = cache_size
+        self.finality = finality
+        # 路徑 -> (索引版本，不可變的回應為 None, 內容, ETag, Cache-Control)
+        self._cache: "OrderedDict[str, Tuple[Optional[int], bytes, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def handle(self, target: str) -> Tuple[int, bytes, str, str]:
+        """返回 (狀態碼, 內容, ETag, Cache-Control)"""
+        self.index.refresh()
+        version = self.index.version
+        with self._lock:
+            cached = self._cache.get(target)
+            if cached is not None and cached[0] in (None, version):
+                self._cache.move_to_end(target)
+                self.hits += 1
+                return 200, cached[1], cached[2], cached[3]
+            self.misses += 1
+
+        parts = urlsplit(target)
+        query = parse_qs(parts.query)
+        for pattern, name in self.ROUTES:
+            match = pattern.match(parts.path)
+            if match:
+                break
+        else:
+            return self._error(404, f"未知路徑 {parts.path}")
+
+        try:
+            payload, immutable = getattr(self, name)(query, **match.groupdict())
+        except NotFound as e:
+            return self._error(404, str(e))
+        except ValueError as e:
+            return self._error(400, str(e))
+
+        body = json.dumps(payload).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        cache_control = IMMUTABLE_CACHE_CONTROL if immutable else "no-cache"
+        with self._lock:
+            self._cache[target] = (None if immutable else version, body, etag, cache_control)
+            self._cache.move_to_end(target)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return 200, body, etag, cache_control
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, bytes, str, str]:
+        return status, json.dumps({"error": message}).encode(), "", "no-cache"
+
+    def _is_final(self, height: int) -> bool:
+        return self.index.height - height >= self.finality
+
+    def _head(self, query):
+        head = self.index.chain[-1]
+        return {"height": self.index.height, "hash": head["hash"], "timestamp": head["timestamp"],
+                "verifier_id": head["verifier_id"], "transactions": len(head["transactions"])}, False
+
+    def _blocks(self, query):
+        # 由新到舊的區塊摘要
+        heights = list(range(self.index.height, -1, -1))
+        page, meta = _page(heights, query)
+        items = [{"index": self.index.chain[h]["index"], "hash": self.index.chain[h]["hash"],
+                  "timestamp": self.index.chain[h]["timestamp"], "verifier_id": self.index.chain[h]["verifier_id"],
+                  "transactions": len(self.index.chain[h]["transactions"])} for h in page]
+        return {"items": items, **meta}, False
+
+    def _block_by_hash(self, query, block_hash):
+        block = self.index.block_by_hash(block_hash)
+        return block, self._is_final(block["index"])
+
+    def _block_at(self, query, height):
+        return self.index.block_at(int(height)), False
+
+    def _task(self, query, task_id):
+        refs = self.index.tasks.get(task_id)
+        if not refs:
+            raise NotFound(f"找不到任務 {task_id}")
+        transactions = [{"block": height, **self.index.chain[height]["transactions"][tx_index]}
+                        for height, tx_index in refs]
+        return {"task_id": task_id, "transactions": transactions}, False
+
+    def _worker_evaluations(self, query, worker_id):
+        refs = self.index.evaluations.get(int(worker_id), [])
+        page, meta = _page(refs, query)
+        items = [{"block": height, **self.index.chain[height]["transactions"][tx_index]["evaluations"][eval_index]}
+                 for height, tx_index, eval_index in page]
+        return {"worker_id": int(worker_id), "items": items, **meta}, False
+
+
+def make_handler(api: ExplorerAPI) -> Callable[..., BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            status, body, etag, cache_control = api.handle(self.path)
+            if status == 200 and etag and etag in self.headers.get("If-None-Match", ""):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", cache_control)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", cache_control)
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return _Handler
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='唯讀區塊瀏覽器 HTTP 服務')
+    parser.add_argument('chain', nargs='?', default='data/blockchain.json', help='區塊鏈JSON或壓縮存檔')
+    parser.add_argument('--host', default='127.0.0.1', help='監聽位址 (默認: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='監聽埠 (默認: 8080)')
+    parser.add_argument('--cache-size', type=int, default=1024, help='回應快取的項目數 (默認: 1024)')
+    parser.add_argument('--finality', type=int, default=6, help='視為不可變的區塊深度 (默認: 6)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    api = ExplorerAPI(ChainIndex(args.chain), args.cache_size, args.finality)
+    with ThreadingHTTPServer((args.host, args.port), make_handler(api)) as server:
+        print(f"區塊瀏覽器: http://{args.host}:{args.port}/head")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import json
+import logging
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .archive import MAGIC, read_archive
+from .replay import iter_coin_events, load_chain
+
+logger = logging.getLogger(__name__)
+
+# 每張表的欄位與型別，worker 欄位用於建立每個 worker 的偏移索引
+TABLES = {
+    "evaluations": {
+        "key": "worker_id",
+        "columns": {
+            "height": np.int64,
+            "worker_id": np.int64,
+            "task_id": np.int32,
+            "verifier_id": np.int64,
+            "completion": np.float64,
+            "status": np.int8,
+            "r_coin_change": np.int64,
+            "timestamp": "datetime64[us]",
+        },
+    },
+    "submissions": {
+        "key": "worker_id",
+        "columns": {
+            "height": np.int64,
+            "worker_id": np.int64,
+            "task_id": np.int32,
+            "timestamp": "datetime64[us]",
+        },
+    },
+    "coin_changes": {
+        "key": "node_id",
+        "columns": {
+            "height": np.int64,
+            "node_id": np.int64,
+            "event": np.int8,
+            "r_coin_change": np.int64,
+            "s_coin_change": np.float64,
+        },
+    },
+}
+
+
+def load_any(filename: str) -> List[Dict[str, Any]]:
+    """讀取 blockchain.json 或欄位式存檔"""
+    with open(filename, 'rb') as file:
+        is_archive = file.read(len(MAGIC)) == MAGIC
+    return read_archive(filename) if is_archive else load_chain(filename)
+
+
+class _Codes:
+    """字串 -> 整數編碼表"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+
+def export_chain(chain: List[Dict[str, Any]], directory: str):
+    """
+    將區塊鏈匯出為欄位陣列目錄
+
+    每個欄位是一個 .npy 檔 (<表>.<欄位>.npy)，可用 mmap 直接讀取；
+    每張表按 worker/節點穩定排序，並附帶 <表>.index_ids 與 <表>.index_offsets，
+    第 i 個 worker 的資料為 offsets[i]:offsets[i + 1]。
+    """
+    task_ids, statuses, events = _Codes(), _Codes(), _Codes()
+    rows = {name: {column: [] for column in table["columns"]} for name, table in TABLES.items()}
+    evaluations, submissions, coin_changes = rows["evaluations"], rows["submissions"], rows["coin_changes"]
+
+    for block in chain:
+        height = block["index"]
+        for transaction in block["transactions"]:
+            tx_type = transaction.get("type")
+            if tx_type == "task_submissions":
+                for submission in transaction["submissions"]:
+                    submissions["height"].append(height)
+                    submissions["worker_id"].append(submission["worker_id"])
+                    submissions["task_id"].append(task_ids(submission["task_id"]))
+                    submissions["timestamp"].append(submission["timestamp"])
+            elif tx_type == "task_evaluations":
+                for evaluation in transaction["evaluations"]:
+                    evaluations["height"].append(height)
+                    evaluations["worker_id"].append(evaluation["worker_id"])
+                    evaluations["task_id"].append(task_ids(evaluation["task_id"]))
+                    evaluations["verifier_id"].append(transaction["verifier_id"])
+                    evaluations["completion"].append(evaluation["task_completion"])
+                    evaluations["status"].append(statuses(evaluation["status"]))
+                    evaluations["r_coin_change"].append(evaluation["r_coin_change"])
+                    evaluations["timestamp"].append(evaluation["timestamp"])
+
+            for node_id, r_change, s_change in iter_coin_events(transaction):
+                coin_changes["height"].append(height)
+                coin_changes["node_id"].append(node_id)
+                coin_changes["event"].append(events(tx_type))
+                coin_changes["r_coin_change"].append(r_change)
+                coin_changes["s_coin_change"].append(s_change)
+
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for name, table in TABLES.items():
+        columns = {column: np.asarray(rows[name][column], dtype=dtype)
+                   for column, dtype in table["columns"].items()}
+        order = np.argsort(columns[table["key"]], kind="stable")
+        ids, starts = np.unique(columns[table["key"]][order], return_index=True)
+        offsets = np.append(starts, len(order)).astype(np.int64)
+
+        for column, values in columns.items():
+            np.save(os.path.join(directory, f"{name}.{column}.npy"), values[order])
+        np.save(os.path.join(directory, f"{name}.index_ids.npy"), ids)
+        np.save(os.path.join(directory, f"{name}.index_offsets.npy"), offsets)
+        counts[name] = len(order)
+
+    with open(os.path.join(directory, "meta.json"), 'w') as file:
+        json.dump({
+            "tables": {name: list(table["columns"]) for name, table in TABLES.items()},
+            "rows": counts,
+            "task_ids": task_ids.values,
+            "statuses": statuses.values,
+            "events": events.values
+        }, file, indent=4)
+    logger.info(f"已匯出 {counts} 到 {directory}")
+
+
+class ColumnarExport:
+    """讀取 export_chain 的輸出，欄位以 mmap 方式延遲載入"""
+
+    def __init__(self, directory: str, mmap: bool = True):
+        self.directory = directory
+        self.mmap_mode = 'r' if mmap else None
+        with open(os.path.join(directory, "meta.json"), 'r') as file:
+            self.meta = json.load(file)
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def column(self, table: str, column: str) -> np.ndarray:
+        """取得整個欄位"""
+        name = f"{table}.{column}"
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode=self.mmap_mode)
+        return self._arrays[name]
+
+    def table(self, table: str) -> Dict[str, np.ndarray]:
+        """取得一張表的所有欄位"""
+        return {column: self.column(table, column) for column in self.meta["tables"][table]}
+
+    def worker_rows(self, table: str, worker_id: int) -> Dict[str, np.ndarray]:
+        """透過偏移索引切出單一 worker 的資料，不需掃描整張表"""
+        ids = self.column(table, "index_ids")
+        offsets = self.column(table, "index_offsets")
+        position = int(np.searchsorted(ids, worker_id))
+        if position < len(ids) and ids[position] == worker_id:
+            start, end = int(offsets[position]), int(offsets[position + 1])
+        else:
+            start = end = 0
+        return {column: self.column(table, column)[start:end] for column in self.meta["tables"][table]}
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='將區塊鏈匯出為欄位式分析資料')
+    parser.add_argument('chain_file', help='blockchain.json 或欄位式存檔')
+    parser.add_argument('output_dir', help='輸出目錄')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    export_chain(load_any(args.chain_file), args.output_dir)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,311 @@
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.models.node import Node
+from .records import Record
+
+logger = logging.getLogger(__name__)
+
+# 系統帳戶
+ISSUANCE = "issuance"  # 協議發行：初始分配、超出託管的評估獎勵、驗證者獎勵與宣告換得的S-coin由此轉出，餘額為負
+ESCROW = "escrow"  # 請求者支付的任務獎勵，按任務託管 (Ledger.escrows)
+STAKE = "stake"  # 節點宣告 (消耗) 的R-coin
+BURN = "burn"  # 品質不佳的懲罰
+SYSTEM_ACCOUNTS = (ISSUANCE, ESCROW, STAKE, BURN)
+ESCROW_TYPES = ("task_creation", "task_evaluations", "task_refund")  # 依任務ID託管獎勵的交易類型
+
+CURRENCIES = ("r_coin", "s_coin")
+CURRENCY_DTYPES = {"r_coin": np.int64, "s_coin": np.float64}
+BALANCE_TOLERANCE = 1e-9  # 結算後不超過此值的浮點負殘差歸零 (差額計入發行帳戶)，更大的透支拋出 InsufficientFunds
+
+Account = Union[Node, str]
+
+
+class InsufficientFunds(ValueError):
+    pass
+
+
+def task_of(transaction: Any) -> Optional[str]:
+    """交易涉及託管的任務ID (任務創建、評估與退款)，其他交易為 None"""
+    if isinstance(transaction, Record) and transaction.TYPE in ESCROW_TYPES:
+        return transaction.task_id
+    return None
+
+
+def transaction_postings(transaction: Any, escrows: Dict[str, List]) -> Iterable[Tuple[str, Any, Any, Any]]:
+    """
+    交易記錄對應的分錄 (幣種, 轉出帳戶, 轉入帳戶, 金額)，節點帳戶以節點ID表示
+
+    escrows 為各任務的託管餘額 (任務ID -> [請求者ID, R-coin, S-coin])，隨交易更新：
+    帶任務ID的任務創建開立 (或增加) 託管，評估獎勵先由該任務的託管支付、不足部分才由發行帳戶轉出，
+    退款 (task_refund) 將託管餘額退還請求者並結束託管，超過託管餘額時拋出 InsufficientFunds。
+    初始分配 (coin_allocation) 在開立帳戶時已計入發行帳戶，不產生分錄；非記錄的交易也不產生分錄。
+    """
+    tx_type = transaction.TYPE if isinstance(transaction, Record) else None
+    if tx_type == "task_creation":
+        if transaction.task_id is not None:
+            escrow = escrows.setdefault(transaction.task_id, [transaction.requester_id, 0, 0])
+            escrow[1] -= transaction.r_coin_change
+            escrow[2] -= transaction.s_coin_change
+        yield "r_coin", transaction.requester_id, ESCROW, -transaction.r_coin_change
+        if transaction.s_coin_change:
+            yield "s_coin", transaction.requester_id, ESCROW, -transaction.s_coin_change
+    elif tx_type == "verifier_selection":
+        yield "r_coin", transaction.node_id, STAKE, -transaction.r_coin_change
+        yield "s_coin", ISSUANCE, transaction.node_id, transaction.s_coin_change
+    elif tx_type == "task_evaluations":
+        escrow = escrows.get(transaction.task_id)
+        for evaluation in transaction.evaluations:
+            reward = evaluation.r_coin_change
+            if reward > 0:
+                escrowed = min(reward, escrow[1]) if escrow is not None else 0
+                if escrowed:
+                    escrow[1] -= escrowed
+                    yield "r_coin", ESCROW, evaluation.worker_id, escrowed
+                if reward > escrowed:
+                    yield "r_coin", ISSUANCE, evaluation.worker_id, reward - escrowed
+            elif reward < 0:
+                yield "r_coin", evaluation.worker_id, BURN, -reward
+    elif tx_type == "task_refund":
+        escrow = escrows.get(transaction.task_id)
+        if escrow is None or escrow[0] != transaction.requester_id or \
+                transaction.r_coin_change > escrow[1] or transaction.s_coin_change > escrow[2]:
+            raise InsufficientFunds(f"任務 {transaction.task_id} 的託管餘額不足以退款 "
+                                    f"(託管: {escrow}, 退款: {transaction.r_coin_change}, {transaction.s_coin_change})")
+        del escrows[transaction.task_id]
+        yield "r_coin", ESCROW, transaction.requester_id, transaction.r_coin_change
+        if transaction.s_coin_change:
+            yield "s_coin", ESCROW, transaction.requester_id, transaction.s_coin_change
+    elif tx_type == "verifier_reward":
+        yield "r_coin", ISSUANCE, transaction.node_id, transaction.r_coin_change
+        if transaction.s_coin_change:
+            yield "s_coin", ISSUANCE, transaction.node_id, transaction.s_coin_change
+
+
+class Settlement:
+    """stage 計算出的結算結果，commit 之前不改變任何餘額"""
+
+    def __init__(self, system_deltas: Dict[str, np.ndarray], changes: Dict[int, Tuple[Node, Any, Any]]):
+        self.system_deltas = system_deltas  # 幣種 -> 系統帳戶差額
+        self.changes = changes  # 節點ID -> (節點, R-coin差額, S-coin差額)
+
+    @property
+    def nodes(self) -> List[Node]:
+        return [node for node, _, _ in self.changes.values()]
+
+    def balance(self, node: Node) -> Tuple[Any, Any]:
+        """節點結算後的 (R-coin, S-coin) 餘額"""
+        change = self.changes.get(node.id)
+        if change is None:
+            return node.r_coin, node.s_coin
+        return node.r_coin + change[1], node.s_coin + change[2]
+
+    def balances(self) -> Iterator[Tuple[int, Any, Any]]:
+        """結算後有變動節點的 (節點ID, R-coin, S-coin)"""
+        for node_id, (node, r_change, s_change) in self.changes.items():
+            yield node_id, node.r_coin + r_change, node.s_coin + s_change
+
+
+class Ledger:
+    """
+    複式記帳的幣值日記帳
+
+    每個事件以 transfer 記錄一筆分錄 (轉入帳戶借方、轉出帳戶貸方，金額相同)；
+    區塊鏈的交易以 post 依記錄內容記帳，經過驗證管線的交易先暫掛，
+    通過後以 confirm 確認、被拒絕時以 reverse 沖銷 (連同其對任務託管的變動)，使結算只包含被接受的交易。
+    任務獎勵託管在 escrow 帳戶並按任務追蹤 (escrows)，評估獎勵由託管支付，任務結束時以退款交易退還餘額。
+    分錄在區塊內累積，區塊提交時以向量化方式一次結算：stage 按帳戶彙總借貸差額、
+    斷言每種幣的差額總和為零 (守恆) 並檢查沒有節點透支，但不改變餘額；
+    區塊通過驗證後 commit 才讓每個節點只更新一次，未通過時分錄保持未結算。
+    區塊內查詢餘額使用 balance，即已結算餘額加上未結算的差額。
+    """
+
+    def __init__(self):
+        self._index: Dict[Any, int] = {name: i for i, name in enumerate(SYSTEM_ACCOUNTS)}
+        self._nodes: List[Node] = []  # 節點帳戶，索引為帳戶編號 - len(SYSTEM_ACCOUNTS)
+        self.system_balances = {currency: np.zeros(len(SYSTEM_ACCOUNTS), dtype=CURRENCY_DTYPES[currency])
+                                for currency in CURRENCIES}
+        self._postings = {currency: ([], [], []) for currency in CURRENCIES}  # (借方, 貸方, 金額)
+        self._unsettled: Dict[int, List] = {}  # 節點ID -> [未結算R-coin差額, 未結算S-coin差額]
+        self._provisional: Dict[int, Tuple[Any, List[Tuple[str, int, int, Any]]]] = {}  # id(交易) -> (交易, 分錄)
+        self.escrows: Dict[str, List] = {}  # 任務ID -> [請求者ID, 託管R-coin, 託管S-coin]
+        self.opening_balances: Dict[int, Tuple[Any, Any]] = {}  # 節點ID -> 開戶時自發行帳戶轉入的餘額
+        self.stats = {"postings": 0, "settlements": 0}
+
+    def open_account(self, node: Node) -> int:
+        """開立節點帳戶，節點當前餘額視為自發行帳戶轉入"""
+        account = self._index.get(node.id)
+        if account is None:
+            account = len(SYSTEM_ACCOUNTS) + len(self._nodes)
+            self._index[node.id] = account
+            self._nodes.append(node)
+            self.opening_balances[node.id] = (node.r_coin, node.s_coin)
+            self.system_balances["r_coin"][0] -= node.r_coin
+            self.system_balances["s_coin"][0] -= node.s_coin
+        return account
+
+    def _account(self, account: Account) -> int:
+        if isinstance(account, Node):
+            return self.open_account(account)
+        return self._index[account]
+
+    def balance(self, node: Node) -> Tuple[Any, Any]:
+        """節點含未結算分錄的 (R-coin, S-coin) 餘額"""
+        unsettled = self._unsettled.get(node.id)
+        if unsettled is None:
+            return node.r_coin, node.s_coin
+        return node.r_coin + unsettled[0], node.s_coin + unsettled[1]
+
+    def transfer(self, currency: str, source: Account, target: Account, amount, partial: bool = False):
+        """
+        自 source 轉出 amount 到 target，返回實際記錄的金額
+
+        source 為節點時不得超過其含未結算分錄的餘額：partial=True 時只轉出可用餘額，否則拋出 InsufficientFunds。
+        """
+        if amount < 0:
+            raise ValueError(f"轉帳金額不可為負數: {amount}")
+        slot = CURRENCIES.index(currency)
+        if isinstance(source, Node):
+            available = self.balance(source)[slot]
+            if amount > available:
+                if not partial:
+                    raise InsufficientFunds(
+                        f"Node {source.id} 沒有足夠的 {currency} (擁有: {available}, 需要: {amount})")
+                amount = max(available, 0)
+        if amount == 0:
+            return amount
+        self._append(currency, self._account(target), self._account(source), amount)
+        return amount
+
+    def _append(self, currency: str, debit: int, credit: int, amount):
+        """記錄一筆分錄並更新節點的未結算差額"""
+        debits, credits, amounts = self._postings[currency]
+        debits.append(debit)
+        credits.append(credit)
+        amounts.append(amount)
+        slot = CURRENCIES.index(currency)
+        system_count = len(SYSTEM_ACCOUNTS)
+        if credit >= system_count:
+            self._unsettled.setdefault(self._nodes[credit - system_count].id, [0, 0])[slot] -= amount
+        if debit >= system_count:
+            self._unsettled.setdefault(self._nodes[debit - system_count].id, [0, 0])[slot] += amount
+        self.stats["postings"] += 1
+
+    def escrow_balance(self, task_id: str) -> Tuple[Any, Any]:
+        """任務尚未支付的託管 (R-coin, S-coin)，含未結算分錄"""
+        escrow = self.escrows.get(task_id)
+        return (escrow[1], escrow[2]) if escrow is not None else (0, 0)
+
+    def post(self, transaction: Any, provisional: bool = False):
+        """
+        依交易記錄的幣值變動記帳 (不檢查節點餘額，由驗證管線或呼叫端檢查；退款超過託管時拋出 InsufficientFunds)
+
+        provisional=True 時記為暫掛，之後以 confirm 確認或以 reverse 沖銷；交易中的節點須已開立帳戶。
+        """
+        entries = []
+        for currency, source, target, amount in list(transaction_postings(transaction, self.escrows)):
+            if amount:
+                entry = (currency, self._index[target], self._index[source], amount)
+                self._append(*entry)
+                entries.append(entry)
+        if provisional and (entries or task_of(transaction) is not None):
+            self._provisional[id(transaction)] = (transaction, entries)
+
+    def confirm(self, transaction: Any):
+        """確認交易被接受：暫掛的分錄保留，未暫掛的交易此時記帳"""
+        if self._provisional.pop(id(transaction), None) is None:
+            self.post(transaction)
+
+    def reverse(self, transaction: Any):
+        """沖銷被拒絕交易的暫掛分錄 (以反向分錄抵銷) 並還原其對任務託管的變動，沒有暫掛時不做任何事"""
+        held = self._provisional.pop(id(transaction), None)
+        if held is None:
+            return
+        for currency, debit, credit, amount in held[1]:
+            self._append(currency, credit, debit, amount)
+        self._unwind_escrow(*held)
+
+    def _unwind_escrow(self, transaction: Any, entries: List[Tuple[str, int, int, Any]]):
+        """還原被沖銷交易對任務託管的變動 (轉入託管者扣回、自託管轉出者加回)，沖銷後沒有餘額的任務創建移除其託管"""
+        task_id = task_of(transaction)
+        if task_id is None:
+            return
+        if transaction.TYPE == "task_refund":
+            self.escrows.setdefault(task_id, [transaction.requester_id, 0, 0])
+        escrow = self.escrows.get(task_id)
+        if escrow is None:
+            return
+        escrow_account = self._index[ESCROW]
+        for currency, debit, credit, amount in entries:
+            slot = 1 + CURRENCIES.index(currency)
+            if debit == escrow_account:
+                escrow[slot] -= amount
+            elif credit == escrow_account:
+                escrow[slot] += amount
+        if transaction.TYPE == "task_creation" and not escrow[1] and not escrow[2]:
+            del self.escrows[task_id]
+
+    @property
+    def pending(self) -> int:
+        return sum(len(amounts) for _, _, amounts in self._postings.values())
+
+    def stage(self) -> Settlement:
+        """計算所有未結算分錄的結算結果，節點結算後透支時拋出 InsufficientFunds"""
+        account_count = len(SYSTEM_ACCOUNTS) + len(self._nodes)
+        deltas = {}
+        for currency in CURRENCIES:
+            debits, credits, amounts = self._postings[currency]
+            delta = np.zeros(account_count, dtype=CURRENCY_DTYPES[currency])
+            if amounts:
+                values = np.asarray(amounts, dtype=CURRENCY_DTYPES[currency])
+                np.add.at(delta, np.asarray(debits, dtype=np.int64), values)
+                np.subtract.at(delta, np.asarray(credits, dtype=np.int64), values)
+                assert abs(delta.sum()) <= BALANCE_TOLERANCE * max(1.0, float(np.abs(values).sum())), \
+                    f"{currency} 分錄借貸不平衡: {delta.sum()}"
+            deltas[currency] = delta
+
+        system_count = len(SYSTEM_ACCOUNTS)
+        system_deltas = {currency: deltas[currency][:system_count].copy() for currency in CURRENCIES}
+        changed = np.flatnonzero((deltas["r_coin"][system_count:] != 0) | (deltas["s_coin"][system_count:] != 0))
+        changes = {}
+        for offset in changed:
+            node = self._nodes[offset]
+            r_change = int(deltas["r_coin"][system_count + offset])
+            s_change = float(deltas["s_coin"][system_count + offset]) or 0
+            if node.r_coin + r_change < 0 or node.s_coin + s_change < -BALANCE_TOLERANCE:
+                raise InsufficientFunds(f"Node {node.id} 結算後透支 (R-coin: {node.r_coin} {r_change:+}, "
+                                        f"S-coin: {node.s_coin} {s_change:+})")
+            if node.s_coin + s_change < 0:
+                # 浮點捨入的負殘差歸零，差額由發行帳戶吸收以維持守恆
+                system_deltas["s_coin"][0] += s_change + node.s_coin
+                s_change = -node.s_coin
+            changes[node.id] = (node, r_change, s_change)
+        return Settlement(system_deltas, changes)
+
+    def commit(self, settlement: Settlement) -> List[Node]:
+        """套用 stage 的結果並清空未結算分錄，返回餘額有變動的節點"""
+        for node, r_change, s_change in settlement.changes.values():
+            node.update_coins(r_change, s_change)
+        for currency in CURRENCIES:
+            self.system_balances[currency] += settlement.system_deltas[currency]
+            for column in self._postings[currency]:
+                column.clear()
+        self._unsettled.clear()
+        self.stats["settlements"] += 1
+        return settlement.nodes
+
+    def settle(self) -> List[Node]:
+        """結算所有未結算分錄並返回餘額有變動的節點"""
+        return self.commit(self.stage())
+
+    def trial_balance(self) -> Dict[str, Dict[str, Any]]:
+        """已結算的試算表：系統帳戶與節點合計的餘額，每種幣的總和 (total) 恆為零"""
+        result = {}
+        for index, currency in enumerate(CURRENCIES):
+            balances = {name: self.system_balances[currency][i].item() for i, name in enumerate(SYSTEM_ACCOUNTS)}
+            balances["nodes"] = sum(node.r_coin if index == 0 else node.s_coin for node in self._nodes)
+            balances["total"] = sum(balances.values())
+            result[currency] = balances
+        return result
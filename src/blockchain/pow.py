@@ -0,0 +1,82 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+NONCE_BYTES = 8
+
+
+def pow_hash(content_digest: bytes, nonce: int) -> str:
+    """區塊內容哈希加上 nonce 後的密封哈希"""
+    return hashlib.sha256(content_digest + nonce.to_bytes(NONCE_BYTES, "little")).hexdigest()
+
+
+def meets_target(block_hash: str, difficulty: int) -> bool:
+    """哈希是否有至少 difficulty 個前導零位元"""
+    return int(block_hash, 16) >> (256 - difficulty) == 0
+
+
+def _search_nonce(content_digest: bytes, difficulty: int, start: int, count: int) -> Optional[int]:
+    """在 [start, start + count) 中搜尋符合難度的 nonce"""
+    base = hashlib.sha256(content_digest)  # 內容只雜湊一次，每次只補上 nonce 位元組
+    shift = 256 - difficulty
+    for nonce in range(start, start + count):
+        attempt = base.copy()
+        attempt.update(nonce.to_bytes(NONCE_BYTES, "little"))
+        if int.from_bytes(attempt.digest(), "big") >> shift == 0:
+            return nonce
+    return None
+
+
+class ProofOfWork:
+    """
+    選用的工作量證明密封
+
+    區塊內容先序列化並雜湊一次，搜尋時只替換 nonce 位元組，
+    搜尋範圍切成多個區段分派到進程池，取最小的有效 nonce 以保持結果可重現。
+    """
+
+    def __init__(self, difficulty: int, workers: Optional[int] = None, chunk_size: int = 50000):
+        if not 0 <= difficulty <= 256:
+            raise ValueError(f"難度必須介於 0 與 256 之間: {difficulty}")
+        self.difficulty = difficulty
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def seal(self, content_digest: bytes) -> int:
+        """搜尋符合難度的 nonce"""
+        if self.workers == 1:
+            start = 0
+            while True:
+                nonce = _search_nonce(content_digest, self.difficulty, start, self.chunk_size)
+                if nonce is not None:
+                    return nonce
+                start += self.chunk_size
+
+        pool = self._get_pool()
+        start = 0
+        while True:
+            futures = [
+                pool.submit(_search_nonce, content_digest, self.difficulty, start + i * self.chunk_size,
+                            self.chunk_size)
+                for i in range(self.workers)
+            ]
+            found = [nonce for nonce in (future.result() for future in futures) if nonce is not None]
+            if found:
+                return min(found)
+            start += self.workers * self.chunk_size
+
+    def close(self):
+        """關閉進程池"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
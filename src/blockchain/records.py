@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_iso(micros: int) -> str:
+    """紀元微秒轉為匯出用的 ISO 時間字串"""
+    return (EPOCH + timedelta(microseconds=int(micros))).isoformat()
+
+
+def from_iso(timestamp: str) -> int:
+    """to_iso 的反函數，無法無損還原時拋出 ValueError"""
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is not None or parsed.isoformat() != timestamp:
+        raise ValueError(f"無法還原的時間字串: {timestamp}")
+    return (parsed - EPOCH) // _MICROSECOND
+
+
+# 記錄中以原始型別保存、匯出時需轉換的欄位
+_ENCODERS = {"timestamp": to_iso, "task_hash": bytes.hex, "signature": bytes.hex}
+_DECODERS = {"timestamp": from_iso, "task_hash": bytes.fromhex, "signature": bytes.fromhex}
+
+
+class Record:
+    """
+    不可變交易記錄的共同方法，與 NamedTuple 欄位類組合使用
+
+    時間以紀元微秒、摘要以原始位元組保存，to_dict 才轉為既有的JSON形狀 (值為 None 的選用欄位省略)。
+    記錄保持 NamedTuple 的語意 (索引、拆包、in 比較元素)，不提供映射介面；
+    需要以欄位名稱處理JSON形狀的程式使用 to_dict 或 export_transaction。
+    """
+
+    __slots__ = ()
+    TYPE: Optional[str] = None  # 交易類型，巢狀記錄 (提交、評估) 為 None
+    NESTED: Dict[str, type] = {}  # 欄位 -> 巢狀記錄類
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {"type": self.TYPE} if self.TYPE is not None else {}
+        for name, value in zip(self._fields, self):
+            if value is None:
+                continue
+            if name in self.NESTED:
+                result[name] = [item.to_dict() for item in value]
+            else:
+                encoder = _ENCODERS.get(name)
+                result[name] = encoder(value) if encoder is not None else value
+        return result
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        """由JSON形狀的字典還原，缺少必要欄位時拋出 KeyError"""
+        values = []
+        for name in cls._fields:
+            if name not in data:
+                values.append(cls._field_defaults[name])
+            elif name in cls.NESTED:
+                values.append(tuple(cls.NESTED[name].from_dict(item) for item in data[name]))
+            else:
+                decoder = _DECODERS.get(name)
+                values.append(decoder(data[name]) if decoder is not None else data[name])
+        return cls(*values)
+
+
+class _SubmissionFields(NamedTuple):
+    worker_id: int
+    task_hash: bytes
+    timestamp: int
+    signature: bytes
+    task_id: Optional[str] = None
+
+
+class Submission(Record, _SubmissionFields):
+    __slots__ = ()
+
+
+class _EvaluationFields(NamedTuple):
+    worker_id: int
+    task_completion: float
+    status: str
+    r_coin_before: int
+    r_coin_after: int
+    r_coin_change: int
+    timestamp: int
+    task_id: Optional[str] = None
+
+
+class Evaluation(Record, _EvaluationFields):
+    __slots__ = ()
+
+
+class _CoinAllocationFields(NamedTuple):
+    node_id: int
+    r_coin_change: Any
+    s_coin_change: Any
+
+
+class CoinAllocation(Record, _CoinAllocationFields):
+    __slots__ = ()
+    TYPE = "coin_allocation"
+
+
+class _TaskCreationFields(NamedTuple):
+    requester_id: int
+    reward_amount: int
+    r_coin_change: Any
+    s_coin_change: Any
+    timestamp: int
+    task_id: Optional[str] = None  # 託管的獎勵歸屬的任務，評估時由此支付、結束時退還餘額
+
+
+class TaskCreation(Record, _TaskCreationFields):
+    __slots__ = ()
+    TYPE = "task_creation"
+
+
+class _VerifierSelectionFields(NamedTuple):
+    node_id: int
+    declared_r: int
+    r_coin_change: Any
+    s_coin_change: Any
+    timestamp: int
+
+
+class VerifierSelection(Record, _VerifierSelectionFields):
+    __slots__ = ()
+    TYPE = "verifier_selection"
+
+
+class _TaskSubmissionsFields(NamedTuple):
+    task_id: str
+    submissions: Tuple[Submission, ...]
+    timestamp: int
+
+
+class TaskSubmissions(Record, _TaskSubmissionsFields):
+    __slots__ = ()
+    TYPE = "task_submissions"
+    NESTED = {"submissions": Submission}
+
+
+class _TaskEvaluationsFields(NamedTuple):
+    task_id: str
+    evaluations: Tuple[Evaluation, ...]
+    verifier_id: Optional[int]
+    timestamp: int
+
+
+class TaskEvaluations(Record, _TaskEvaluationsFields):
+    __slots__ = ()
+    TYPE = "task_evaluations"
+    NESTED = {"evaluations": Evaluation}
+
+
+class _VerifierRewardFields(NamedTuple):
+    node_id: int
+    r_coin_change: Any
+    s_coin_change: Any
+    timestamp: int
+
+
+class VerifierReward(Record, _VerifierRewardFields):
+    __slots__ = ()
+    TYPE = "verifier_reward"
+
+
+class _TaskRefundFields(NamedTuple):
+    task_id: str
+    requester_id: int
+    r_coin_change: Any
+    s_coin_change: Any
+    timestamp: int
+
+
+class TaskRefund(Record, _TaskRefundFields):  # 任務評估完成或過期後退還請求者的託管餘額
+    __slots__ = ()
+    TYPE = "task_refund"
+
+
+RECORD_TYPES: Dict[str, type] = {
+    record_type.TYPE: record_type
+    for record_type in (CoinAllocation, TaskCreation, VerifierSelection, TaskSubmissions, TaskEvaluations,
+                        VerifierReward, TaskRefund)
+}
+
+
+def record_from_dict(transaction: Dict[str, Any]) -> Record:
+    """由JSON形狀的交易字典還原記錄，未知類型拋出 KeyError"""
+    return RECORD_TYPES[transaction["type"]].from_dict(transaction)
+
+
+def export_transaction(transaction: Any) -> Dict[str, Any]:
+    """交易轉為JSON形狀 (記錄才需要轉換)"""
+    return transaction.to_dict() if isinstance(transaction, Record) else transaction
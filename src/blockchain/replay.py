@@ -0,0 +1,127 @@
+import argparse
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .records import Record
+
+logger = logging.getLogger(__name__)
+
+# 直接帶有 node_id 與幣值變動的交易類型
+NODE_EVENT_TYPES = ("coin_allocation", "verifier_selection", "verifier_reward")
+# 帶有 requester_id 與幣值變動的交易類型
+REQUESTER_EVENT_TYPES = ("task_creation", "task_refund")
+
+
+def load_chain(filename: str) -> List[Dict[str, Any]]:
+    """從檔案讀取區塊鏈 (區塊字典列表)"""
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+def _record_coin_events(transaction: Record) -> Iterable[Tuple[int, Any, Any]]:
+    """記憶體中的交易記錄直接以屬性取值，不先轉為JSON形狀"""
+    tx_type = transaction.TYPE
+    if tx_type in NODE_EVENT_TYPES:
+        yield transaction.node_id, transaction.r_coin_change, transaction.s_coin_change
+    elif tx_type in REQUESTER_EVENT_TYPES:
+        yield transaction.requester_id, transaction.r_coin_change, transaction.s_coin_change
+    elif tx_type == "task_evaluations":
+        for evaluation in transaction.evaluations:
+            yield evaluation.worker_id, evaluation.r_coin_change, 0
+
+
+def iter_coin_events(transaction: Any) -> Iterable[Tuple[int, Any, Any]]:
+    """從單筆交易 (交易記錄或JSON形狀的字典) 中取出 (節點ID, R-coin變動, S-coin變動)"""
+    if isinstance(transaction, Record):
+        yield from _record_coin_events(transaction)
+        return
+    tx_type = transaction.get("type")
+    if tx_type in NODE_EVENT_TYPES:
+        yield transaction["node_id"], transaction["r_coin_change"], transaction["s_coin_change"]
+    elif tx_type in REQUESTER_EVENT_TYPES:
+        yield transaction["requester_id"], transaction["r_coin_change"], transaction["s_coin_change"]
+    elif tx_type == "task_evaluations":
+        for evaluation in transaction["evaluations"]:
+            yield evaluation["worker_id"], evaluation["r_coin_change"], evaluation.get("s_coin_change", 0)
+
+
+class LedgerReplay:
+    """
+    從區塊鏈重建節點餘額
+
+    一次讀取整條鏈，將所有幣值變動攤平成按區塊高度排序的欄位陣列，
+    再以 NumPy 按節點分組累加，可重建任意高度的所有餘額。
+    """
+
+    def __init__(self, chain: List[Dict[str, Any]]):
+        heights, node_ids, r_changes, s_changes = [], [], [], []
+        for block in chain:
+            height = block["index"]
+            for transaction in block["transactions"]:
+                for node_id, r_change, s_change in iter_coin_events(transaction):
+                    heights.append(height)
+                    node_ids.append(node_id)
+                    r_changes.append(r_change)
+                    s_changes.append(s_change)
+
+        self.head = chain[-1]["index"] if chain else -1
+        self.heights = np.asarray(heights, dtype=np.int64)
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.r_changes = np.asarray(r_changes, dtype=np.int64)
+        self.s_changes = np.asarray(s_changes, dtype=np.float64)
+        logger.info(f"已載入 {len(self.heights)} 筆幣值變動，最高區塊: {self.head}")
+
+    @classmethod
+    def from_file(cls, filename: str) -> "LedgerReplay":
+        """從區塊鏈檔案建立重放器"""
+        return cls(load_chain(filename))
+
+    def balances_at(self, height: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        """重建指定高度 (含) 的所有節點餘額，預設為最新高度"""
+        if height is None:
+            height = self.head
+
+        # 區塊高度遞增，只需找到截斷位置
+        end = int(np.searchsorted(self.heights, height, side="right"))
+        ids, inverse = np.unique(self.node_ids[:end], return_inverse=True)
+
+        r_totals = np.zeros(len(ids), dtype=np.int64)
+        np.add.at(r_totals, inverse, self.r_changes[:end])
+        s_totals = np.bincount(inverse, weights=self.s_changes[:end], minlength=len(ids))
+
+        return {
+            int(node_id): {"id": int(node_id), "r_coin": int(r_coin), "s_coin": float(s_coin)}
+            for node_id, r_coin, s_coin in zip(ids, r_totals, s_totals)
+        }
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='從區塊鏈重建節點餘額')
+    parser.add_argument('chain_file', help='區塊鏈檔案 (例如 data/blockchain.json)')
+    parser.add_argument('--height', type=int, default=None,
+                        help='重建至此區塊高度 (默認: 最新區塊)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='輸出檔案 (默認: 印出到標準輸出)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    replay = LedgerReplay.from_file(args.chain_file)
+    balances = sorted(replay.balances_at(args.height).values(), key=lambda item: item["id"])
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(balances, file, indent=4)
+        logger.info(f"節點餘額已保存到 {args.output}")
+    else:
+        print(json.dumps(balances, indent=4))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,144 @@
+import hashlib
+from typing import Dict, Iterable, Tuple, Any
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+EMPTY_LEAF = b'\x00' * 32
+
+
+def _hash_leaf(node_id: int, r_coin, s_coin) -> bytes:
+    """計算葉節點哈希 (節點ID與幣值)"""
+    return hashlib.sha256(LEAF_PREFIX + f"{node_id}:{r_coin!r}:{s_coin!r}".encode()).digest()
+
+
+def _hash_pair(left: bytes, right: bytes) -> bytes:
+    """計算內部節點哈希"""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def _default_hashes(depth: int):
+    """預先計算各高度空子樹的哈希"""
+    defaults = [EMPTY_LEAF]
+    for _ in range(depth):
+        defaults.append(_hash_pair(defaults[-1], defaults[-1]))
+    return defaults
+
+
+class SparseMerkleTree:
+    """
+    以節點ID為鍵的稀疏默克爾樹，承諾所有節點的 R-coin/S-coin 餘額
+
+    只保存非空子樹的哈希，每次更新只重算受影響節點到根的路徑，
+    單一節點的餘額證明長度為 O(depth)，且省略空子樹的兄弟哈希。
+    """
+
+    def __init__(self, depth: int = 32):
+        self.depth = depth
+        self.default_hashes = _default_hashes(depth)
+        self.nodes: Dict[Tuple[int, int], bytes] = {}  # (高度, 索引) -> 哈希
+        self.leaves: Dict[int, Tuple[Any, Any]] = {}
+
+    def _check_key(self, node_id: int):
+        if not 0 <= node_id < (1 << self.depth):
+            raise ValueError(f"節點ID超出狀態樹範圍: {node_id}")
+
+    def _get(self, height: int, index: int) -> bytes:
+        return self.nodes.get((height, index), self.default_hashes[height])
+
+    @property
+    def root(self) -> str:
+        """狀態根 (十六進位)"""
+        return self._get(self.depth, 0).hex()
+
+    def update(self, node_id: int, r_coin, s_coin) -> str:
+        """更新單一節點的餘額並返回新的狀態根"""
+        return self.update_many([(node_id, r_coin, s_coin)])
+
+    def _recompute(self, balances: Iterable[Tuple[int, Any, Any]]) -> Tuple[Dict[int, Tuple[Any, Any]],
+                                                                          Dict[Tuple[int, int], bytes]]:
+        """計算批量更新後變動的葉與節點哈希，共享的祖先節點每層只重算一次，不修改樹"""
+        leaves = {}
+        nodes = {}
+        dirty = set()
+        for node_id, r_coin, s_coin in balances:
+            self._check_key(node_id)
+            leaves[node_id] = (r_coin, s_coin)
+            nodes[(0, node_id)] = _hash_leaf(node_id, r_coin, s_coin)
+            dirty.add(node_id)
+
+        for height in range(self.depth):
+            parents = set()
+            for index in dirty:
+                parent = index >> 1
+                if parent in parents:
+                    continue
+                left = nodes.get((height, parent << 1)) or self._get(height, parent << 1)
+                right = nodes.get((height, (parent << 1) | 1)) or self._get(height, (parent << 1) | 1)
+                nodes[(height + 1, parent)] = _hash_pair(left, right)
+                parents.add(parent)
+            dirty = parents
+        return leaves, nodes
+
+    def root_after(self, balances: Iterable[Tuple[int, Any, Any]]) -> str:
+        """批量更新後的狀態根，不修改樹 (用於區塊通過驗證前)"""
+        _, nodes = self._recompute(balances)
+        return nodes.get((self.depth, 0), self._get(self.depth, 0)).hex()
+
+    def update_many(self, balances: Iterable[Tuple[int, Any, Any]]) -> str:
+        """批量更新節點餘額並返回新的狀態根"""
+        leaves, nodes = self._recompute(balances)
+        self.leaves.update(leaves)
+        self.nodes.update(nodes)
+        return self.root
+
+    def prove(self, node_id: int) -> Dict[str, Any]:
+        """生成單一節點的餘額證明"""
+        self._check_key(node_id)
+        if node_id not in self.leaves:
+            raise KeyError(f"狀態樹中沒有節點 {node_id}")
+
+        r_coin, s_coin = self.leaves[node_id]
+        bitmap = 0
+        siblings = []
+        index = node_id
+        for height in range(self.depth):
+            sibling = self.nodes.get((height, index ^ 1))
+            if sibling is not None:
+                bitmap |= 1 << height
+                siblings.append(sibling.hex())
+            index >>= 1
+
+        return {
+            "node_id": node_id,
+            "r_coin": r_coin,
+            "s_coin": s_coin,
+            "bitmap": bitmap,
+            "siblings": siblings
+        }
+
+
+def verify_balance_proof(root: str, proof: Dict[str, Any], depth: int = 32) -> bool:
+    """驗證餘額證明是否與給定的狀態根一致"""
+    defaults = _default_hashes(depth)
+    node_id = proof["node_id"]
+    current = _hash_leaf(node_id, proof["r_coin"], proof["s_coin"])
+    siblings = iter(proof["siblings"])
+    index = node_id
+
+    try:
+        for height in range(depth):
+            if proof["bitmap"] >> height & 1:
+                sibling = bytes.fromhex(next(siblings))
+            else:
+                sibling = defaults[height]
+            if index & 1:
+                current = _hash_pair(sibling, current)
+            else:
+                current = _hash_pair(current, sibling)
+            index >>= 1
+    except StopIteration:
+        return False
+
+    if next(siblings, None) is not None:
+        return False
+    return current.hex() == root
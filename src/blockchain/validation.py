@@ -0,0 +1,317 @@
+import argparse
+import json
+import logging
+import os
+import struct
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.config.system_config import SystemConfig
+from src.models.worker import Worker
+from src.utils.clock import now_micros
+from src.utils.crypto import submission_signature
+from .blockchain import Blockchain
+from .ledger import transaction_postings
+from .records import RECORD_TYPES, Record, TaskSubmissions, record_from_dict
+from .replay import LedgerReplay, iter_coin_events
+
+logger = logging.getLogger(__name__)
+
+KNOWN_TYPES = tuple(RECORD_TYPES)
+BALANCE_TOLERANCE = 1e-9
+DIGEST_BYTES = 32
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _expected_status(completion: float, config: SystemConfig) -> str:
+    if completion > config.min_completion_for_reward:
+        return "rewarded"
+    if completion < config.max_completion_for_punish:
+        return "punished"
+    return "neutral"
+
+
+def decode_transaction(item: Any) -> Any:
+    """JSON字串或字典解碼為交易記錄，無法解碼時原樣返回 (由無狀態檢查給出拒絕原因)"""
+    try:
+        if isinstance(item, (str, bytes)):
+            item = json.loads(item)
+        if isinstance(item, dict):
+            return record_from_dict(item)
+    except (KeyError, TypeError, ValueError):
+        pass
+    return item
+
+
+def check_stateless(transaction: Any, config: SystemConfig) -> Optional[str]:
+    """不依賴鏈狀態的檢查 (字典或JSON先解碼)，返回拒絕原因，通過時返回 None"""
+    if not isinstance(transaction, Record):
+        transaction = decode_transaction(transaction)
+    if not isinstance(transaction, Record) or transaction.TYPE is None:
+        if isinstance(transaction, dict) and transaction.get("type") in KNOWN_TYPES:
+            return "malformed"
+        return "unknown_type"
+    tx_type = transaction.TYPE
+
+    try:
+        if tx_type == "task_submissions":
+            for submission in transaction.submissions:
+                if submission.task_id != transaction.task_id or len(submission.task_hash) != DIGEST_BYTES:
+                    return "malformed"
+                signature = submission_signature(submission.worker_id, submission.task_hash, submission.timestamp)
+                if submission.signature != signature:
+                    return "bad_signature"
+        elif tx_type == "task_evaluations":
+            for evaluation in transaction.evaluations:
+                if evaluation.task_id != transaction.task_id:
+                    return "malformed"
+                completion = evaluation.task_completion
+                if not 0.0 <= completion <= 1.0 or evaluation.status != _expected_status(completion, config):
+                    return "inconsistent_evaluation"
+                if evaluation.r_coin_after - evaluation.r_coin_before != evaluation.r_coin_change:
+                    return "inconsistent_evaluation"
+        elif tx_type == "verifier_selection":
+            if transaction.declared_r <= 0 or transaction.r_coin_change != -transaction.declared_r:
+                return "invalid_amount"
+        elif tx_type == "task_creation":
+            if transaction.reward_amount <= 0 or \
+                    transaction.r_coin_change + transaction.s_coin_change != -transaction.reward_amount:
+                return "invalid_amount"
+        else:
+            if not (_is_number(transaction.r_coin_change) and _is_number(transaction.s_coin_change)):
+                return "invalid_amount"
+    except (AttributeError, TypeError, struct.error):
+        return "malformed"
+    return None
+
+
+def _check_chunk(items: List[Any], config: SystemConfig) -> List[Tuple[Optional[Record], Optional[str]]]:
+    """在工作進程中解碼並做無狀態檢查，返回 (解碼後的記錄, 拒絕原因)；輸入已是記錄時不回傳 (保留原物件)"""
+    results = []
+    for item in items:
+        if isinstance(item, Record):
+            results.append((None, check_stateless(item, config)))
+        else:
+            transaction = decode_transaction(item)
+            results.append((transaction, check_stateless(transaction, config)))
+    return results
+
+
+class TransactionPipeline:
+    """
+    Blockchain.add_transaction 前的分段驗證管線
+
+    交易先緩衝成批，依序經過: 解碼為交易記錄與無狀態檢查 (簽名、欄位一致性，默認在進程池中並行，
+    避免受 GIL 限制) -> 依提交順序的有狀態檢查 (重複任務、餘額、評估與驗證者一致性、協議發行) ->
+    重複提交偵測並加入待處理交易。被拒絕的交易按原因計數。
+
+    自發行帳戶轉出的交易只接受協議產生者：初始分配 (coin_allocation) 須與帳本開戶時的餘額相符且每個節點一次，
+    驗證者獎勵 (verifier_reward) 只給本區塊抽籤選出的驗證者、金額為設定值且每個區塊一次。
+    已提交的任務在評估後、或超過 open_task_blocks 個區塊仍未評估時移出追蹤；退款須與該任務剩餘的託管相符。
+    """
+
+    def __init__(self, blockchain, config: Optional[SystemConfig] = None, batch_size: int = 256,
+                 workers: Optional[int] = None, executor: str = "process", verifier_reward: Optional[int] = None):
+        self.blockchain = blockchain
+        self.config = config or SystemConfig()
+        self.batch_size = max(1, batch_size)
+        self.workers = workers or os.cpu_count() or 1
+        self.verifier_reward = self.config.verifier_reward if verifier_reward is None else verifier_reward
+        if executor == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        self.buffer: List[Union[Record, Dict[str, Any], str, bytes]] = []
+        self.rejections = Counter()
+        self.admitted = 0
+
+        # 有狀態檢查所需的鏈上狀態
+        self.balances: Dict[int, List[float]] = {
+            node_id: [balance["r_coin"], balance["s_coin"]]
+            for node_id, balance in LedgerReplay(blockchain.to_dict()).balances_at().items()
+        }
+        self.open_tasks: Dict[str, Tuple[set, int]] = {}  # 已提交未評估的任務ID -> (提交的 worker, 提交時的區塊高度)
+        self.rewarded_lottery: Optional[str] = None  # 已發放驗證者獎勵的抽籤種子
+        self.escrows: Dict[str, List] = {}  # 已通過交易的任務託管 (任務ID -> [請求者ID, R-coin, S-coin])
+
+    def submit(self, transaction: Union[Record, Dict[str, Any], str, bytes]):
+        """加入一筆交易 (記錄、字典或JSON)，緩衝滿一批時處理"""
+        self.buffer.append(transaction)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """處理緩衝中的所有交易，返回通過的數量"""
+        if not self.buffer:
+            return 0
+        batch, self.buffer = self.buffer, []
+
+        # 解碼與無狀態檢查，切成與工作數相同的區段並行
+        chunk_size = max(1, -(-len(batch) // self.workers))
+        chunks = [batch[i:i + chunk_size] for i in range(0, len(batch), chunk_size)]
+        decoded, reasons = [], []
+        results = (result for chunk in self.executor.map(_check_chunk, chunks, [self.config] * len(chunks))
+                   for result in chunk)
+        for item, (transaction, reason) in zip(batch, results):
+            # 原本就是記錄時使用原物件，暫掛的分錄以物件識別
+            decoded.append(item if transaction is None else transaction)
+            reasons.append(reason)
+
+        # 依原始順序的有狀態檢查與加入
+        self._expire_tasks()
+        admitted = 0
+        for transaction, reason in zip(decoded, reasons):
+            reason = reason or self._check_stateful(transaction)
+            if not reason and not self.blockchain.admit_transaction(transaction):
+                reason = "duplicate_submission"
+            if reason:
+                self.blockchain.reject_transaction(transaction)
+                self.rejections[reason] += 1
+                logger.warning(f"交易被拒絕 ({reason}): {str(transaction)[:120]}")
+                continue
+            self._apply(transaction)
+            admitted += 1
+        self.admitted += admitted
+        return admitted
+
+    def _expire_tasks(self):
+        """移除超過 open_task_blocks 個區塊仍未評估的任務"""
+        oldest = len(self.blockchain.chain) - self.config.validation_open_task_blocks
+        expired = [task_id for task_id, (_, height) in self.open_tasks.items() if height < oldest]
+        for task_id in expired:
+            del self.open_tasks[task_id]
+
+    def _check_stateful(self, transaction: Record) -> Optional[str]:
+        tx_type = transaction.TYPE
+        lottery = self.blockchain.pending_lottery
+        if tx_type == "task_submissions":
+            if transaction.task_id in self.open_tasks:
+                return "duplicate_task"
+        elif tx_type == "task_evaluations":
+            task = self.open_tasks.get(transaction.task_id)
+            if task is None:
+                return "unknown_task"
+            if any(evaluation.worker_id not in task[0] for evaluation in transaction.evaluations):
+                return "unknown_submitter"
+            if lottery is not None and lottery["selected_id"] != transaction.verifier_id:
+                return "verifier_mismatch"
+        elif tx_type == "verifier_reward":
+            if lottery is None or lottery["selected_id"] != transaction.node_id:
+                return "verifier_mismatch"
+            if transaction.r_coin_change != self.verifier_reward or transaction.s_coin_change:
+                return "invalid_amount"
+            if self.rewarded_lottery == lottery["seed"]:
+                return "duplicate_reward"
+        elif tx_type == "task_creation":
+            if transaction.task_id in self.escrows:
+                return "duplicate_task"
+        elif tx_type == "task_refund":
+            escrow = self.escrows.get(transaction.task_id)
+            if escrow is None or escrow[0] != transaction.requester_id:
+                return "unknown_task"
+            if (transaction.r_coin_change, transaction.s_coin_change) != (escrow[1], escrow[2]):
+                return "invalid_amount"
+        elif tx_type == "coin_allocation":
+            opening = self.blockchain.ledger.opening_balances.get(transaction.node_id)
+            if opening is None or transaction.node_id in self.balances:
+                return "unauthorized_allocation"
+            if (transaction.r_coin_change, transaction.s_coin_change) != opening:
+                return "invalid_amount"
+
+        # 累計本筆交易對每個節點的變動後檢查餘額
+        changes: Dict[int, List[float]] = {}
+        for node_id, r_change, s_change in iter_coin_events(transaction):
+            change = changes.setdefault(node_id, [0, 0.0])
+            change[0] += r_change
+            change[1] += s_change
+        for node_id, (r_change, s_change) in changes.items():
+            r_coin, s_coin = self.balances.get(node_id, (0, 0.0))
+            if r_coin + r_change < -BALANCE_TOLERANCE or s_coin + s_change < -BALANCE_TOLERANCE:
+                return "insufficient_balance"
+        return None
+
+    def _apply(self, transaction: Record):
+        tx_type = transaction.TYPE
+        if tx_type == "task_submissions":
+            self.open_tasks[transaction.task_id] = ({s.worker_id for s in transaction.submissions},
+                                                    len(self.blockchain.chain))
+        elif tx_type == "task_evaluations":
+            del self.open_tasks[transaction.task_id]
+        elif tx_type == "verifier_reward":
+            self.rewarded_lottery = self.blockchain.pending_lottery["seed"]
+        for _ in transaction_postings(transaction, self.escrows):
+            pass  # 只更新任務託管
+
+        for node_id, r_change, s_change in iter_coin_events(transaction):
+            balance = self.balances.setdefault(node_id, [0, 0.0])
+            balance[0] += r_change
+            balance[1] += s_change
+
+    def stats(self) -> Dict[str, Any]:
+        """通過與拒絕的統計"""
+        return {"admitted": self.admitted, "rejected": dict(self.rejections)}
+
+    def close(self):
+        self.flush()
+        self.executor.shutdown()
+
+
+def benchmark(worker_counts: List[int], transactions: int = 20000, participants: int = 8, batch_size: int = 1024,
+              executor: str = "process") -> List[Dict[str, Any]]:
+    """以已簽名的提交交易 (JSON) 量測管線在不同並行數下的吞吐量，進程池先預熱，不計啟動時間"""
+    nodes = [Worker(i, 100) for i in range(participants)]
+    payloads = []
+    for i in range(transactions):
+        task_id = f"bench-{i}"
+        submissions = tuple(node.submit_task(task_id, task_id) for node in nodes)
+        payloads.append(json.dumps(TaskSubmissions(task_id, submissions, now_micros()).to_dict()))
+
+    results = []
+    for workers in worker_counts:
+        blockchain = Blockchain(nodes)
+        pipeline = TransactionPipeline(blockchain, batch_size=batch_size, workers=workers, executor=executor)
+        blockchain.attach_validator(pipeline)
+        list(pipeline.executor.map(_check_chunk, [[] for _ in range(workers)], [pipeline.config] * workers))
+
+        start = time.perf_counter()
+        for payload in payloads:
+            blockchain.add_transaction(payload)
+        pipeline.flush()
+        elapsed = time.perf_counter() - start
+        pipeline.executor.shutdown()
+
+        results.append({"workers": workers, "transactions": transactions, "admitted": pipeline.admitted,
+                        "seconds": elapsed, "throughput": transactions / max(elapsed, 1e-9)})
+    return results
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='交易驗證管線吞吐量測試')
+    parser.add_argument('-w', '--workers', default='1,2,4', help='並行數，逗號分隔 (默認: 1,2,4)')
+    parser.add_argument('-n', '--transactions', type=int, default=20000, help='提交交易數 (默認: 20000)')
+    parser.add_argument('-p', '--participants', type=int, default=8, help='每筆交易的提交數 (默認: 8)')
+    parser.add_argument('-b', '--batch', type=int, default=1024, help='批次大小 (默認: 1024)')
+    parser.add_argument('--executor', choices=("process", "thread"), default="process",
+                        help='無狀態檢查的執行器 (默認: process)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    results = benchmark([int(value) for value in args.workers.split(",")], args.transactions, args.participants,
+                        args.batch, args.executor)
+    for result in results:
+        print(f"workers={result['workers']}: {result['throughput']:.0f} 筆/秒 "
+              f"({result['admitted']}/{result['transactions']} 通過, {result['seconds']:.3f} 秒)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
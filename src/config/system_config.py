@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Optional, Tuple
 
 @dataclass
 class SystemConfig:
@@ -8,4 +8,41 @@ class SystemConfig:
     min_completion_for_reward: float = 0.8
     max_completion_for_punish: float = 0.5
     system_s_coin: int = 100
-    initial_r_coin_range: Tuple[int, int] = (50, 100) 
\ No newline at end of file
+    verifier_reward: int = 5  # 每個區塊驗證者的 R-coin 獎勵
+    initial_r_coin_range: Tuple[int, int] = (50, 100)
+    task_ttl_seconds: float = 600.0  # 任務最後一次狀態變更後保留在 Server 的時間
+    max_recent_transactions: int = 10000  # Server 保留的最近交易數
+    delivery_batch_size: int = 64  # 每個訂閱者累積多少任務即投遞，其餘在區塊提交時投遞
+    worker_min_reward: Optional[float] = None  # 設定時每個worker以此最低獎勵訂閱任務，只有收到投遞的worker參與；None 表示不訂閱
+    pow_difficulty: int = 0  # 區塊工作量證明難度 (前導零位元數)，0 表示不啟用
+    pow_workers: Optional[int] = None  # 搜尋 nonce 的進程數，None 表示使用所有CPU
+    metrics_interval: int = 0  # 每隔幾輪輸出經濟指標，0 表示不啟用
+    validation_batch_size: int = 0  # 交易驗證管線的批次大小，0 表示不驗證
+    validation_workers: Optional[int] = None  # 無狀態檢查的並行數，None 表示使用所有CPU
+    validation_executor: str = "process"  # "process" 或 "thread" (執行緒受 GIL 限制，只適合小批次)
+    validation_open_task_blocks: int = 8  # 已提交但未評估的任務在驗證管線中保留的區塊數，逾期視為過期
+    reputation_half_life: float = 10.0  # 聲譽分數的半衰期 (輪數或模擬時間)
+    reputation_reward_weight: float = 0.0  # 聲譽分數對獎勵金額的影響，0 表示固定獎勵
+    duplicate_detection: bool = False  # 是否拒絕重複的 (worker, 任務) 提交與重放的簽名
+    dedup_index_path: Optional[str] = None  # 去重索引檔路徑，None 表示使用暫存檔
+    memory_profile_interval: int = 0  # 每隔幾輪做一次記憶體剖析，0 表示不啟用
+    participant_selection: str = "random"  # "random": 從所有worker抽樣，"spatial": 只選擇覆蓋任務區域的worker
+    area_size: float = 1000.0  # 空間模式下的區域邊長
+    task_radius: float = 100.0  # 任務的感知區域半徑
+    worker_coverage_radius: float = 10.0  # worker 的感知範圍半徑
+    worker_speed: float = 0.0  # 參與任務後隨機移動的最大距離
+    state_db_path: Optional[str] = None  # 節點狀態的 SQLite 檔案，None 表示只在結束時輸出JSON
+    memory_budget_per_round: float = 0  # 每輪允許的記憶體增長 (位元組)，超過時中止模擬，0 表示不限制
+
+
+@dataclass
+class EventConfig:
+    """離散事件模擬的參數 (時間單位任意)"""
+    task_arrival_rate: float = 1.0  # 每單位時間到達的任務數
+    task_deadline: float = 5.0  # 任務到達後的截止時間
+    task_reward: int = 20
+    mean_submission_latency: float = 1.0  # 提交延遲 (指數分佈) 的平均值
+    block_interval: float = 2.0  # 出塊間隔
+    verifier_reward: int = 5
+    worker_join_rate: float = 0.0  # 每單位時間加入的新worker數
+    mean_worker_session: float = 0.0  # worker 在線時間 (指數分佈) 的平均值，0 表示不離開
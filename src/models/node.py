@@ -23,12 +23,15 @@ class Node:
             return 0
 
     def update_coins(self, r_coin_change: int = 0, s_coin_change: int = 0) -> Dict[str, int]:
-        """更新節點幣值"""
+        """更新節點幣值，餘額不足時拋出 ValueError 而不截斷為零"""
         old_r = self.r_coin
         old_s = self.s_coin
+        if old_r + r_coin_change < 0 or old_s + s_coin_change < 0:
+            raise ValueError(f"Node {self.id} 餘額不足 (R-coin: {old_r} {r_coin_change:+}, "
+                             f"S-coin: {old_s} {s_coin_change:+})")
 
-        self.r_coin = max(0, self.r_coin + r_coin_change)
-        self.s_coin = max(0, self.s_coin + s_coin_change)
+        self.r_coin = old_r + r_coin_change
+        self.s_coin = old_s + s_coin_change
 
         changes = {
             "r_coin_change": self.r_coin - old_r,
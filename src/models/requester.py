@@ -1,27 +1,33 @@
 from .node import Node
 import logging
-from datetime import datetime
+from src.utils.clock import now_micros
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
 class Requester(Node):
-    def create_task(self, task_description: str, reward_amount: int) -> Dict[str, Any]:
-        """創建任務並指定獎勵金額"""
+    def create_task(self, task_description: str, reward_amount: int, ledger=None) -> Dict[str, Any]:
+        """創建任務並指定獎勵金額，提供 ledger 時以含未結算分錄的餘額檢查，獎勵由任務創建交易記帳 (轉入託管帳戶)"""
         try:
             if reward_amount <= 0:
                 raise ValueError(f"獎勵金額必須為正數: {reward_amount}")
-            if reward_amount > self.s_coin:
-                raise ValueError(f"Requester {self.id} 沒有足夠的 R-coin (擁有: {self.s_coin}, 獎勵: {reward_amount})")
+            available = ledger.balance(self)[0] if ledger is not None else self.r_coin
+            if reward_amount > available:
+                raise ValueError(f"Requester {self.id} 沒有足夠的 R-coin (擁有: {available}, 獎勵: {reward_amount})")
             
             # 扣除獎勵金額
-            self.update_coins(s_coin_change=-reward_amount)
+            if ledger is not None:
+                changes = {"r_coin_change": -reward_amount, "s_coin_change": 0}
+            else:
+                changes = self.update_coins(r_coin_change=-reward_amount)
             
             return {
                 "requester_id": self.id,
                 "task_description": task_description,
                 "reward_amount": reward_amount,
-                "timestamp": datetime.now().isoformat()
+                "r_coin_change": changes["r_coin_change"],
+                "s_coin_change": changes["s_coin_change"],
+                "timestamp": now_micros()
             }
         except ValueError as e:
             logger.warning(str(e))
@@ -1,21 +1,37 @@
 from .node import Node
 import hashlib
-from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from src.blockchain.records import Submission
+from src.utils.clock import now_micros
+from src.utils.crypto import submission_signature
 
 class Worker(Node):
-    def submit_task(self, data: str) -> Dict[str, Any]:
-        """提交任務並生成記錄"""
-        task_hash = hashlib.sha256(data.encode('utf-8')).hexdigest()
-        timestamp = datetime.now().isoformat()
-        signature = hashlib.sha256(f"{self.id}{task_hash}{timestamp}".encode()).hexdigest()
+    def __init__(self, id: int, initial_r_coin: int = 0, initial_s_coin: int = 0,
+                 location: Optional[Tuple[float, float]] = None, coverage_radius: float = 0.0):
+        super().__init__(id, initial_r_coin, initial_s_coin)
+        self.location = location  # (x, y)，None 表示不使用位置
+        self.coverage_radius = coverage_radius  # 可感知的範圍半徑
+        self.inbox = []  # 訂閱投遞的任務，由 take_tasks 取出
 
-        return {
-            "worker_id": self.id,
-            "task_hash": task_hash,
-            "timestamp": timestamp,
-            "signature": signature
-        }
+    def receive_tasks(self, tasks: List[Dict[str, Any]]):
+        """接收一批投遞的任務"""
+        self.inbox.extend(tasks)
+
+    def take_tasks(self) -> List[Dict[str, Any]]:
+        """取出並清空已收到的任務"""
+        tasks, self.inbox = self.inbox, []
+        return tasks
+
+    def move_to(self, location: Tuple[float, float]):
+        """更新位置 (在空間索引中的 worker 應透過 GridIndex.move 移動)"""
+        self.location = location
+
+    def submit_task(self, data: str, task_id: Optional[str] = None) -> Submission:
+        """提交任務並生成記錄"""
+        task_hash = hashlib.sha256(data.encode('utf-8')).digest()
+        timestamp = now_micros()
+        signature = submission_signature(self.id, task_hash, timestamp)
+        return Submission(self.id, task_hash, timestamp, signature, task_id)
 
     def to_dict(self) -> Dict[str, Any]:
         """將工作節點轉為字典"""
@@ -23,5 +39,7 @@ class Worker(Node):
             "id": self.id,
             "r_coin": self.r_coin,
             "s_coin": self.s_coin,
+            **({"location": list(self.location), "coverage_radius": self.coverage_radius}
+               if self.location is not None else {}),
             "history": self.history
         } 
\ No newline at end of file
@@ -1,19 +1,46 @@
-from typing import Dict, Any
+import time
+from typing import List, Optional, Sequence
+import numpy as np
+from src.blockchain.records import Evaluation
 from src.models.worker import Worker
 from src.config.system_config import SystemConfig
-from datetime import datetime
+from src.services.reputation import ReputationEngine
+from src.utils.clock import now_micros
 
 class QualityReputationManager:
     def __init__(self, config: SystemConfig):
         self.config = config
+        self.reputation = ReputationEngine(half_life=config.reputation_half_life)
 
-    def evaluate_task(self, worker: Worker, task_completion_degree: float) -> Dict[str, Any]:
-        """評估任務完成度並更新工作者的聲譽"""
-        initial_r = worker.r_coin
+    def _reward_amounts(self, scores: np.ndarray) -> np.ndarray:
+        """依聲譽分數調整獎勵金額，權重為 0 時即為固定獎勵"""
+        weight = self.config.reputation_reward_weight
+        return np.rint(self.config.reward_amount * (1 - weight + weight * scores)).astype(np.int64)
+
+    def _evaluation_record(self, worker: Worker, task_completion_degree: float, status: str,
+                           r_coin_change: int, timestamp: int, ledger=None,
+                           task_id: Optional[str] = None) -> Evaluation:
+        # 更新工作者的代幣：懲罰最多扣到餘額為零，記錄實際扣除的金額
+        # (提供 ledger 時以含未結算分錄的餘額計算，變動在評估交易被區塊鏈接受時記帳)
+        initial_r = ledger.balance(worker)[0] if ledger is not None else worker.r_coin
+        if r_coin_change < 0:
+            r_coin_change = -min(-r_coin_change, max(initial_r, 0))
+        if ledger is None:
+            worker.update_coins(r_coin_change=r_coin_change)
+
+        # 記錄評估結果
+        return Evaluation(worker.id, task_completion_degree, status, initial_r, initial_r + r_coin_change,
+                          r_coin_change, timestamp, task_id)
+
+    def evaluate_task(self, worker: Worker, task_completion_degree: float,
+                      now: Optional[float] = None, ledger=None, task_id: Optional[str] = None) -> Evaluation:
+        """評估任務完成度並更新工作者的聲譽，提供 ledger 時代幣變動由評估交易記帳"""
+        now = time.monotonic() if now is None else now
+        score = self.reputation.update(worker.id, task_completion_degree, now)
 
         # 根據任務完成度獎勵或懲罰
         if task_completion_degree > self.config.min_completion_for_reward:
-            r_coin_change = self.config.reward_amount
+            r_coin_change = int(self._reward_amounts(np.array([score]))[0])
             status = "rewarded"
         elif task_completion_degree < self.config.max_completion_for_punish:
             r_coin_change = -self.config.punish_amount
@@ -22,18 +49,30 @@ class QualityReputationManager:
             r_coin_change = 0
             status = "neutral"
 
-        # 更新工作者的代幣
-        changes = worker.update_coins(r_coin_change=r_coin_change)
+        return self._evaluation_record(worker, task_completion_degree, status, r_coin_change,
+                                       now_micros(), ledger, task_id)
 
-        # 記錄評估結果
-        evaluation_record = {
-            "worker_id": worker.id,
-            "task_completion": task_completion_degree,
-            "status": status,
-            "r_coin_before": initial_r,
-            "r_coin_after": worker.r_coin,
-            "r_coin_change": changes["r_coin_change"],
-            "timestamp": datetime.now().isoformat()
-        }
-
-        return evaluation_record 
\ No newline at end of file
+    def evaluate_batch(self, workers: Sequence[Worker], completions: Sequence[float],
+                       now: Optional[float] = None, ledger=None,
+                       task_id: Optional[str] = None) -> List[Evaluation]:
+        """
+        一次評估一輪的所有提交
+
+        門檻判斷、聲譽更新與獎勵金額以向量化方式計算，之後依序更新每個工作者的代幣
+        (提供 ledger 時不直接更新，由評估交易記帳，於區塊提交時一次結算)。
+        """
+        now = time.monotonic() if now is None else now
+        values = np.asarray(completions, dtype=np.float64)
+        scores = self.reputation.update_batch([worker.id for worker in workers], values, now)
+
+        rewarded = values > self.config.min_completion_for_reward
+        punished = values < self.config.max_completion_for_punish
+        r_coin_changes = np.where(rewarded, self._reward_amounts(scores),
+                                  np.where(punished, -self.config.punish_amount, 0))
+        statuses = np.where(rewarded, "rewarded", np.where(punished, "punished", "neutral"))
+
+        timestamp = now_micros()
+        return [
+            self._evaluation_record(worker, float(completion), str(status), int(change), timestamp, ledger, task_id)
+            for worker, completion, status, change in zip(workers, values, statuses, r_coin_changes)
+        ]
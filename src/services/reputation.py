@@ -0,0 +1,77 @@
+from typing import Sequence
+
+import numpy as np
+
+
+class ReputationEngine:
+    """
+    按時間衰減的指數加權品質分數
+
+    每個 worker 維護衰減後的完成度總和與權重總和 (以 worker ID 為索引的陣列)，
+    分數 = 總和 / 權重。每次評估只需 O(1)，與歷史長度無關；
+    半衰期 half_life 與傳入的時間 now 使用相同單位 (輪數或模擬時間)。
+    """
+
+    def __init__(self, half_life: float = 10.0, prior: float = 0.5, capacity: int = 1024):
+        self.half_life = half_life
+        self.prior = prior
+        self.weighted_sum = np.zeros(capacity)
+        self.weight = np.zeros(capacity)
+        self.last_update = np.zeros(capacity)
+
+    def _ensure_capacity(self, max_id: int):
+        capacity = len(self.weight)
+        if max_id < capacity:
+            return
+        while capacity <= max_id:
+            capacity *= 2
+        for name in ("weighted_sum", "weight", "last_update"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def _decay(self, elapsed):
+        if self.half_life <= 0:
+            return np.zeros_like(elapsed)
+        return np.exp2(-np.maximum(elapsed, 0) / self.half_life)
+
+    def update(self, worker_id: int, completion: float, now: float) -> float:
+        """以一次評估更新分數並返回新分數"""
+        self._ensure_capacity(worker_id)
+        decay = float(self._decay(now - self.last_update[worker_id]))
+        self.weighted_sum[worker_id] = self.weighted_sum[worker_id] * decay + completion
+        self.weight[worker_id] = self.weight[worker_id] * decay + 1.0
+        self.last_update[worker_id] = now
+        return self.weighted_sum[worker_id] / self.weight[worker_id]
+
+    def update_batch(self, worker_ids: Sequence[int], completions: Sequence[float], now: float) -> np.ndarray:
+        """以一輪的所有評估向量化更新分數，返回每筆評估對應的新分數"""
+        ids = np.asarray(worker_ids, dtype=np.int64)
+        values = np.asarray(completions, dtype=np.float64)
+        if len(ids) == 0:
+            return np.zeros(0)
+        self._ensure_capacity(int(ids.max()))
+
+        # 同一 worker 在同一批中出現多次時只衰減一次
+        unique_ids = np.unique(ids)
+        decay = self._decay(now - self.last_update[unique_ids])
+        self.weighted_sum[unique_ids] *= decay
+        self.weight[unique_ids] *= decay
+        np.add.at(self.weighted_sum, ids, values)
+        np.add.at(self.weight, ids, 1.0)
+        self.last_update[unique_ids] = now
+        return self.weighted_sum[ids] / self.weight[ids]
+
+    def scores(self, worker_ids: Sequence[int]) -> np.ndarray:
+        """查詢分數，沒有評估記錄的 worker 返回 prior"""
+        ids = np.asarray(worker_ids, dtype=np.int64)
+        result = np.full(len(ids), self.prior)
+        known = ids < len(self.weight)
+        weight = self.weight[ids[known]]
+        result[known] = np.where(weight > 0, self.weighted_sum[ids[known]] / np.maximum(weight, 1e-300),
+                                 self.prior)
+        return result
+
+    def score(self, worker_id: int) -> float:
+        return float(self.scores([worker_id])[0])
@@ -1,54 +1,105 @@
-import hashlib
+import random
 import secrets
 import logging
-from datetime import datetime
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Any, List, Dict, Optional, Tuple
+from src.blockchain.records import Record, VerifierSelection
 from src.models.worker import Worker
 from src.config.system_config import SystemConfig
+from src.services.task_pubsub import TaskPubSub
+from src.services.task_registry import TaskRegistry, TASK_COMMITTED
+from src.services.verifier_lottery import derive_seed, make_commitment, run_lottery
+from src.utils.clock import now_micros
 
 logger = logging.getLogger(__name__)
 
+TASK_FINISHING_TYPES = ("task_evaluations", "task_refund")  # 上鏈後任務即結束的交易類型
+
 class Server:
-    def __init__(self, config: SystemConfig):
-        self.tasks = []
+    def __init__(self, config: SystemConfig, rng: Optional[random.Random] = None):
+        # 宣告金額與任務ID前綴的隨機來源，傳入帶種子的 rng 可使模擬逐位元重現
+        self.rng = rng or secrets.SystemRandom()
+        self.tasks = TaskRegistry(ttl_seconds=config.task_ttl_seconds, rng=self.rng)
         self.config = config
-        self.transactions = []
-
-    def broadcast_task(self, task_data: str, requester_id: int, reward_amount: int) -> str:
-        """廣播任務並生成任務ID"""
-        task_id = hashlib.sha256(f"{task_data}{datetime.now().isoformat()}".encode()).hexdigest()[:12]
-        task_info = {
-            "task_id": task_id,
-            "task_data": task_data,
-            "requester_id": requester_id,
-            "reward_amount": reward_amount,
-            "timestamp": datetime.now().isoformat()
-        }
-        self.tasks.append(task_info)
+        self.transactions = deque(maxlen=config.max_recent_transactions)
+        self.pubsub = TaskPubSub(max_batch=config.delivery_batch_size)
+
+    def subscribe_worker(self, worker: Worker, task_type: Optional[str] = None,
+                         region: Optional[Tuple[float, float, float]] = None, min_reward: float = 0) -> int:
+        """讓 worker 訂閱符合條件的任務，任務成批投遞到 worker.inbox"""
+        return self.pubsub.subscribe(worker.id, worker.receive_tasks, task_type, region, min_reward)
+
+    def unsubscribe_worker(self, subscription_id: int):
+        """取消 worker 的訂閱"""
+        self.pubsub.unsubscribe(subscription_id)
+
+    def collect_recipients(self, workers: List[Worker], task_id: str) -> List[Worker]:
+        """立即投遞待送的任務批次，取出 workers 的 inbox 並返回收到 task_id 的 worker"""
+        self.pubsub.flush()
+        return [worker for worker in workers if any(task["task_id"] == task_id for task in worker.take_tasks())]
+
+    def broadcast_task(self, task_data: str, requester_id: int, reward_amount: int,
+                       location: Optional[Tuple[float, float]] = None, radius: Optional[float] = None,
+                       task_type: Optional[str] = None) -> str:
+        """廣播任務並生成任務ID，可指定任務的感知區域與類型；任務會投遞給匹配的訂閱者"""
+        task_info = self.tasks.register(task_data, requester_id, reward_amount, location, radius, task_type)
+        self.pubsub.publish(task_info)
+        task_id = task_info["task_id"]
         logger.info(f"任務廣播: ID={task_id}, 請求者={requester_id}, 獎勵={reward_amount}")
         return task_id
 
-    def _calculate_selection_probabilities(self, nodes: List[Worker], total_declared_r: int) -> Dict[int, float]:
-        """計算每個節點被選為驗證者的概率"""
-        if total_declared_r == 0:
-            return {node.id: 0 for node in nodes}
-
-        return {node.id: node.s_coin / max(1, sum(n.s_coin for n in nodes)) for node in nodes}
-
-    def select_verifier(self, nodes: List[Worker], blockchain) -> Optional[Worker]:
-        """選擇驗證者 - 改進的算法"""
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """依任務ID查詢任務"""
+        return self.tasks.get(task_id)
+
+    def update_task_status(self, task_id: str, status: str) -> bool:
+        """更新任務的生命週期狀態"""
+        return self.tasks.update_status(task_id, status)
+
+    def on_block_committed(self, block):
+        """區塊上鏈後，將其中已結束 (已評估或已退款) 的任務標記為已提交、清理過期任務並投遞待送的任務批次"""
+        for transaction in block.transactions:
+            if isinstance(transaction, Record):
+                tx_type, task_id = transaction.TYPE, getattr(transaction, "task_id", None)
+            else:
+                tx_type, task_id = transaction.get("type"), transaction.get("task_id")
+            if tx_type in TASK_FINISHING_TYPES and task_id in self.tasks:
+                self.tasks.update_status(task_id, TASK_COMMITTED)
+        self.tasks.evict_expired()
+        self.pubsub.flush()
+
+    def select_verifier(self, nodes: List[Worker], blockchain, reveal: Optional[bytes] = None,
+                        commitment: Optional[str] = None) -> Optional[Worker]:
+        """
+        選擇驗證者 - 可驗證的抽籤
+
+        種子由前一區塊哈希 (及選用的 commit-reveal 值) 推導，種子與S-coin快照承諾
+        會寫入下一個區塊，任何人都可用 verify_lottery 重算選擇結果。
+        reveal 的承諾必須已由前一區塊的抽籤記錄公開 (commitment 欄位)，否則拒絕抽籤；
+        commitment 為下一次抽籤 reveal 的承諾，隨本次抽籤寫入區塊。
+        """
         if not nodes:
             logger.warning("沒有可用的工作節點")
             return None
 
+        if reveal is not None:
+            last_lottery = blockchain.get_last_block().lottery if blockchain is not None else None
+            published = (last_lottery or {}).get("commitment")
+            if published is None or make_commitment(reveal) != published:
+                logger.warning("reveal 與前一區塊公開的承諾不符，無法選擇驗證者")
+                return None
+
+        # 有區塊鏈時幣值變動記為分錄，於區塊提交時結算；餘額查詢包含未結算的分錄
+        ledger = blockchain.ledger if blockchain is not None else None
+
         # 節點宣告R-coin
         declarations = {}
         total_declared_r = 0
 
         for node in nodes:
-            # 使用更安全的隨機數生成
-            max_declare = min(node.r_coin, 100)  # 限制最大宣告量
-            amount_to_declare = secrets.randbelow(max_declare + 1) if max_declare > 0 else 0
+            available = min(node.r_coin, ledger.balance(node)[0]) if ledger is not None else node.r_coin
+            max_declare = min(available, 100)  # 限制最大宣告量
+            amount_to_declare = self.rng.randrange(max_declare + 1) if max_declare > 0 else 0
             declared_amount = node.declare_r_coin(amount_to_declare)
 
             if declared_amount > 0:
@@ -60,6 +111,7 @@ class Server:
             return None
 
         # 更新幣值 - 將狀態變更與選擇邏輯分離
+        timestamp = now_micros()
         transaction_records = []
         for node in nodes:
             if node.id in declarations:
@@ -67,40 +119,37 @@ class Server:
                 r_coin_change = -declared_r
                 s_coin_change = self.config.system_s_coin * (declared_r / total_declared_r)
 
-                coin_changes = node.update_coins(r_coin_change, s_coin_change)
+                if ledger is not None:
+                    # 由驗證者選擇交易記帳
+                    coin_changes = {"r_coin_change": r_coin_change, "s_coin_change": s_coin_change}
+                else:
+                    coin_changes = node.update_coins(r_coin_change, s_coin_change)
 
-                transaction_records.append({
-                    "type": "verifier_selection",
-                    "node_id": node.id,
-                    "declared_r": declared_r,
-                    "r_coin_change": coin_changes["r_coin_change"],
-                    "s_coin_change": coin_changes["s_coin_change"],
-                    "timestamp": datetime.now().isoformat()
-                })
+                transaction_records.append(VerifierSelection(
+                    node.id, declared_r, coin_changes["r_coin_change"], coin_changes["s_coin_change"], timestamp
+                ))
 
         # 記錄交易
         self.transactions.extend(transaction_records)
-
-        # 基於當前S-coin和安全隨機數選擇驗證者
-        probabilities = self._calculate_selection_probabilities(nodes, total_declared_r)
-
-        # 生成安全的隨機哈希
-        selection_random = secrets.token_hex(16)
-
-        # 將每個節點的S-coin和隨機數結合生成一個選擇值
-        selection_values = {}
-        for node in nodes:
-            node_random = hashlib.sha256(f"{selection_random}{node.id}{node.s_coin}".encode()).hexdigest()
-            # 將哈希轉為浮點數，並加上基於S-coin的權重
-            hash_value = int(node_random, 16) / (2 ** 256)  # 標準化哈希值
-            weighted_value = hash_value * probabilities.get(node.id, 0)
-            selection_values[node.id] = weighted_value
-
-        # 選擇最高值的節點
-        selected_id = max(selection_values, key=selection_values.get)
-        selected_node = next((node for node in nodes if node.id == selected_id), None)
+        if blockchain is not None:
+            for record in transaction_records:
+                blockchain.add_transaction(record)
+
+        # 以前一區塊哈希推導種子，對所有節點的S-coin快照做可重算的抽籤
+        previous_hash = blockchain.get_last_block().hash if blockchain is not None else self.rng.randbytes(32).hex()
+        seed = derive_seed(previous_hash, reveal)
+        stakes = [ledger.balance(node)[1] for node in nodes] if ledger is not None else [node.s_coin for node in nodes]
+        lottery = run_lottery(seed, [node.id for node in nodes], stakes)
+        if reveal is not None:
+            lottery["reveal"] = reveal.hex()
+        if commitment is not None:
+            lottery["commitment"] = commitment
+        if blockchain is not None:
+            blockchain.record_lottery(lottery)
+
+        selected_node = next((node for node in nodes if node.id == lottery["selected_id"]), None)
 
         if selected_node:
-            logger.info(f"已選擇驗證者: Node {selected_node.id} (S-coin: {selected_node.s_coin})")
+            logger.info(f"已選擇驗證者: Node {selected_node.id} (S-coin: {stakes[nodes.index(selected_node)]})")
 
         return selected_node 
\ No newline at end of file
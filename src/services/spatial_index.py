@@ -0,0 +1,127 @@
+import math
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.models.worker import Worker
+
+Location = Tuple[float, float]
+
+
+class GridIndex:
+    """
+    worker 位置的均勻網格索引
+
+    每個格子保存其中的 worker，加入、移動與移除為 O(1)；
+    範圍查詢只掃描與查詢圓 (擴大最大覆蓋半徑) 重疊的格子，成本與候選數成正比。
+    最大覆蓋半徑由各半徑的 worker 數推導，移除最後一個最大半徑的 worker 時才重新計算 (成本與不同半徑數成正比)。
+    """
+
+    def __init__(self, cell_size: float = 100.0):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Dict[int, Worker]] = {}
+        self._cell_of: Dict[int, Tuple[int, int]] = {}
+        self._coverage_of: Dict[int, float] = {}  # 加入索引時的覆蓋半徑
+        self._coverage_counts: Dict[float, int] = {}
+        self.max_coverage = 0.0
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cell(self, location: Location) -> Tuple[int, int]:
+        return int(math.floor(location[0] / self.cell_size)), int(math.floor(location[1] / self.cell_size))
+
+    def insert(self, worker: Worker):
+        if worker.id in self._cell_of:
+            self.remove(worker.id)
+        cell = self._cell(worker.location)
+        self.cells.setdefault(cell, {})[worker.id] = worker
+        self._cell_of[worker.id] = cell
+        self._coverage_of[worker.id] = worker.coverage_radius
+        self._coverage_counts[worker.coverage_radius] = self._coverage_counts.get(worker.coverage_radius, 0) + 1
+        self.max_coverage = max(self.max_coverage, worker.coverage_radius)
+
+    def remove(self, worker_id: int):
+        cell = self._cell_of.pop(worker_id, None)
+        if cell is None:
+            return
+        members = self.cells[cell]
+        del members[worker_id]
+        if not members:
+            del self.cells[cell]
+
+        coverage = self._coverage_of.pop(worker_id)
+        self._coverage_counts[coverage] -= 1
+        if not self._coverage_counts[coverage]:
+            del self._coverage_counts[coverage]
+            if coverage == self.max_coverage:
+                self.max_coverage = max(self._coverage_counts, default=0.0)
+
+    def move(self, worker: Worker, location: Location):
+        """更新 worker 位置，跨格子時才調整索引"""
+        worker.move_to(location)
+        cell = self._cell(location)
+        if self._cell_of.get(worker.id) != cell:
+            self.remove(worker.id)
+            self.insert(worker)
+
+    def query(self, location: Location, radius: float) -> List[Worker]:
+        """覆蓋範圍與以 location 為圓心、radius 為半徑的區域相交的 worker"""
+        reach = radius + self.max_coverage
+        x, y = location
+        low_x, low_y = self._cell((x - reach, y - reach))
+        high_x, high_y = self._cell((x + reach, y + reach))
+
+        result = []
+        for cell_x in range(low_x, high_x + 1):
+            for cell_y in range(low_y, high_y + 1):
+                for worker in self.cells.get((cell_x, cell_y), {}).values():
+                    wx, wy = worker.location
+                    limit = radius + worker.coverage_radius
+                    if (wx - x) ** 2 + (wy - y) ** 2 <= limit * limit:
+                        result.append(worker)
+        return result
+
+
+class SpatialSelector:
+    """
+    基於位置的參與者選擇
+
+    worker 與任務分佈在 area_size x area_size 的區域，任務只從覆蓋其範圍的 worker 中選擇參與者；
+    參與任務的 worker 之後隨機移動最多 worker_speed 的距離。
+    """
+
+    def __init__(self, area_size: float = 1000.0, task_radius: float = 100.0, coverage_radius: float = 10.0,
+                 worker_speed: float = 0.0, cell_size: Optional[float] = None):
+        self.area_size = area_size
+        self.task_radius = task_radius
+        self.coverage_radius = coverage_radius
+        self.worker_speed = worker_speed
+        self.index = GridIndex(cell_size or task_radius)
+
+    def _clamp(self, value: float) -> float:
+        return min(max(value, 0.0), self.area_size)
+
+    def random_location(self) -> Location:
+        return random.uniform(0, self.area_size), random.uniform(0, self.area_size)
+
+    def place(self, workers: Sequence[Worker]):
+        """為沒有位置的 worker 隨機分配位置並加入索引"""
+        for worker in workers:
+            if worker.location is None:
+                worker.move_to(self.random_location())
+                worker.coverage_radius = worker.coverage_radius or self.coverage_radius
+            self.index.insert(worker)
+
+    def candidates(self, location: Location, radius: Optional[float] = None) -> List[Worker]:
+        return self.index.query(location, self.task_radius if radius is None else radius)
+
+    def move(self, workers: Sequence[Worker]):
+        """參與者隨機移動"""
+        if self.worker_speed <= 0:
+            return
+        for worker in workers:
+            angle = random.uniform(0, 2 * math.pi)
+            distance = random.uniform(0, self.worker_speed)
+            x, y = worker.location
+            self.index.move(worker, (self._clamp(x + distance * math.cos(angle)),
+                                     self._clamp(y + distance * math.sin(angle))))
@@ -0,0 +1,125 @@
+import logging
+import sqlite3
+from typing import Dict, Iterable, Optional
+
+from src.models.node import Node
+from src.models.requester import Requester
+from src.models.worker import Worker
+
+logger = logging.getLogger(__name__)
+
+NODE_KINDS = {"worker": Worker, "requester": Requester, "node": Node}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    r_coin NOT NULL,  -- 不宣告型別，保留整數或浮點數原值
+    s_coin NOT NULL,
+    height INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS node_history (
+    node_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (node_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SQLiteStateStore:
+    """
+    以 SQLite 保存節點狀態
+
+    每個區塊上鏈時在一個交易內只寫入本區塊中被修改的節點 (Blockchain.pending_nodes)，
+    歷史記錄只追加新增的部分，寫入成本與每輪活動量成正比而非節點總數。
+    使用 WAL 模式，進程崩潰時最多遺失尚未提交的那一個區塊。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self._history_written: Dict[int, int] = {}  # 節點ID -> 已寫入的歷史筆數
+        self._history_offsets: Dict[int, int] = {}  # 節點ID -> node.history[0] 對應的序號 (未載入歷史的節點不為 0)
+        self._cache: Dict[int, Node] = {}
+
+    def commit_block(self, block, nodes: Iterable[Node]) -> int:
+        """在同一交易中寫入區塊高度與被修改的節點，返回寫入的節點數"""
+        rows = []
+        history_rows = []
+        for node in nodes:
+            kind = type(node).__name__.lower()
+            rows.append((node.id, kind if kind in NODE_KINDS else "node", node.r_coin, node.s_coin, block.index))
+            written = self._written_count(node.id)
+            # 未載入歷史的節點 (load_node 的 with_history=False) 只保存載入後新增的記錄，接在已保存的序號之後
+            offset = self._history_offsets.get(node.id, 0)
+            history_rows.extend((node.id, offset + i, node.history[i])
+                                for i in range(max(written - offset, 0), len(node.history)))
+            self._history_written[node.id] = max(written, offset + len(node.history))
+            self._cache[node.id] = node
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO nodes (id, kind, r_coin, s_coin, height) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET r_coin = excluded.r_coin, s_coin = excluded.s_coin, "
+                "height = excluded.height",
+                rows
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO node_history (node_id, seq, record) VALUES (?, ?, ?)", history_rows
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("height", str(block.index)), ("head_hash", block.hash)]
+            )
+        return len(rows)
+
+    def _written_count(self, node_id: int) -> int:
+        if node_id not in self._history_written:
+            row = self.connection.execute(
+                "SELECT COUNT(*) FROM node_history WHERE node_id = ?", (node_id,)
+            ).fetchone()
+            self._history_written[node_id] = row[0]
+        return self._history_written[node_id]
+
+    def load_node(self, node_id: int, with_history: bool = True) -> Optional[Node]:
+        """依ID載入單一節點 (延遲載入並快取)，不存在時返回 None"""
+        if node_id in self._cache:
+            return self._cache[node_id]
+        row = self.connection.execute(
+            "SELECT kind, r_coin, s_coin FROM nodes WHERE id = ?", (node_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        kind, r_coin, s_coin = row
+        node = NODE_KINDS[kind](node_id, initial_r_coin=r_coin, initial_s_coin=s_coin)
+        if with_history:
+            node.history = [record for (record,) in self.connection.execute(
+                "SELECT record FROM node_history WHERE node_id = ? ORDER BY seq", (node_id,)
+            )]
+            self._history_written[node_id] = len(node.history)
+            self._history_offsets[node_id] = 0
+            self._cache[node_id] = node
+        else:
+            self._history_offsets[node_id] = self._written_count(node_id) - len(node.history)
+        return node
+
+    def node_count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def height(self) -> int:
+        """最後一個已保存區塊的高度，尚未保存時返回 -1"""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'height'").fetchone()
+        return int(row[0]) if row else -1
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,133 @@
+import bisect
+import logging
+import math
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[float, float, float]  # (x, y, 半徑)
+Deliver = Callable[[List[Dict[str, Any]]], None]
+
+
+class TaskPubSub:
+    """
+    任務廣播的發布/訂閱層
+
+    訂閱可依任務類型、區域 (圓形) 與最低獎勵過濾。訂閱預先放入
+    (任務類型或萬用, 網格格子或萬用) -> 依最低獎勵排序的列表 的索引，
+    發布時只查詢 4 個鍵並取各列表中最低獎勵不超過任務獎勵的前綴，
+    成本與匹配的訂閱數 (加上區域邊界的少量候選) 成正比，而非訂閱總數。
+    投遞按訂閱者合併成批，flush 時每個訂閱者只呼叫一次回呼。
+    """
+
+    def __init__(self, cell_size: float = 100.0, max_batch: int = 64):
+        self.cell_size = cell_size
+        self.max_batch = max_batch
+        self._next_id = 0
+        self.subscriptions: Dict[int, Dict[str, Any]] = {}
+        self._index: Dict[Tuple[Optional[str], Optional[Tuple[int, int]]], List[Tuple[float, int]]] = {}
+        self._deliver: Dict[int, Deliver] = {}  # 訂閱者ID -> 回呼
+        self._subscription_counts: Dict[int, int] = {}  # 訂閱者ID -> 有效訂閱數
+        self._outbox: Dict[int, Dict[str, Dict[str, Any]]] = {}  # 訂閱者ID -> 任務ID -> 任務
+        self.stats = {"published": 0, "matched": 0, "batches": 0}
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _cells(self, region: Optional[Region]) -> List[Optional[Tuple[int, int]]]:
+        """區域外接方形覆蓋的格子，沒有區域時為萬用鍵 None"""
+        if region is None:
+            return [None]
+        x, y, radius = region
+        low_x, low_y = self._cell(x - radius, y - radius)
+        high_x, high_y = self._cell(x + radius, y + radius)
+        return [(cx, cy) for cx in range(low_x, high_x + 1) for cy in range(low_y, high_y + 1)]
+
+    def subscribe(self, subscriber_id: int, deliver: Deliver, task_type: Optional[str] = None,
+                  region: Optional[Region] = None, min_reward: float = 0) -> int:
+        """登記訂閱並返回訂閱ID；同一訂閱者的多個訂閱共用回呼與投遞批次"""
+        subscription_id = self._next_id
+        self._next_id += 1
+        self.subscriptions[subscription_id] = {
+            "subscriber_id": subscriber_id,
+            "task_type": task_type,
+            "region": region,
+            "min_reward": min_reward,
+        }
+        self._deliver[subscriber_id] = deliver
+        self._subscription_counts[subscriber_id] = self._subscription_counts.get(subscriber_id, 0) + 1
+        entry = (min_reward, subscription_id)
+        for cell in self._cells(region):
+            bisect.insort(self._index.setdefault((task_type, cell), []), entry)
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int):
+        """取消訂閱；訂閱者最後一個訂閱取消時一併移除其回呼與尚未投遞的批次"""
+        subscription = self.subscriptions.pop(subscription_id, None)
+        if subscription is None:
+            return
+        subscriber_id = subscription["subscriber_id"]
+        self._subscription_counts[subscriber_id] -= 1
+        if not self._subscription_counts[subscriber_id]:
+            del self._subscription_counts[subscriber_id]
+            del self._deliver[subscriber_id]
+            self._outbox.pop(subscriber_id, None)
+        entry = (subscription["min_reward"], subscription_id)
+        for cell in self._cells(subscription["region"]):
+            key = (subscription["task_type"], cell)
+            entries = self._index[key]
+            del entries[bisect.bisect_left(entries, entry)]
+            if not entries:
+                del self._index[key]
+
+    def _matches(self, task: Dict[str, Any]) -> List[int]:
+        location = task.get("location")
+        cell = self._cell(*location) if location is not None else None
+        keys = {(task.get("task_type"), cell), (task.get("task_type"), None), (None, cell), (None, None)}
+
+        matched = []
+        reward = task["reward_amount"]
+        for key in keys:
+            entries = self._index.get(key)
+            if not entries:
+                continue
+            end = bisect.bisect_right(entries, (reward, math.inf))
+            for _, subscription_id in entries[:end]:
+                if key[1] is not None:
+                    # 格子只是近似，確認任務位置在訂閱區域內
+                    x, y, radius = self.subscriptions[subscription_id]["region"]
+                    if (location[0] - x) ** 2 + (location[1] - y) ** 2 > radius * radius:
+                        continue
+                matched.append(subscription_id)
+        return matched
+
+    def subscribers(self, task: Dict[str, Any]) -> Set[int]:
+        """發布 task 時會收到投遞的訂閱者ID (不放入投遞批次)"""
+        return {self.subscriptions[subscription_id]["subscriber_id"] for subscription_id in self._matches(task)}
+
+    def publish(self, task: Dict[str, Any]) -> int:
+        """將任務放入匹配訂閱者的投遞批次，返回匹配的訂閱數"""
+        matched = self._matches(task)
+        self.stats["published"] += 1
+        self.stats["matched"] += len(matched)
+        # 同一訂閱者的多個訂閱匹配時只投遞一次 (即使批次在其間已滿而送出)
+        for subscriber_id in dict.fromkeys(self.subscriptions[subscription_id]["subscriber_id"]
+                                           for subscription_id in matched):
+            batch = self._outbox.setdefault(subscriber_id, {})
+            batch[task["task_id"]] = task
+            if len(batch) >= self.max_batch:
+                self._flush_subscriber(subscriber_id)
+        return len(matched)
+
+    def _flush_subscriber(self, subscriber_id: int):
+        batch = self._outbox.pop(subscriber_id, None)
+        if batch:
+            self.stats["batches"] += 1
+            self._deliver[subscriber_id](list(batch.values()))
+
+    def flush(self) -> int:
+        """投遞所有待送批次，返回投遞的批次數"""
+        subscriber_ids = list(self._outbox)
+        for subscriber_id in subscriber_ids:
+            self._flush_subscriber(subscriber_id)
+        return len(subscriber_ids)
@@ -0,0 +1,159 @@
+import logging
+import random
+import secrets
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.blockchain.records import to_iso
+from src.utils.clock import now_micros
+
+logger = logging.getLogger(__name__)
+
+# 任務生命週期狀態
+TASK_OPEN = "open"
+TASK_ASSIGNED = "assigned"
+TASK_EVALUATED = "evaluated"
+TASK_COMMITTED = "committed"
+
+# 允許的狀態轉換
+TASK_TRANSITIONS = {
+    TASK_OPEN: (TASK_ASSIGNED, TASK_COMMITTED),
+    TASK_ASSIGNED: (TASK_EVALUATED, TASK_COMMITTED),
+    TASK_EVALUATED: (TASK_COMMITTED,),
+    TASK_COMMITTED: (),
+}
+
+
+def _clock_seconds() -> float:
+    return now_micros() / 1e6
+
+
+class TaskRegistry:
+    """
+    Server 的任務索引
+
+    以任務ID建立雜湊索引 (O(1) 查詢)，另維護每個請求者的任務索引。
+    每個任務登記時即加入到期佇列，狀態變更時重設期限，超過 TTL 沒有進展的任務
+    (包括被放棄的 open/assigned 任務) 會被移除；已提交上鏈的任務可立即移除，
+    使記憶體用量只與進行中的任務數相關。
+    到期時間以 clock (秒) 計算，預設為可替換的模擬時鐘 (src.utils.clock)，
+    因此種子模擬 (SteppingClock) 與離散事件引擎 (模擬時間) 中的到期結果可重現。
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, evict_on_commit: bool = True,
+                 rng: Optional[random.Random] = None, clock: Optional[Callable[[], float]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.evict_on_commit = evict_on_commit
+        self._clock = clock or _clock_seconds
+        # 每個註冊表使用隨機前綴加遞增序號，ID 長度與原本的 12 位十六進位相同；
+        # 傳入帶種子的 rng 時前綴可重現
+        self._rng = rng or secrets.SystemRandom()
+        self._prefix = self._new_prefix()
+        self._next_seq = 0
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._by_requester: Dict[int, Dict[str, None]] = {}
+        self._expiry = deque()  # (到期時間, 任務ID)，TTL 固定因此按時間排序
+        self._deadlines: Dict[str, float] = {}  # 任務ID -> 目前的到期時間，佇列中較早的項目已失效
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._tasks
+
+    def _new_prefix(self) -> str:
+        return f"{self._rng.getrandbits(16):04x}"
+
+    def _allocate_id(self) -> str:
+        """分配不重複的任務ID"""
+        if self._next_seq >= 1 << 32:
+            self._prefix = self._new_prefix()
+            self._next_seq = 0
+        task_id = f"{self._prefix}{self._next_seq:08x}"
+        self._next_seq += 1
+        return task_id
+
+    def register(self, task_data: str, requester_id: int, reward_amount: int,
+                 location: Optional[Tuple[float, float]] = None, radius: Optional[float] = None,
+                 task_type: Optional[str] = None) -> Dict[str, Any]:
+        """登記新任務，狀態為 open；location 與 radius 為選用的感知區域，task_type 為選用的任務類型"""
+        task_id = self._allocate_id()
+        task_info = {
+            "task_id": task_id,
+            "task_data": task_data,
+            "requester_id": requester_id,
+            "reward_amount": reward_amount,
+            "timestamp": to_iso(now_micros()),
+            "status": TASK_OPEN
+        }
+        if location is not None:
+            task_info["location"] = location
+            task_info["radius"] = radius
+        if task_type is not None:
+            task_info["task_type"] = task_type
+        self._tasks[task_id] = task_info
+        self._by_requester.setdefault(requester_id, {})[task_id] = None
+        self._schedule_expiry(task_id)
+        return task_info
+
+    def _schedule_expiry(self, task_id: str):
+        """設定 (或重設) 任務的到期時間"""
+        deadline = self._clock() + self.ttl_seconds
+        self._deadlines[task_id] = deadline
+        self._expiry.append((deadline, task_id))
+        self._compact()
+
+    def _compact(self):
+        """佇列中失效的項目 (期限已重設或任務已移除) 多於有效項目時重建佇列，使其長度與任務數成正比"""
+        if len(self._expiry) > 2 * len(self._deadlines) + 16:
+            self._expiry = deque(sorted((deadline, task_id) for task_id, deadline in self._deadlines.items()))
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """依任務ID查詢任務"""
+        return self._tasks.get(task_id)
+
+    def get_by_requester(self, requester_id: int) -> List[Dict[str, Any]]:
+        """查詢某請求者仍在註冊表中的任務"""
+        return [self._tasks[task_id] for task_id in self._by_requester.get(requester_id, ())]
+
+    def update_status(self, task_id: str, status: str) -> bool:
+        """轉換任務狀態，不允許的轉換會被拒絕"""
+        task_info = self._tasks.get(task_id)
+        if task_info is None:
+            logger.warning(f"任務 {task_id} 不存在或已被移除")
+            return False
+        if status not in TASK_TRANSITIONS[task_info["status"]]:
+            logger.warning(f"任務 {task_id} 不允許從 {task_info['status']} 轉換為 {status}")
+            return False
+
+        task_info["status"] = status
+        if status == TASK_COMMITTED and self.evict_on_commit:
+            self.remove(task_id)
+        else:
+            self._schedule_expiry(task_id)
+        return True
+
+    def remove(self, task_id: str):
+        """移除任務及其索引"""
+        task_info = self._tasks.pop(task_id, None)
+        if task_info is None:
+            return
+        self._deadlines.pop(task_id, None)
+        self._compact()
+        requester_tasks = self._by_requester.get(task_info["requester_id"])
+        if requester_tasks is not None:
+            requester_tasks.pop(task_id, None)
+            if not requester_tasks:
+                del self._by_requester[task_info["requester_id"]]
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """移除最後一次狀態變更後 TTL 已到期的任務，返回移除數量"""
+        if now is None:
+            now = self._clock()
+        evicted = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            deadline, task_id = self._expiry.popleft()
+            if self._deadlines.get(task_id) == deadline:
+                self.remove(task_id)
+                evicted += 1
+        return evicted
@@ -0,0 +1,90 @@
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.blockchain.replay import LedgerReplay
+
+
+def make_commitment(reveal: bytes) -> str:
+    """commit-reveal 的承諾值，需在抽籤前的區塊公開 (抽籤記錄的 commitment 欄位)"""
+    return hashlib.sha256(reveal).hexdigest()
+
+
+def derive_seed(previous_hash: str, reveal: Optional[bytes] = None) -> bytes:
+    """由前一區塊哈希 (及選用的 reveal) 推導抽籤種子"""
+    return hashlib.sha256(previous_hash.encode() + (reveal or b"")).digest()
+
+
+def stake_commitment(node_ids: np.ndarray, stakes: np.ndarray) -> str:
+    """對參與抽籤節點的 S-coin 快照做承諾"""
+    data = np.asarray(node_ids, dtype="<i8").tobytes() + np.asarray(stakes, dtype="<f8").tobytes()
+    return hashlib.sha256(data).hexdigest()
+
+
+def lottery_values(seed: bytes, count: int) -> np.ndarray:
+    """以種子為金鑰的 SHAKE-256 串流一次產生 count 個 [0, 1) 均勻值"""
+    stream = hashlib.shake_256(b"verifier-lottery" + seed).digest(8 * count)
+    return (np.frombuffer(stream, dtype="<u8") >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+def run_lottery(seed: bytes, node_ids: Sequence[int], stakes: Sequence[float]) -> Dict[str, Any]:
+    """
+    對所有節點一次向量化計算抽籤值並選出驗證者
+
+    節點按ID排序後依序取用串流中的值，選擇值為 均勻值 × S-coin 佔比，
+    取最大者；任何人拿到種子與 S-coin 快照即可重算。
+    """
+    ids = np.asarray(node_ids, dtype=np.int64)
+    weights = np.asarray(stakes, dtype=np.float64)
+    order = np.argsort(ids, kind="stable")
+    ids, weights = ids[order], weights[order]
+
+    probabilities = weights / max(1.0, weights.sum())
+    values = lottery_values(seed, len(ids)) * probabilities
+    winner = int(np.argmax(values))
+
+    return {
+        "seed": seed.hex(),
+        "stake_commitment": stake_commitment(ids, weights),
+        "node_count": len(ids),
+        "selected_id": int(ids[winner])
+    }
+
+
+def published_commitment(chain: List[Dict[str, Any]], height: int) -> Optional[str]:
+    """某高度抽籤可用的承諾：前一區塊抽籤記錄公開的 commitment"""
+    if height <= 0:
+        return None
+    return (chain[height - 1].get("lottery") or {}).get("commitment")
+
+
+def verify_lottery(lottery: Dict[str, Any], previous_hash: str, verifier_id: int,
+                   stakes: Dict[int, float], published: Optional[str] = None) -> bool:
+    """
+    以區塊中的抽籤記錄與 S-coin 快照重新驗證驗證者選擇
+
+    抽籤使用 reveal 時，published 必須是前一區塊公開的承諾 (published_commitment) 且與 reveal 相符。
+    """
+    reveal = bytes.fromhex(lottery["reveal"]) if lottery.get("reveal") else None
+    if reveal is not None and (published is None or make_commitment(reveal) != published):
+        return False
+
+    seed = derive_seed(previous_hash, reveal)
+    if seed.hex() != lottery["seed"]:
+        return False
+
+    result = run_lottery(seed, list(stakes.keys()), list(stakes.values()))
+    return result["stake_commitment"] == lottery["stake_commitment"] and \
+        result["selected_id"] == verifier_id
+
+
+def snapshot_stakes(chain: List[Dict[str, Any]], height: int, node_ids: Sequence[int]) -> Dict[int, float]:
+    """從鏈上記錄重建某區塊抽籤當下各節點的 S-coin"""
+    balances = LedgerReplay(chain[:height]).balances_at()
+    stakes = {node_id: balances.get(node_id, {"s_coin": 0.0})["s_coin"] for node_id in node_ids}
+    # 抽籤發生在本區塊的驗證者選擇交易之後
+    for transaction in chain[height]["transactions"]:
+        if transaction.get("type") == "verifier_selection" and transaction["node_id"] in stakes:
+            stakes[transaction["node_id"]] += transaction["s_coin_change"]
+    return stakes
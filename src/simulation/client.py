@@ -0,0 +1,59 @@
+"""模擬服務的命令行客戶端，只依賴標準庫以保持啟動時間最短"""
+import argparse
+import json
+import socket
+import sys
+from typing import Any, Dict, Iterator
+
+DEFAULT_SOCKET = "/tmp/mcs-simulation.sock"
+
+
+def submit_job(job: Dict[str, Any], socket_path: str = DEFAULT_SOCKET) -> Iterator[Dict[str, Any]]:
+    """送出任務並逐一產生服務回傳的事件，直到收到結果或錯誤"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(job).encode() + b"\n")
+        with sock.makefile('rb') as stream:
+            for line in stream:
+                event = json.loads(line)
+                yield event
+                if event["event"] in ("result", "error"):
+                    return
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='向常駐模擬服務提交任務')
+    parser.add_argument('-w', '--workers', type=int, default=10, help='系統中的worker總數 (默認: 10)')
+    parser.add_argument('-r', '--rounds', type=int, default=20, help='模擬輪數 (默認: 20)')
+    parser.add_argument('-l', '--lambda', type=float, dest='lambda_param', default=0.7,
+                        help='泊松分佈的λ參數 (默認: 0.7)')
+    parser.add_argument('-c', '--config', default='{}', help='SystemConfig 欄位 (JSON)')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='隨機種子，同時作為結果快取鍵的一部分')
+    parser.add_argument('--store-chain', action='store_true', help='在服務的結果快取中一併保存區塊鏈')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help=f'Unix socket 路徑 (默認: {DEFAULT_SOCKET})')
+    parser.add_argument('-q', '--quiet', action='store_true', help='只輸出最終結果')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    job = {
+        "workers": args.workers,
+        "rounds": args.rounds,
+        "lambda": args.lambda_param,
+        "seed": args.seed,
+        "store_chain": args.store_chain,
+        "config": json.loads(args.config)
+    }
+
+    for event in submit_job(job, args.socket):
+        if event["event"] == "error":
+            print(f"執行錯誤: {event['message']}", file=sys.stderr)
+            sys.exit(1)
+        if event["event"] == "result" or not args.quiet:
+            print(json.dumps(event, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
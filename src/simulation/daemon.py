@@ -0,0 +1,141 @@
+import argparse
+import json
+import logging
+import os
+import socketserver
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.config.system_config import SystemConfig
+from src.simulation.metrics import EconomyMetrics
+from src.simulation.run_cache import RunCache, cached_run
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = "/tmp/mcs-simulation.sock"
+
+
+def build_config(options: Dict[str, Any]) -> SystemConfig:
+    """由JSON中的配置欄位建立 SystemConfig"""
+    options = dict(options)
+    if "initial_r_coin_range" in options:
+        options["initial_r_coin_range"] = tuple(options["initial_r_coin_range"])
+    return SystemConfig(**options)
+
+
+def run_job(job: Dict[str, Any], emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+            cache: Optional[RunCache] = None) -> Dict[str, Any]:
+    """
+    執行一個模擬任務並返回結果摘要
+
+    job 欄位: workers, rounds, lambda, seed, store_chain, config (SystemConfig 欄位)，
+    config.metrics_interval > 0 時會串流經濟指標；快取規則見 run_cache.cached_run (命中時不串流)
+    """
+    config = build_config(job.get("config", {}))
+    on_round = None
+    metrics = None
+    if emit:
+        def on_round(round_num, success):
+            emit({"event": "round", "round": round_num, "success": success})
+
+        if config.metrics_interval > 0:
+            metrics = EconomyMetrics(interval=config.metrics_interval,
+                                     sink=lambda snapshot: emit({"event": "metrics", "metrics": snapshot}))
+
+    return cached_run(
+        worker_count=job.get("workers", 5),
+        simulation_rounds=job.get("rounds", 10),
+        lambda_param=job.get("lambda", 0.7),
+        config=config,
+        seed=job.get("seed"),
+        cache=cache,
+        store_chain=bool(job.get("store_chain")),
+        on_round=on_round,
+        metrics=metrics
+    )
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """每行一個JSON任務，結果以JSON行串流回傳"""
+
+    def _send(self, message: Dict[str, Any]):
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+        self.wfile.flush()
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+                if self.server.pool is not None:
+                    # 進程池模式: 多個任務可並行，只回傳最終結果
+                    future = self.server.pool.submit(run_job, job, None, self.server.cache)
+                    self._send({"event": "accepted"})
+                    summary = future.result()
+                else:
+                    # 單進程模式: 任務依序執行並逐輪串流進度
+                    with self.server.lock:
+                        summary = run_job(job, emit=self._send, cache=self.server.cache)
+                self._send({"event": "result", "summary": summary})
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as e:
+                logger.error(f"任務執行錯誤: {e}")
+                self._send({"event": "error", "message": str(e)})
+
+
+class SimulationDaemon(socketserver.ThreadingUnixStreamServer):
+    """
+    常駐的模擬服務
+
+    保持已載入模組的直譯器 (或預熱的進程池)，透過本機 Unix socket 接收任務，
+    避免每次模擬都付出直譯器啟動與 import 的成本。
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, processes: int = 0, cache: Optional[RunCache] = None):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _JobHandler)
+        self.socket_path = socket_path
+        self.lock = threading.Lock()
+        self.pool = ProcessPoolExecutor(max_workers=processes) if processes > 0 else None
+        self.cache = cache
+
+    def server_close(self):
+        super().server_close()
+        if self.pool is not None:
+            self.pool.shutdown()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='常駐模擬服務')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help=f'Unix socket 路徑 (默認: {DEFAULT_SOCKET})')
+    parser.add_argument('-p', '--processes', type=int, default=0,
+                        help='進程池大小，0 表示在服務進程內依序執行並串流每輪進度 (默認: 0)')
+    parser.add_argument('--cache-dir', default=None, help='模擬結果快取目錄 (默認: 不啟用)')
+    parser.add_argument('--cache-size', type=int, default=512, help='快取大小上限 (MB) (默認: 512)')
+    parser.add_argument('--log-level', default='WARNING', help='日誌等級 (默認: WARNING)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    cache = RunCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir else None
+    with SimulationDaemon(args.socket, args.processes, cache) as daemon:
+        print(f"模擬服務已啟動: {args.socket}")
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
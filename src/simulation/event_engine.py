@@ -0,0 +1,288 @@
+import argparse
+import heapq
+import logging
+import random
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.dedup import DuplicateDetector
+from src.blockchain.records import CoinAllocation, TaskCreation, TaskEvaluations, TaskSubmissions, VerifierReward
+from src.blockchain.validation import TransactionPipeline
+from src.config.system_config import SystemConfig, EventConfig
+from src.models.requester import Requester
+from src.models.worker import Worker
+from src.services.quality_reputation_manager import QualityReputationManager
+from src.services.server import Server
+from src.services.state_store import SQLiteStateStore
+from src.services.task_registry import TASK_ASSIGNED, TASK_EVALUATED
+from src.utils.clock import DETERMINISTIC_START_NS, now_micros, use_clock
+from src.utils.simulation_utils import simulate_task_completion, get_participants_count, select_random_participants
+
+logger = logging.getLogger(__name__)
+
+# 事件類型
+TASK_ARRIVAL = "task_arrival"
+TASK_DEADLINE = "task_deadline"
+SUBMISSION = "submission"
+WORKER_JOIN = "worker_join"
+WORKER_LEAVE = "worker_leave"
+BLOCK_CUT = "block_cut"
+
+
+class EventDrivenSimulation:
+    """
+    以最小堆排程的離散事件模擬
+
+    任務到達、worker 加入/離開、提交到達與出塊計時各自是事件，
+    模擬時間直接跳到下一個事件，每個事件只處理與其相關的 worker。
+    """
+
+    def __init__(self, worker_count: int, lambda_param: float = 0.7, config: Optional[SystemConfig] = None,
+                 event_config: Optional[EventConfig] = None, seed: Optional[int] = None, metrics=None):
+        self.config = config or SystemConfig()
+        self.event_config = event_config or EventConfig()
+        self.lambda_param = lambda_param
+        # 種子同時決定事件抽樣、參與者與完成度、驗證者宣告與任務ID；時間戳取自模擬時間，使區塊哈希可重現
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.metrics = metrics
+
+        self.now = 0.0
+        self._queue = []
+        self._seq = 0  # 同一時間的事件按排入順序處理
+
+        # 在線 worker 以列表加索引維護，加入與離開皆為 O(1)
+        self.workers: Dict[int, Worker] = {}
+        self.online: List[Worker] = []
+        self._online_index: Dict[int, int] = {}
+        self._subscriptions: Dict[int, int] = {}  # worker ID -> 任務訂閱ID
+        self.server = Server(self.config, rng=random.Random(seed) if seed is not None else None)
+        for i in range(worker_count):
+            self._add_worker(Worker(i, initial_r_coin=self._initial_r_coin()))
+
+        self.requester = Requester(id=worker_count, initial_r_coin=1000)
+        self._next_worker_id = worker_count + 1
+
+        with self._clock():
+            self.blockchain = Blockchain(initial_nodes=self.online + [self.requester],
+                                         difficulty=self.config.pow_difficulty, pow_workers=self.config.pow_workers)
+        if self.config.state_db_path:
+            self.blockchain.attach_state_store(SQLiteStateStore(self.config.state_db_path),
+                                               self.online + [self.requester])
+        if self.config.duplicate_detection:
+            self.blockchain.attach_dedup(DuplicateDetector(self.config.dedup_index_path))
+        if self.config.validation_batch_size > 0:
+            self.blockchain.attach_validator(TransactionPipeline(
+                self.blockchain, self.config, self.config.validation_batch_size,
+                self.config.validation_workers, self.config.validation_executor,
+                verifier_reward=self.event_config.verifier_reward
+            ))
+        self.qrm = QualityReputationManager(self.config)
+
+        self.open_tasks: Dict[str, Dict[str, Any]] = {}  # 任務ID -> 參與者與已收到的提交
+        self.staged: List[Dict[str, Any]] = []  # 已截止、等待下一個區塊評估的任務
+        self.stats = {"tasks": 0, "failed_tasks": 0, "submissions": 0, "late_submissions": 0,
+                      "joins": 0, "leaves": 0, "blocks": 0, "events": 0}
+
+        if self.metrics:
+            self.metrics.exclude(self.requester.id)
+            self.metrics.observe_block(self.blockchain.chain[0])
+
+    def _clock(self):
+        """有種子時以模擬時間作為時間戳的時鐘"""
+        if self.seed is None:
+            return nullcontext()
+        return use_clock(lambda: DETERMINISTIC_START_NS + round(self.now * 1e9))
+
+    def _initial_r_coin(self) -> int:
+        low, high = self.config.initial_r_coin_range
+        return int(self.rng.integers(low, high + 1))
+
+    def _add_worker(self, worker: Worker):
+        self.workers[worker.id] = worker
+        self._online_index[worker.id] = len(self.online)
+        self.online.append(worker)
+        if self.config.worker_min_reward is not None:
+            self._subscriptions[worker.id] = self.server.subscribe_worker(
+                worker, min_reward=self.config.worker_min_reward)
+        if self.event_config.mean_worker_session > 0:
+            self.schedule(self.rng.exponential(self.event_config.mean_worker_session), WORKER_LEAVE,
+                          {"worker_id": worker.id})
+
+    def _remove_worker(self, worker_id: int):
+        index = self._online_index.pop(worker_id, None)
+        if index is None:
+            return
+        subscription_id = self._subscriptions.pop(worker_id, None)
+        if subscription_id is not None:
+            self.server.unsubscribe_worker(subscription_id)
+        last = self.online.pop()
+        if last.id != worker_id:
+            self.online[index] = last
+            self._online_index[last.id] = index
+
+    def schedule(self, delay: float, kind: str, payload: Optional[Dict[str, Any]] = None):
+        """在 delay 時間後排入事件"""
+        heapq.heappush(self._queue, (self.now + delay, self._seq, kind, payload or {}))
+        self._seq += 1
+
+    def run(self, duration: float):
+        """執行到模擬時間 duration 為止"""
+        event_config = self.event_config
+        if event_config.task_arrival_rate > 0:
+            self.schedule(self.rng.exponential(1 / event_config.task_arrival_rate), TASK_ARRIVAL)
+        if event_config.worker_join_rate > 0:
+            self.schedule(self.rng.exponential(1 / event_config.worker_join_rate), WORKER_JOIN)
+        self.schedule(event_config.block_interval, BLOCK_CUT)
+
+        handlers = {
+            TASK_ARRIVAL: self._on_task_arrival,
+            TASK_DEADLINE: self._on_task_deadline,
+            SUBMISSION: self._on_submission,
+            WORKER_JOIN: self._on_worker_join,
+            WORKER_LEAVE: self._on_worker_leave,
+            BLOCK_CUT: self._on_block_cut,
+        }
+
+        try:
+            with self._clock():
+                while self._queue and self._queue[0][0] <= duration:
+                    self.now, _, kind, payload = heapq.heappop(self._queue)
+                    self.stats["events"] += 1
+                    handlers[kind](payload)
+        finally:
+            self.blockchain.close()
+
+        logger.info(f"離散事件模擬完成: 時間={duration}, 統計={self.stats}")
+        return self.stats
+
+    def _on_task_arrival(self, payload: Dict[str, Any]):
+        self.schedule(self.rng.exponential(1 / self.event_config.task_arrival_rate), TASK_ARRIVAL)
+        if not self.online:
+            return
+
+        self.stats["tasks"] += 1
+        task_description = f"Sensor data collection task #{self.stats['tasks']}"
+        reward_amount = self.event_config.task_reward
+        task_info = self.requester.create_task(task_description, reward_amount, self.blockchain.ledger)
+        if not task_info:
+            self.stats["failed_tasks"] += 1
+            return
+        task_id = self.server.broadcast_task(task_description, self.requester.id, reward_amount)
+        self.blockchain.add_transaction(TaskCreation(self.requester.id, reward_amount, task_info["r_coin_change"],
+                                                     task_info["s_coin_change"], task_info["timestamp"], task_id))
+        self.server.update_task_status(task_id, TASK_ASSIGNED)
+
+        # 只從在線 worker 抽樣參與者，不掃描全部 worker；有訂閱時只從收到任務投遞的 worker 中抽樣
+        pool = self.server.collect_recipients(self.online, task_id) if self._subscriptions else self.online
+        participant_count = get_participants_count(len(pool), self.lambda_param, self.rng)
+        participants = select_random_participants(pool, participant_count, self.rng)
+        self.open_tasks[task_id] = {"task_data": task_description, "submissions": []}
+
+        latencies = self.rng.exponential(self.event_config.mean_submission_latency, len(participants))
+        for worker, latency in zip(participants, latencies):
+            self.schedule(latency, SUBMISSION, {"task_id": task_id, "worker_id": worker.id})
+        self.schedule(self.event_config.task_deadline, TASK_DEADLINE, {"task_id": task_id})
+
+    def _on_submission(self, payload: Dict[str, Any]):
+        task = self.open_tasks.get(payload["task_id"])
+        if task is None:
+            self.stats["late_submissions"] += 1
+            return
+        if payload["worker_id"] not in self._online_index:
+            return  # worker 已離開
+
+        worker = self.workers[payload["worker_id"]]
+        submission = worker.submit_task(task["task_data"], payload["task_id"])
+        task["submissions"].append((worker, submission))
+        self.stats["submissions"] += 1
+
+    def _on_task_deadline(self, payload: Dict[str, Any]):
+        # 截止後不再接受提交，等待下一個區塊的驗證者評估
+        task_id = payload["task_id"]
+        task = self.open_tasks.pop(task_id)
+        task["task_id"] = task_id
+        self.staged.append(task)
+
+    def _on_worker_join(self, payload: Dict[str, Any]):
+        self.schedule(self.rng.exponential(1 / self.event_config.worker_join_rate), WORKER_JOIN)
+        worker = Worker(self._next_worker_id, initial_r_coin=self._initial_r_coin())
+        self._next_worker_id += 1
+        self._add_worker(worker)
+        self.stats["joins"] += 1
+
+        self.blockchain.ledger.open_account(worker)
+        self.blockchain.add_transaction(CoinAllocation(worker.id, worker.r_coin, worker.s_coin))
+        self.blockchain.touch_nodes([worker])
+
+    def _on_worker_leave(self, payload: Dict[str, Any]):
+        self._remove_worker(payload["worker_id"])
+        self.stats["leaves"] += 1
+
+    def _on_block_cut(self, payload: Dict[str, Any]):
+        self.schedule(self.event_config.block_interval, BLOCK_CUT)
+        if not self.staged and not self.blockchain.has_pending_transactions():
+            return
+
+        verifier = self.server.select_verifier(self.online, self.blockchain)
+        if not verifier:
+            return  # 交易保留到下一個區塊
+
+        # 驗證者選出後才評估，交易記錄順序與幣值變動順序一致
+        timestamp = now_micros()
+        for task in self.staged:
+            task_id = task["task_id"]
+            submitters = [worker for worker, _ in task["submissions"]]
+            completions = [simulate_task_completion(self.rng) for _ in submitters]
+            evaluations = self.qrm.evaluate_batch(submitters, completions, now=self.now,
+                                                  ledger=self.blockchain.ledger, task_id=task_id)
+            self.server.update_task_status(task_id, TASK_EVALUATED)
+
+            self.blockchain.add_transaction(TaskSubmissions(
+                task_id, tuple(submission for _, submission in task["submissions"]), timestamp))
+            self.blockchain.add_transaction(TaskEvaluations(task_id, tuple(evaluations), verifier.id, timestamp))
+            self.blockchain.refund_escrow(task_id)
+        self.staged = []
+
+        verifier_reward = self.event_config.verifier_reward
+        self.blockchain.add_transaction(VerifierReward(verifier.id, verifier_reward, 0, timestamp))
+
+        new_block = self.blockchain.add_block(verifier)
+        if new_block:
+            self.stats["blocks"] += 1
+            self.server.on_block_committed(new_block)
+            if self.metrics:
+                self.metrics.observe_block(new_block)
+                self.metrics.end_round(new_block.index)
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='離散事件眾包感知模擬')
+    parser.add_argument('-w', '--workers', type=int, default=100, help='初始worker數 (默認: 100)')
+    parser.add_argument('-t', '--duration', type=float, default=100.0, help='模擬時間 (默認: 100)')
+    parser.add_argument('-l', '--lambda', type=float, dest='lambda_param', default=0.1,
+                        help='每個任務的平均參與率 (默認: 0.1)')
+    parser.add_argument('--arrival-rate', type=float, default=1.0, help='任務到達率 (默認: 1.0)')
+    parser.add_argument('--block-interval', type=float, default=2.0, help='出塊間隔 (默認: 2.0)')
+    parser.add_argument('--join-rate', type=float, default=0.0, help='worker 加入率 (默認: 0)')
+    parser.add_argument('--session', type=float, default=0.0, help='worker 平均在線時間 (默認: 0，不離開)')
+    parser.add_argument('--seed', type=int, default=None, help='隨機種子，相同種子的模擬逐位元可重現')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    event_config = EventConfig(task_arrival_rate=args.arrival_rate, block_interval=args.block_interval,
+                               worker_join_rate=args.join_rate, mean_worker_session=args.session)
+    simulation = EventDrivenSimulation(args.workers, args.lambda_param, event_config=event_config, seed=args.seed)
+    stats = simulation.run(args.duration)
+    print(stats)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,308 @@
+import argparse
+import json
+import logging
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from typing import Any, Dict, List, Optional
+
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.records import Submission, TaskEvaluations, TaskSubmissions
+from src.config.system_config import SystemConfig
+from src.models.worker import Worker
+from src.services.quality_reputation_manager import QualityReputationManager
+from src.services.server import Server
+from src.services.task_registry import TASK_ASSIGNED, TASK_EVALUATED
+from src.utils.clock import now_micros
+from src.utils.simulation_utils import simulate_task_completion, get_participants_count, select_random_participants
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ("broadcast", "submit", "evaluate", "block", "task")
+
+
+class LatencyHistogram:
+    """
+    HDR 風格的對數-線性延遲直方圖 (奈秒)
+
+    每個 2 的冪次區間再切成 2^(precision_bits-1) 個子區間，
+    相對誤差約 2^-(precision_bits-1)，記錄為 O(1) 且記憶體與樣本數無關。
+    """
+
+    def __init__(self, precision_bits: int = 8):
+        self.precision_bits = precision_bits
+        self.counts = Counter()
+        self.total = 0
+        self.max_value = 0
+
+    def _bucket(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.precision_bits)
+        return (shift << self.precision_bits) | (value >> shift)
+
+    def _bucket_value(self, bucket: int) -> int:
+        """區間上界"""
+        shift = bucket >> self.precision_bits
+        mantissa = bucket & ((1 << self.precision_bits) - 1)
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value_ns: int):
+        value_ns = max(0, int(value_ns))
+        self.counts[self._bucket(value_ns)] += 1
+        self.total += 1
+        self.max_value = max(self.max_value, value_ns)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.max_value = max(self.max_value, other.max_value)
+
+    def percentile(self, q: float) -> int:
+        """q 介於 0-100，返回奈秒"""
+        if self.total == 0:
+            return 0
+        target = max(1, -(-self.total * q // 100))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(self._bucket_value(bucket), self.max_value)
+        return self.max_value
+
+    def summary(self) -> Dict[str, float]:
+        """樣本數與 p50/p99/p999/最大值 (毫秒)"""
+        return {
+            "count": self.total,
+            "p50_ms": self.percentile(50) / 1e6,
+            "p99_ms": self.percentile(99) / 1e6,
+            "p999_ms": self.percentile(99.9) / 1e6,
+            "max_ms": self.max_value / 1e6,
+        }
+
+
+class LoadTarget:
+    """
+    被壓測的 Server/Blockchain 路徑
+
+    每個任務依序: 廣播 -> 參與者提交 -> 評估並寫入交易；每 tasks_per_block 個任務
+    選出驗證者並出塊。Server 與 Blockchain 不是執行緒安全的，
+    所有操作在同一把鎖內執行，延遲包含等鎖時間 (即客戶端看到的排隊延遲)。
+    """
+
+    def __init__(self, worker_count: int, lambda_param: float, payload_size: int,
+                 config: Optional[SystemConfig] = None, tasks_per_block: int = 10):
+        self.config = config or SystemConfig()
+        self.lambda_param = lambda_param
+        self.payload = "x" * payload_size
+        self.tasks_per_block = tasks_per_block
+
+        low, high = self.config.initial_r_coin_range
+        self.workers = [Worker(i, initial_r_coin=secrets.randbelow(high - low + 1) + low)
+                        for i in range(worker_count)]
+        self.requester_id = worker_count
+        self.server = Server(self.config)
+        self.blockchain = Blockchain(initial_nodes=self.workers, difficulty=self.config.pow_difficulty,
+                                     pow_workers=self.config.pow_workers)
+        self.qrm = QualityReputationManager(self.config)
+
+        self.lock = threading.Lock()
+        self.histograms = {operation: LatencyHistogram() for operation in OPERATIONS}
+        self.completed_tasks = 0
+        self.submissions = 0
+        self.blocks = 0
+        self._unsealed = 0
+
+    def _timed(self, operation: str, func, *args):
+        start = time.perf_counter_ns()
+        result = func(*args)
+        self.histograms[operation].record(time.perf_counter_ns() - start)
+        return result
+
+    def _submit(self, task_id: str, participants: List[Worker]) -> List[Submission]:
+        submissions = []
+        for worker in participants:
+            start = time.perf_counter_ns()
+            submission = worker.submit_task(self.payload, task_id)
+            self.histograms["submit"].record(time.perf_counter_ns() - start)
+            submissions.append(submission)
+        return submissions
+
+    def _evaluate(self, task_id: str, participants: List[Worker]):
+        completions = [simulate_task_completion() for _ in participants]
+        evaluations = self.qrm.evaluate_batch(participants, completions, now=self.completed_tasks,
+                                              ledger=self.blockchain.ledger, task_id=task_id)
+        self.server.update_task_status(task_id, TASK_EVALUATED)
+        self.blockchain.add_transaction(TaskEvaluations(task_id, tuple(evaluations), None, now_micros()))
+
+    def _cut_block(self):
+        verifier = self.server.select_verifier(self.workers, self.blockchain)
+        if verifier is None:
+            return
+        new_block = self.blockchain.add_block(verifier)
+        if new_block:
+            self.server.on_block_committed(new_block)
+            self.blocks += 1
+
+    def run_task(self, intended_start: Optional[int] = None):
+        """執行一個任務，intended_start 為開環模式中預定的開始時間 (避免協調遺漏)"""
+        start = intended_start if intended_start is not None else time.perf_counter_ns()
+        with self.lock:
+            task_id = self._timed("broadcast", self.server.broadcast_task, self.payload,
+                                  self.requester_id, 1)
+            self.server.update_task_status(task_id, TASK_ASSIGNED)
+        participants = select_random_participants(
+            self.workers, get_participants_count(len(self.workers), self.lambda_param))
+        with self.lock:
+            submissions = self._submit(task_id, participants)
+            self.blockchain.add_transaction(TaskSubmissions(task_id, tuple(submissions), now_micros()))
+            self.submissions += len(submissions)
+        with self.lock:
+            self._timed("evaluate", self._evaluate, task_id, participants)
+            self.completed_tasks += 1
+            self._unsealed += 1
+            if self._unsealed >= self.tasks_per_block:
+                self._unsealed = 0
+                self._timed("block", self._cut_block)
+            self.histograms["task"].record(time.perf_counter_ns() - start)
+
+    def close(self):
+        self.blockchain.close()
+
+
+def run_closed_loop(target: LoadTarget, concurrency: int, duration: float):
+    """固定並行度: 每個客戶端完成一個任務後立即發出下一個"""
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            target.run_task()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(target: LoadTarget, rate: float, duration: float, max_inflight: int = 64, seed: Optional[int] = None):
+    """目標速率: 任務以泊松到達排程，延遲從預定到達時間起算"""
+    rng = random.Random(seed)
+    start = time.perf_counter_ns()
+    end = start + int(duration * 1e9)
+    intended = start
+    with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        while True:
+            intended += int(rng.expovariate(rate) * 1e9)
+            if intended >= end:
+                break
+            delay = (intended - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(target.run_task, intended)
+
+
+def run_load(worker_count: int, lambda_param: float, payload_size: int, mode: str = "closed",
+             concurrency: int = 4, rate: float = 100.0, duration: float = 5.0, tasks_per_block: int = 10,
+             config: Optional[SystemConfig] = None, seed: Optional[int] = None) -> Dict[str, Any]:
+    """執行一次壓測並返回各操作的延遲分位數與吞吐量"""
+    target = LoadTarget(worker_count, lambda_param, payload_size, config, tasks_per_block)
+    start = time.perf_counter()
+    try:
+        if mode == "open":
+            run_open_loop(target, rate, duration, seed=seed)
+        else:
+            run_closed_loop(target, concurrency, duration)
+    finally:
+        elapsed = time.perf_counter() - start
+        target.close()
+
+    return {
+        "mode": mode,
+        "workers": worker_count,
+        "lambda": lambda_param,
+        "payload_size": payload_size,
+        "concurrency": concurrency if mode == "closed" else None,
+        "target_rate": rate if mode == "open" else None,
+        "elapsed": elapsed,
+        "tasks_per_second": target.completed_tasks / elapsed,
+        "submissions_per_second": target.submissions / elapsed,
+        "blocks_per_second": target.blocks / elapsed,
+        "latency": {operation: histogram.summary() for operation, histogram in target.histograms.items()},
+    }
+
+
+def find_saturation(worker_count: int, lambda_param: float, payload_size: int, duration: float = 2.0,
+                    max_concurrency: int = 64, min_gain: float = 0.05, **kwargs) -> Dict[str, Any]:
+    """閉環模式下並行度加倍直到吞吐量增幅低於 min_gain，返回飽和吞吐量與各階段結果"""
+    steps = []
+    best = None
+    concurrency = 1
+    while concurrency <= max_concurrency:
+        result = run_load(worker_count, lambda_param, payload_size, "closed", concurrency, duration=duration, **kwargs)
+        steps.append(result)
+        if best is not None and result["tasks_per_second"] < best["tasks_per_second"] * (1 + min_gain):
+            break
+        best = result if best is None or result["tasks_per_second"] > best["tasks_per_second"] else best
+        concurrency *= 2
+    return {"saturation_tasks_per_second": best["tasks_per_second"],
+            "saturation_submissions_per_second": best["submissions_per_second"],
+            "saturation_concurrency": best["concurrency"], "steps": steps}
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(item) for item in value.split(",")]
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='Server/Blockchain 路徑的壓測工具')
+    parser.add_argument('--mode', choices=['closed', 'open', 'saturation'], default='closed',
+                        help='closed: 固定並行度, open: 目標速率, saturation: 搜尋飽和吞吐量 (默認: closed)')
+    parser.add_argument('-w', '--workers', type=_int_list, default=[100], help='worker數，可用逗號分隔多個值')
+    parser.add_argument('-l', '--lambda', type=_float_list, dest='lambda_param', default=[0.1],
+                        help='參與率，可用逗號分隔多個值')
+    parser.add_argument('--payload', type=_int_list, default=[64], help='任務資料大小 (位元組)，可用逗號分隔多個值')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='閉環模式的並行客戶端數 (默認: 4)')
+    parser.add_argument('--rate', type=float, default=100.0, help='開環模式的每秒任務數 (默認: 100)')
+    parser.add_argument('-t', '--duration', type=float, default=5.0, help='每組參數的執行秒數 (默認: 5)')
+    parser.add_argument('--tasks-per-block', type=int, default=10, help='每個區塊包含的任務數 (默認: 10)')
+    parser.add_argument('-o', '--output', help='以JSON保存完整結果')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    results = []
+    for worker_count, lambda_param, payload_size in product(args.workers, args.lambda_param, args.payload):
+        if args.mode == "saturation":
+            result = find_saturation(worker_count, lambda_param, payload_size, args.duration,
+                                     tasks_per_block=args.tasks_per_block)
+            print(f"workers={worker_count} lambda={lambda_param} payload={payload_size}: "
+                  f"飽和吞吐量 {result['saturation_tasks_per_second']:.1f} 任務/秒, "
+                  f"{result['saturation_submissions_per_second']:.1f} 提交/秒 "
+                  f"(並行度 {result['saturation_concurrency']})")
+        else:
+            result = run_load(worker_count, lambda_param, payload_size, args.mode, args.concurrency, args.rate,
+                              args.duration, args.tasks_per_block)
+            print(f"workers={worker_count} lambda={lambda_param} payload={payload_size}: "
+                  f"{result['tasks_per_second']:.1f} 任務/秒, {result['submissions_per_second']:.1f} 提交/秒")
+            for operation, summary in result["latency"].items():
+                print(f"  {operation:<10} n={summary['count']:<8} p50={summary['p50_ms']:.3f}ms "
+                      f"p99={summary['p99_ms']:.3f}ms p999={summary['p999_ms']:.3f}ms")
+        results.append(result)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
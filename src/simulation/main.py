@@ -1,13 +1,23 @@
 import logging
+import random
 import secrets
 import json
+import time
+import numpy as np
 from src.config.system_config import SystemConfig
 from src.models.worker import Worker
 from src.models.requester import Requester
 from src.services.server import Server
 from src.blockchain.blockchain import Blockchain
+from src.blockchain.dedup import DuplicateDetector
+from src.blockchain.validation import TransactionPipeline
 from src.services.quality_reputation_manager import QualityReputationManager
+from src.services.spatial_index import SpatialSelector
+from src.services.state_store import SQLiteStateStore
 from src.simulation.simulator import simulate_crowdsensing
+from src.simulation.metrics import EconomyMetrics
+from src.simulation.memory_profile import MemoryProfiler
+from src.utils.clock import SteppingClock, use_clock
 import sys
 import os
 
@@ -17,23 +27,46 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 logger = logging.getLogger(__name__)
 
 
-def main(worker_count=5, simulation_rounds=10, lambda_param=0.7):
+def run_simulation(worker_count=5, simulation_rounds=10, lambda_param=0.7, config=None, on_round=None,
+                   metrics=None, profiler=None, seed=None):
     """
-    主函數
-    
+    執行模擬但不輸出或保存結果
+
     參數:
         worker_count: 系統中的worker總數
         simulation_rounds: 模擬輪數
         lambda_param: 泊松分佈的λ參數，控制平均參與率 (0-1之間)
+        config: 系統配置，默認使用 SystemConfig()
+        on_round: 每輪結束後的回呼 on_round(round_num, success)
+        metrics: 選用的 EconomyMetrics，逐區塊更新經濟指標
+        profiler: 選用的 MemoryProfiler，超過記憶體預算時拋出 MemoryBudgetExceeded
+        seed: 選用的隨機種子，設定 random 與 numpy 的全域狀態 (參與人數、完成度、參與者抽樣與初始R-coin)，
+              並以帶種子的 rng 產生驗證者宣告與任務ID、以確定性時鐘產生時間戳，
+              使區塊哈希與抽籤結果在相同種子下逐位元相同
+
+    返回:
+        (blockchain, workers, server, requester, successful_rounds)
     """
+    if seed is None:
+        return _run_simulation(worker_count, simulation_rounds, lambda_param, config, on_round, metrics, profiler,
+                               None)
+    random.seed(seed)
+    np.random.seed(seed)
+    with use_clock(SteppingClock()):
+        return _run_simulation(worker_count, simulation_rounds, lambda_param, config, on_round, metrics, profiler,
+                               random.Random(seed))
+
+
+def _run_simulation(worker_count, simulation_rounds, lambda_param, config, on_round, metrics, profiler, rng):
+    """run_simulation 的主體，rng 為 None 表示不設種子"""
     # 系統配置
-    config = SystemConfig()
+    config = config or SystemConfig()
 
     # 創建工作節點
     workers = []
     for i in range(worker_count):
-        initial_r = secrets.randbelow(config.initial_r_coin_range[1] - config.initial_r_coin_range[0] + 1) + \
-                    config.initial_r_coin_range[0]
+        low, high = config.initial_r_coin_range
+        initial_r = random.randint(low, high) if rng is not None else secrets.randbelow(high - low + 1) + low
         worker = Worker(i, initial_r_coin=initial_r)
         workers.append(worker)
         logger.info(f"創建工作節點 {i}，初始 R-coin: {worker.r_coin}")
@@ -43,21 +76,138 @@ def main(worker_count=5, simulation_rounds=10, lambda_param=0.7):
     logger.info(f"創建請求者 {requester.id}，初始 R-coin: {requester.r_coin}")
 
     # 創建服務器和區塊鏈
-    server = Server(config)
-    blockchain = Blockchain()
+    server = Server(config, rng=rng)
+    blockchain = Blockchain(initial_nodes=workers + [requester], difficulty=config.pow_difficulty,
+                            pow_workers=config.pow_workers)
+    if config.duplicate_detection:
+        blockchain.attach_dedup(DuplicateDetector(config.dedup_index_path))
+    if config.state_db_path:
+        blockchain.attach_state_store(SQLiteStateStore(config.state_db_path), workers + [requester])
+    if config.validation_batch_size > 0:
+        blockchain.attach_validator(TransactionPipeline(
+            blockchain, config, config.validation_batch_size, config.validation_workers, config.validation_executor
+        ))
     qrm = QualityReputationManager(config)
+    if config.worker_min_reward is not None:
+        for worker in workers:
+            server.subscribe_worker(worker, min_reward=config.worker_min_reward)
+
+    spatial = None
+    if config.participant_selection == "spatial":
+        spatial = SpatialSelector(config.area_size, config.task_radius, config.worker_coverage_radius,
+                                  config.worker_speed)
+        spatial.place(workers)
+
+    observed_height = 0
+    if metrics:
+        metrics.exclude(requester.id)
+        metrics.observe_block(blockchain.chain[0])
 
     # 模擬多輪眾包感知
     successful_rounds = 0
 
-    for round_num in range(1, simulation_rounds + 1):
-        success = simulate_crowdsensing(blockchain, server, workers, qrm, round_num, requester, lambda_param)
-        if success:
-            successful_rounds += 1
+    if profiler:
+        profiler.start()
+
+    try:
+        for round_num in range(1, simulation_rounds + 1):
+            success = simulate_crowdsensing(blockchain, server, workers, qrm, round_num, requester, lambda_param,
+                                            spatial)
+            if success:
+                successful_rounds += 1
+            if metrics:
+                for block in blockchain.chain[observed_height + 1:]:
+                    metrics.observe_block(block)
+                observed_height = len(blockchain.chain) - 1
+                metrics.end_round(round_num)
+            if profiler:
+                profiler.observe(round_num, blockchain, server, workers + [requester])
+            if on_round:
+                on_round(round_num, success)
+    finally:
+        blockchain.close()
+        if profiler:
+            profiler.stop()
+
+    return blockchain, workers, server, requester, successful_rounds
+
+
+def summarize(blockchain, workers, requester, successful_rounds) -> dict:
+    """整理模擬結果摘要 (可序列化為JSON)"""
+    return {
+        "successful_rounds": successful_rounds,
+        "blocks": len(blockchain.chain),
+        "head_hash": blockchain.get_last_block().hash,
+        "workers": [{"id": worker.id, "r_coin": worker.r_coin, "s_coin": worker.s_coin} for worker in workers],
+        "requester": {"id": requester.id, "r_coin": requester.r_coin, "s_coin": requester.s_coin},
+        "ledger": blockchain.ledger.trial_balance()
+    }
+
+
+def main(worker_count=5, simulation_rounds=10, lambda_param=0.7, config=None):
+    """
+    主函數
+    
+    參數:
+        worker_count: 系統中的worker總數
+        simulation_rounds: 模擬輪數
+        lambda_param: 泊松分佈的λ參數，控制平均參與率 (0-1之間)
+        config: 系統配置，默認使用 SystemConfig()
+    """
+    config = config or SystemConfig()
+    os.makedirs("data", exist_ok=True)
+
+    # 經濟指標時間序列，每 metrics_interval 輪寫入一行
+    metrics = None
+    metrics_file = None
+    if config.metrics_interval > 0:
+        metrics_file = open("data/metrics.jsonl", 'w')
+
+        def write_metrics(snapshot):
+            metrics_file.write(json.dumps(snapshot) + "\n")
+            metrics_file.flush()
+            logger.info(f"第 {snapshot['round']} 輪指標: S-coin Gini={snapshot['s_coin_gini']:.3f}, "
+                        f"驗證者HHI={snapshot['verifier_hhi']:.3f}")
+
+        metrics = EconomyMetrics(interval=config.metrics_interval, sink=write_metrics)
+
+    # 記憶體剖析，每 memory_profile_interval 輪寫入一行
+    profiler = None
+    memory_file = None
+    if config.memory_profile_interval > 0:
+        memory_file = open("data/memory.jsonl", 'w')
+
+        def write_memory(report):
+            memory_file.write(json.dumps(report) + "\n")
+            memory_file.flush()
+            if "growth_per_round" in report:
+                logger.info(f"第 {report['round']} 輪記憶體: 增長 {report['growth_per_round']:.0f} 位元組/輪 "
+                            f"({report['growth_per_round_per_worker']:.1f} 位元組/輪/worker), "
+                            f"結構大小={report['structures']}")
+
+        profiler = MemoryProfiler(interval=config.memory_profile_interval,
+                                  budget_per_round=config.memory_budget_per_round, sink=write_memory)
+
+    start_time = time.perf_counter()
+    try:
+        blockchain, workers, server, requester, successful_rounds = run_simulation(
+            worker_count, simulation_rounds, lambda_param, config, metrics=metrics, profiler=profiler
+        )
+    finally:
+        if metrics_file:
+            metrics_file.close()
+        if memory_file:
+            memory_file.close()
+
+    elapsed = time.perf_counter() - start_time
 
     # 輸出結果
     logger.info(f"模擬完成: {successful_rounds}/{simulation_rounds} 輪成功")
+    logger.info(f"耗時 {elapsed:.3f} 秒，出塊速率: {(len(blockchain.chain) - 1) / max(elapsed, 1e-9):.2f} 區塊/秒 "
+                f"(難度: {config.pow_difficulty})")
     logger.info(f"平均每輪參與率設置為: {lambda_param*100:.1f}%")
+    if blockchain.validator is not None:
+        logger.info(f"交易驗證統計: {blockchain.validator.stats()}")
 
     # 驗證區塊鏈
     if blockchain.is_valid_chain():
@@ -80,7 +230,11 @@ def main(worker_count=5, simulation_rounds=10, lambda_param=0.7):
     # 保存區塊鏈到檔案
     blockchain.save_to_file("data/blockchain.json")
 
-    # 保存工作節點和請求者狀態
+    # 保存工作節點和請求者狀態 (使用狀態存儲時已逐區塊寫入)
+    if config.state_db_path:
+        logger.info(f"節點狀態已逐區塊保存到 {config.state_db_path}")
+        return blockchain, workers, server, requester
+
     with open("data/workers_state.json", 'w') as file:
         json.dump([worker.to_dict() for worker in workers], file, indent=4)
     logger.info("工作節點狀態已保存到 data/workers_state.json")
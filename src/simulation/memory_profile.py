@@ -0,0 +1,135 @@
+import logging
+import sys
+import tracemalloc
+from collections import deque
+from types import FunctionType, ModuleType
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 不計入深層大小的共用物件
+_SKIP_TYPES = (type, ModuleType, FunctionType)
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """每輪記憶體增長超過預算"""
+
+
+def deep_size(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    物件及其可達子物件的總大小 (位元組)
+
+    以顯式堆疊走訪容器、__dict__ 與 __slots__，seen 可跨多次呼叫共用以避免重複計算。
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIP_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        # getsizeof 已包含 ndarray 自有的資料緩衝
+        if isinstance(current, (np.ndarray, str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            stack.extend(current)
+        else:
+            if hasattr(current, "__dict__"):
+                stack.append(current.__dict__)
+            for slot in getattr(type(current), "__slots__", ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+    return total
+
+
+def protocol_structures(blockchain, server, nodes: List[Any]) -> Dict[str, int]:
+    """協議資料結構的深層大小"""
+    seen = set()
+    history = 0
+    for node in nodes:
+        history += deep_size(node.history, seen)
+    return {
+        "node_history": history,
+        "server_tasks": deep_size(server.tasks, seen),
+        "server_transactions": deep_size(server.transactions, seen),
+        "blockchain_chain": deep_size(blockchain.chain, seen),
+        "pending_transactions": deep_size(blockchain.pending_transactions, seen),
+    }
+
+
+class MemoryProfiler:
+    """
+    長時間模擬的記憶體剖析
+
+    每 interval 輪取一次 tracemalloc 快照並計算各協議資料結構的深層大小，
+    與上一次快照比較得到每輪、每 worker 的增長與前 top_n 個配置位置。
+    第一次快照作為基準；之後每輪總增長超過 budget_per_round (位元組) 時拋出 MemoryBudgetExceeded。
+    """
+
+    def __init__(self, interval: int = 10, budget_per_round: float = 0, top_n: int = 10,
+                 sink: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.interval = interval
+        self.budget_per_round = budget_per_round
+        self.top_n = top_n
+        self.sink = sink
+        self.reports: List[Dict[str, Any]] = []
+        self._previous = None  # (輪數, 快照, 追蹤總量, 結構大小)
+        self._started_tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def observe(self, round_num: int, blockchain, server, nodes: List[Any]) -> Optional[Dict[str, Any]]:
+        """在每輪結束時呼叫，每 interval 輪產生一筆報告"""
+        if round_num % self.interval != 0:
+            return None
+        self.start()
+
+        structures = protocol_structures(blockchain, server, nodes)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        # 以過濾後的快照計算總量，排除剖析器自身保存的快照
+        traced = sum(stat.size for stat in snapshot.statistics("filename"))
+        report = {"round": round_num, "traced_bytes": traced, "structures": structures}
+
+        if self._previous is not None:
+            previous_round, previous_snapshot, previous_traced, previous_structures = self._previous
+            rounds = round_num - previous_round
+            per_round = (traced - previous_traced) / rounds
+            report["growth_per_round"] = per_round
+            report["growth_per_round_per_worker"] = per_round / max(len(nodes), 1)
+            report["structure_growth_per_round"] = {
+                name: (size - previous_structures[name]) / rounds for name, size in structures.items()
+            }
+            report["top_allocations"] = [
+                {"site": str(stat.traceback), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(previous_snapshot, "lineno")[:self.top_n]
+            ]
+        self._previous = (round_num, snapshot, traced, structures)
+        self.reports.append(report)
+        if self.sink:
+            self.sink(report)
+
+        growth = report.get("growth_per_round")
+        if self.budget_per_round > 0 and growth is not None and growth > self.budget_per_round:
+            raise MemoryBudgetExceeded(
+                f"第 {round_num} 輪記憶體增長 {growth:.0f} 位元組/輪，超過預算 {self.budget_per_round:.0f}"
+            )
+        return report
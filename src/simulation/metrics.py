@@ -0,0 +1,220 @@
+import logging
+import random
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.blockchain.block import Block
+from src.blockchain.records import Record
+from src.blockchain.replay import iter_coin_events
+
+logger = logging.getLogger(__name__)
+
+# 樹堆優先值使用獨立的隨機來源，避免消耗全域 random 而改變種子模擬的抽樣序列
+_priorities = random.Random()
+
+
+class _TreapNode:
+    __slots__ = ("key", "priority", "left", "right", "size", "total")
+
+    def __init__(self, key: Tuple[float, int]):
+        self.key = key
+        self.priority = _priorities.random()
+        self.left = None
+        self.right = None
+        self.size = 1
+        self.total = key[0]
+
+
+def _size(node) -> int:
+    return node.size if node else 0
+
+
+def _total(node) -> float:
+    return node.total if node else 0.0
+
+
+def _pull(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+    node.total = node.key[0] + _total(node.left) + _total(node.right)
+
+
+def _split(node, key):
+    """分成 (< key, >= key) 兩棵樹"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _pull(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _pull(node)
+    return left, node
+
+
+def _merge(left, right):
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _pull(left)
+        return left
+    right.left = _merge(left, right.left)
+    _pull(right)
+    return right
+
+
+class OrderedStakes:
+    """以 (S-coin, 節點ID) 排序的樹堆，維護子樹大小與總和，查詢與更新皆為 O(log n)"""
+
+    def __init__(self):
+        self.root = None
+
+    def __len__(self) -> int:
+        return _size(self.root)
+
+    @property
+    def total(self) -> float:
+        return _total(self.root)
+
+    def insert(self, value: float, node_id: int):
+        left, right = _split(self.root, (value, node_id))
+        self.root = _merge(_merge(left, _TreapNode((value, node_id))), right)
+
+    def remove(self, value: float, node_id: int):
+        left, rest = _split(self.root, (value, node_id))
+        _, right = _split(rest, (value, node_id + 1))
+        self.root = _merge(left, right)
+
+    def below(self, value: float) -> Tuple[int, float]:
+        """小於 value 的節點數與 S-coin 總和"""
+        count, total = 0, 0.0
+        node = self.root
+        while node:
+            if node.key[0] < value:
+                count += _size(node.left) + 1
+                total += _total(node.left) + node.key[0]
+                node = node.right
+            else:
+                node = node.left
+        return count, total
+
+    def top(self, k: int) -> List[Tuple[int, float]]:
+        """S-coin 最高的 k 個節點 [(節點ID, S-coin)]"""
+        result = []
+        stack = []
+        node = self.root
+        while (stack or node) and len(result) < k:
+            while node:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            result.append((node.key[1], node.key[0]))
+            node = node.left
+        return result
+
+
+class EconomyMetrics:
+    """
+    逐區塊更新的經濟指標
+
+    由區塊中的幣值變動與評估記錄增量更新，每個變動的節點只需 O(log n)，
+    不需在結束後重新解析整條鏈。每 interval 輪輸出一筆快照到 series 與 sink。
+    """
+
+    def __init__(self, interval: int = 1, top_k: int = 5,
+                 sink: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.interval = max(1, interval)
+        self.top_k = top_k
+        self.sink = sink
+        self.series: List[Dict[str, Any]] = []
+        self.excluded = set()
+
+        self.balances: Dict[int, List[float]] = {}  # 節點ID -> [R-coin, S-coin]
+        self.total_r = 0
+        self.stakes = OrderedStakes()
+        self.abs_diff_sum = 0.0  # 所有節點對的 S-coin 差值絕對值總和
+
+        self.verifier_counts: Dict[int, int] = {}
+        self.verifier_square_sum = 0
+        self.blocks = 0
+        self.status_counts = {"rewarded": 0, "punished": 0, "neutral": 0}
+
+    def exclude(self, node_id: int):
+        """不納入統計的節點 (例如請求者)"""
+        self.excluded.add(node_id)
+
+    def _distance_sum(self, value: float) -> float:
+        """value 與樹中所有 S-coin 的差值絕對值總和"""
+        count, below = self.stakes.below(value)
+        above = self.stakes.total - below
+        return value * count - below + above - value * (len(self.stakes) - count)
+
+    def _apply(self, node_id: int, r_change, s_change):
+        if node_id in self.excluded:
+            return
+        balance = self.balances.get(node_id)
+        if balance is None:
+            balance = self.balances[node_id] = [0, 0.0]
+        else:
+            self.stakes.remove(balance[1], node_id)
+            self.abs_diff_sum -= self._distance_sum(balance[1])
+
+        balance[0] += r_change
+        balance[1] += s_change
+        self.total_r += r_change
+
+        self.abs_diff_sum += self._distance_sum(balance[1])
+        self.stakes.insert(balance[1], node_id)
+
+    def observe_block(self, block: Block):
+        """以新區塊更新指標"""
+        for transaction in block.transactions:
+            for node_id, r_change, s_change in iter_coin_events(transaction):
+                self._apply(node_id, r_change, s_change)
+            if isinstance(transaction, Record):
+                statuses = [evaluation.status for evaluation in transaction.evaluations] \
+                    if transaction.TYPE == "task_evaluations" else ()
+            elif transaction.get("type") == "task_evaluations":
+                statuses = [evaluation["status"] for evaluation in transaction["evaluations"]]
+            else:
+                statuses = ()
+            for status in statuses:
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+        if block.verifier_id >= 0:
+            count = self.verifier_counts.get(block.verifier_id, 0)
+            self.verifier_counts[block.verifier_id] = count + 1
+            self.verifier_square_sum += 2 * count + 1
+            self.blocks += 1
+
+    def end_round(self, round_num: int):
+        """每輪結束時呼叫，到達間隔時輸出快照"""
+        if round_num % self.interval == 0:
+            snapshot = self.snapshot(round_num)
+            self.series.append(snapshot)
+            if self.sink:
+                self.sink(snapshot)
+
+    def snapshot(self, round_num: int) -> Dict[str, Any]:
+        """目前的指標"""
+        n = len(self.stakes)
+        total_s = self.stakes.total
+        evaluations = sum(self.status_counts.values())
+        return {
+            "round": round_num,
+            "nodes": n,
+            "total_r_coin": self.total_r,
+            "mean_r_coin": self.total_r / n if n else 0.0,
+            "total_s_coin": total_s,
+            "mean_s_coin": total_s / n if n else 0.0,
+            "s_coin_gini": self.abs_diff_sum / (n * total_s) if n and total_s > 0 else 0.0,
+            "top_stakes": self.stakes.top(self.top_k),
+            # 驗證者集中度 (HHI) 與最大驗證者佔比
+            "verifier_hhi": self.verifier_square_sum / self.blocks ** 2 if self.blocks else 0.0,
+            "top_verifier_share": max(self.verifier_counts.values()) / self.blocks if self.blocks else 0.0,
+            "evaluation_rates": {
+                status: count / evaluations if evaluations else 0.0
+                for status, count in self.status_counts.items()
+            }
+        }
@@ -0,0 +1,263 @@
+import argparse
+import json
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.config.system_config import SystemConfig
+from src.simulation.metrics import EconomyMetrics
+from src.simulation.run_cache import RunCache, cached_run
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS = ("s_coin_gini", "top_verifier_share")
+# run_replicate 返回的數值指標，可作為排程追蹤的指標
+REPLICATE_METRICS = ("nodes", "total_r_coin", "mean_r_coin", "total_s_coin", "mean_s_coin", "s_coin_gini",
+                     "verifier_hhi", "top_verifier_share", "success_rate")
+SEED_STRIDE = 1_000_003  # 不使用共同隨機數時，各配置的種子間隔
+
+
+def _t_probability(t: float, dof: int) -> float:
+    """整數自由度 t 分佈的 P(|T| < t)，以有限級數精確計算 (Abramowitz & Stegun 26.7.3, 26.7.4)"""
+    theta = math.atan(t / math.sqrt(dof))
+    cos2 = math.cos(theta) ** 2
+    series, term = 0.0, 1.0
+    if dof % 2:
+        for k in range(1, (dof - 1) // 2 + 1):
+            series += term
+            term *= cos2 * (2 * k) / (2 * k + 1)
+        return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * series)
+    for k in range(1, dof // 2 + 1):
+        series += term
+        term *= cos2 * (2 * k - 1) / (2 * k)
+    return math.sin(theta) * series
+
+
+def t_quantile(confidence: float, dof: int) -> float:
+    """雙尾 t 分佈分位數，以二分法反解精確的分佈函數 (小自由度也準確)"""
+    if dof <= 0:
+        return float("inf")
+    low, high = 0.0, NormalDist().inv_cdf(0.5 + confidence / 2)
+    while _t_probability(high, dof) < confidence:
+        low, high = high, high * 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if _t_probability(middle, dof) < confidence:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+class RunningStat:
+    """Welford 線上平均與變異數"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else float("inf")
+
+    def half_width(self, confidence: float) -> float:
+        """信賴區間半寬"""
+        if self.count < 2:
+            return float("inf")
+        return t_quantile(confidence, self.count - 1) * math.sqrt(self.variance / self.count)
+
+    def summary(self, confidence: float) -> Dict[str, float]:
+        return {"mean": self.mean, "half_width": self.half_width(confidence), "n": self.count}
+
+
+def run_replicate(worker_count: int, simulation_rounds: int, lambda_param: float, config: SystemConfig,
+                  seed: int, cache: Optional[RunCache] = None) -> Dict[str, float]:
+    """執行一個重複實驗並返回最終的經濟指標 (有快取時重用)"""
+    summary = cached_run(worker_count, simulation_rounds, lambda_param, config, seed=seed, cache=cache,
+                         metrics=EconomyMetrics(interval=simulation_rounds))
+    final_metrics = {name: summary["metrics"][name] for name in REPLICATE_METRICS if name in summary["metrics"]}
+    final_metrics["success_rate"] = summary["successful_rounds"] / simulation_rounds if simulation_rounds else 0.0
+    return final_metrics
+
+
+class ReplicateScheduler:
+    """
+    自適應的蒙地卡羅重複實驗排程
+
+    每個配置分批執行重複實驗，以 Welford 線上統計追蹤指定指標的 t 信賴區間，
+    所有指標的半寬都不超過 max(abs_precision, rel_precision * |平均|) 時停止該配置。
+    common_random_numbers=True 時所有配置的第 i 個重複實驗使用相同種子，
+    並以第一個配置為基準報告逐對差值的信賴區間 (變異數縮減)。
+    """
+
+    def __init__(self, configurations: Sequence[Dict[str, Any]], metrics: Sequence[str] = DEFAULT_METRICS,
+                 rel_precision: float = 0.05, abs_precision: float = 0.0, confidence: float = 0.95,
+                 batch_size: int = 8, min_replicates: int = 8, max_replicates: int = 200,
+                 common_random_numbers: bool = True, base_seed: int = 0, processes: int = 0,
+                 cache: Optional[RunCache] = None):
+        unknown = [name for name in metrics if name not in REPLICATE_METRICS]
+        if unknown:
+            raise ValueError(f"未知的指標: {', '.join(unknown)} (可用: {', '.join(REPLICATE_METRICS)})")
+        self.configurations = list(configurations)
+        self.metrics = list(metrics)
+        self.rel_precision = rel_precision
+        self.abs_precision = abs_precision
+        self.confidence = confidence
+        self.batch_size = max(1, batch_size)
+        self.max_replicates = max_replicates
+        # 上限低於下限時以上限為準，否則永遠無法收斂
+        self.min_replicates = min(max(2, min_replicates), max_replicates)
+        self.common_random_numbers = common_random_numbers
+        self.base_seed = base_seed
+        self.processes = processes
+        self.cache = cache
+
+        self.stats = [{name: RunningStat() for name in self.metrics} for _ in self.configurations]
+        self.values: List[Dict[int, Dict[str, float]]] = [{} for _ in self.configurations]  # 重複編號 -> 指標
+        self.converged = [False] * len(self.configurations)
+
+    def _seed(self, config_index: int, replicate: int) -> int:
+        if self.common_random_numbers:
+            return self.base_seed + replicate
+        return self.base_seed + replicate + (config_index + 1) * SEED_STRIDE
+
+    def _is_converged(self, config_index: int) -> bool:
+        stats = self.stats[config_index]
+        count = len(self.values[config_index])
+        if count < self.min_replicates:
+            return False
+        if count >= self.max_replicates:
+            return True
+        return all(stat.half_width(self.confidence) <= max(self.abs_precision, self.rel_precision * abs(stat.mean))
+                   for stat in stats.values())
+
+    def _jobs(self) -> List[tuple]:
+        jobs = []
+        for index, configuration in enumerate(self.configurations):
+            if self.converged[index]:
+                continue
+            start = len(self.values[index])
+            count = min(self.batch_size, self.max_replicates - start)
+            for replicate in range(start, start + count):
+                jobs.append((index, replicate, configuration))
+        return jobs
+
+    def run(self) -> List[Dict[str, Any]]:
+        """執行直到所有配置收斂或達到上限"""
+        executor = ProcessPoolExecutor(max_workers=self.processes) if self.processes > 0 else None
+        try:
+            while not all(self.converged):
+                jobs = self._jobs()
+                if not jobs:
+                    break
+                arguments = [(c["workers"], c["rounds"], c["lambda"], c["config"], self._seed(i, r), self.cache)
+                             for i, r, c in jobs]
+                if executor is not None:
+                    results = list(executor.map(run_replicate, *zip(*arguments)))
+                else:
+                    results = [run_replicate(*args) for args in arguments]
+
+                for (index, replicate, _), values in zip(jobs, results):
+                    self.values[index][replicate] = values
+                    for name in self.metrics:
+                        self.stats[index][name].add(values[name])
+                for index in range(len(self.configurations)):
+                    if not self.converged[index] and self._is_converged(index):
+                        self.converged[index] = True
+                        logger.info(f"配置 {index} 在 {len(self.values[index])} 次重複後收斂")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.report()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """每個配置的指標信賴區間，以及共同隨機數下相對第一個配置的差值"""
+        results = []
+        baseline = self.values[0] if self.values else {}
+        for index, configuration in enumerate(self.configurations):
+            result = {
+                "workers": configuration["workers"],
+                "rounds": configuration["rounds"],
+                "lambda": configuration["lambda"],
+                "replicates": len(self.values[index]),
+                "metrics": {name: stat.summary(self.confidence) for name, stat in self.stats[index].items()},
+            }
+            if self.common_random_numbers and index > 0:
+                differences = {}
+                for name in self.metrics:
+                    stat = RunningStat()
+                    for replicate, values in self.values[index].items():
+                        if replicate in baseline:
+                            stat.add(values[name] - baseline[replicate][name])
+                    differences[name] = stat.summary(self.confidence)
+                result["difference_from_baseline"] = differences
+            results.append(result)
+        return results
+
+
+def parse_arguments():
+    """解析命令行參數"""
+    parser = argparse.ArgumentParser(description='自適應蒙地卡羅重複實驗')
+    parser.add_argument('-w', '--workers', default='20', help='worker數，可用逗號分隔多個值 (默認: 20)')
+    parser.add_argument('-r', '--rounds', type=int, default=50, help='每次模擬的輪數 (默認: 50)')
+    parser.add_argument('-l', '--lambda', dest='lambda_param', default='0.7',
+                        help='參與率，可用逗號分隔多個值 (默認: 0.7)')
+    parser.add_argument('-c', '--config', default='{}', help='所有配置共用的 SystemConfig 欄位 (JSON)')
+    parser.add_argument('--metrics', default=','.join(DEFAULT_METRICS),
+                        help=f'追蹤的指標，逗號分隔 (默認: {",".join(DEFAULT_METRICS)})')
+    parser.add_argument('--precision', type=float, default=0.05, help='相對精度 (信賴區間半寬/平均) (默認: 0.05)')
+    parser.add_argument('--abs-precision', type=float, default=0.0, help='絕對精度 (默認: 0)')
+    parser.add_argument('--confidence', type=float, default=0.95, help='信賴水準 (默認: 0.95)')
+    parser.add_argument('--batch', type=int, default=8, help='每批重複次數 (默認: 8)')
+    parser.add_argument('--min', type=int, default=8, dest='min_replicates', help='最少重複次數 (默認: 8)')
+    parser.add_argument('--max', type=int, default=200, dest='max_replicates', help='最多重複次數 (默認: 200)')
+    parser.add_argument('--independent', action='store_true', help='各配置使用獨立的隨機數 (默認使用共同隨機數)')
+    parser.add_argument('--seed', type=int, default=0, help='基礎種子 (默認: 0)')
+    parser.add_argument('-p', '--processes', type=int, default=0, help='並行進程數，0 表示在本進程執行 (默認: 0)')
+    parser.add_argument('--cache-dir', default=None, help='重用模擬結果快取的目錄 (默認: 不啟用)')
+    parser.add_argument('-o', '--output', help='以JSON保存結果')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    base_config = SystemConfig(**json.loads(args.config))
+    configurations = [
+        {"workers": int(workers), "rounds": args.rounds, "lambda": float(lambda_param),
+         "config": base_config}
+        for workers, lambda_param in product(args.workers.split(","), args.lambda_param.split(","))
+    ]
+    scheduler = ReplicateScheduler(
+        configurations, args.metrics.split(","), args.precision, args.abs_precision, args.confidence,
+        args.batch, args.min_replicates, args.max_replicates, not args.independent, args.seed, args.processes,
+        RunCache(args.cache_dir) if args.cache_dir else None
+    )
+    results = scheduler.run()
+
+    for result in results:
+        print(f"workers={result['workers']} lambda={result['lambda']}: {result['replicates']} 次重複")
+        for name, summary in result["metrics"].items():
+            line = f"  {name:<20} {summary['mean']:.4f} ± {summary['half_width']:.4f}"
+            difference = result.get("difference_from_baseline", {}).get(name)
+            if difference:
+                line += f"  (與基準差 {difference['mean']:+.4f} ± {difference['half_width']:.4f})"
+            print(line)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
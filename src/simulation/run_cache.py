@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional
+
+from src.blockchain.archive import read_archive, write_archive
+from src.config.system_config import SystemConfig
+from src.simulation.main import run_simulation, summarize
+from src.simulation.metrics import EconomyMetrics
+
+logger = logging.getLogger(__name__)
+
+SOURCE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+_code_version = None
+
+# 不影響模擬結果的配置欄位 (輸出路徑、並行度與剖析設定)，不納入快取鍵
+NON_RESULT_FIELDS = ("pow_workers", "validation_workers", "validation_executor", "metrics_interval",
+                     "memory_profile_interval", "memory_budget_per_round", "state_db_path", "dedup_index_path")
+
+
+def code_version() -> str:
+    """src 下所有 Python 原始碼的內容哈希 (每個進程只計算一次)"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for directory, subdirectories, files in os.walk(SOURCE_ROOT):
+            subdirectories[:] = sorted(d for d in subdirectories if d != "__pycache__")
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    path = os.path.join(directory, name)
+                    digest.update(os.path.relpath(path, SOURCE_ROOT).encode())
+                    with open(path, 'rb') as file:
+                        digest.update(file.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def cache_key(worker_count: int, simulation_rounds: int, lambda_param: float, config: Optional[SystemConfig],
+              seed: Optional[int]) -> str:
+    """由影響結果的配置欄位、模擬參數、程式碼版本與種子推導的內容地址"""
+    fields = asdict(config or SystemConfig())
+    for name in NON_RESULT_FIELDS:
+        fields.pop(name, None)
+    payload = {
+        "config": fields,
+        "workers": worker_count,
+        "rounds": simulation_rounds,
+        "lambda": lambda_param,
+        "seed": seed,
+        "code": code_version(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cacheable(config: Optional[SystemConfig], seed: Optional[int]) -> bool:
+    """
+    模擬是否可以使用快取
+
+    未指定種子的模擬不可重現；寫入狀態資料庫或沿用去重索引檔的模擬有檔案副作用
+    (索引檔中既有的鍵值也會影響結果)，命中快取會略過這些副作用，因此都不使用快取。
+    """
+    config = config or SystemConfig()
+    return seed is not None and not config.state_db_path and not config.dedup_index_path
+
+
+class RunCache:
+    """
+    以內容地址保存的模擬結果快取
+
+    每筆結果保存為 <key>.json (摘要) 與選用的 <key>.chain (欄位式壓縮區塊鏈)，
+    命中時更新檔案修改時間，總大小超過 max_bytes 時依修改時間淘汰最久未使用的項目 (LRU)。
+    """
+
+    def __init__(self, directory: str = "data/run_cache", max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """返回快取的摘要，未命中時返回 None"""
+        path = self._path(key, ".json")
+        try:
+            with open(path) as file:
+                summary = json.load(file)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        if os.path.exists(self._path(key, ".chain")):
+            os.utime(self._path(key, ".chain"))
+        return summary
+
+    def get_chain(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """返回快取的區塊鏈，沒有保存時返回 None"""
+        path = self._path(key, ".chain")
+        if not os.path.exists(path):
+            return None
+        os.utime(path)
+        return read_archive(path)
+
+    def put(self, key: str, summary: Dict[str, Any], chain: Optional[List[Dict[str, Any]]] = None):
+        """保存結果 (先寫入暫存檔再原子替換)，之後檢查大小上限"""
+        if chain is not None:
+            handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            os.close(handle)
+            write_archive(chain, temp_path)
+            os.replace(temp_path, self._path(key, ".chain"))
+
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, 'w') as file:
+            json.dump(summary, file)
+        os.replace(temp_path, self._path(key, ".json"))
+        self.evict()
+
+    def evict(self) -> int:
+        """淘汰最久未使用的項目直到總大小不超過上限，返回淘汰的項目數"""
+        entries = {}
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            key = name.split(".", 1)[0]
+            stat = os.stat(os.path.join(self.directory, name))
+            size, last_used = entries.get(key, (0, 0.0))
+            entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime))
+
+        total = sum(size for size, _ in entries.values())
+        evicted = 0
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for suffix in (".json", ".chain"):
+                if os.path.exists(self._path(key, suffix)):
+                    os.remove(self._path(key, suffix))
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info(f"快取淘汰 {evicted} 筆結果")
+        return evicted
+
+
+def cached_run(worker_count: int, simulation_rounds: int, lambda_param: float, config: Optional[SystemConfig] = None,
+               seed: Optional[int] = None, cache: Optional[RunCache] = None, store_chain: bool = False,
+               on_round: Optional[Callable[[int, bool], None]] = None,
+               metrics: Optional[EconomyMetrics] = None) -> Dict[str, Any]:
+    """
+    執行模擬並返回摘要，相同的結果輸入 (配置、模擬參數、程式碼版本與種子) 直接返回快取結果 (摘要中 cached=True)
+
+    提供 metrics 時摘要的 metrics 欄位為最後一輪的經濟指標，沒有該欄位的快取結果視為未命中。
+    命中快取時不會呼叫 on_round 與 metrics 的 sink。不可使用快取的模擬 (見 cacheable) 不讀取也不寫入快取。
+    """
+    key = cache_key(worker_count, simulation_rounds, lambda_param, config, seed)
+    if not cacheable(config, seed):
+        cache = None
+    if cache is not None:
+        summary = cache.get(key)
+        if summary is not None and (metrics is None or "metrics" in summary):
+            summary["cached"] = True
+            return summary
+
+    start_time = time.perf_counter()
+    blockchain, workers, server, requester, successful_rounds = run_simulation(
+        worker_count, simulation_rounds, lambda_param, config, on_round=on_round, metrics=metrics, seed=seed
+    )
+    summary = summarize(blockchain, workers, requester, successful_rounds)
+    if metrics is not None:
+        summary["metrics"] = metrics.snapshot(simulation_rounds)
+    summary["elapsed"] = time.perf_counter() - start_time
+    summary["cache_key"] = key
+    if cache is not None:
+        cache.put(key, summary, blockchain.to_dict() if store_chain else None)
+    summary["cached"] = False
+    return summary
@@ -1,18 +1,21 @@
 import logging
-from typing import List
-from datetime import datetime
+from typing import List, Optional
 from src.blockchain.blockchain import Blockchain
+from src.blockchain.records import TaskCreation, TaskEvaluations, TaskSubmissions, VerifierReward
 from src.services.server import Server
 from src.models.worker import Worker
 from src.services.quality_reputation_manager import QualityReputationManager
+from src.services.spatial_index import SpatialSelector
+from src.services.task_registry import TASK_ASSIGNED, TASK_EVALUATED
 from src.models.requester import Requester
+from src.utils.clock import now_micros
 from src.utils.simulation_utils import simulate_task_completion, get_participants_count, select_random_participants
 
 logger = logging.getLogger(__name__)
 
 def simulate_crowdsensing(blockchain: Blockchain, server: Server, workers: List[Worker],
                           qrm: QualityReputationManager, task_num: int, requester: Requester,
-                          lambda_param: float = 0.7):
+                          lambda_param: float = 0.7, spatial: Optional[SpatialSelector] = None):
     """
     模擬眾包感知流程
     
@@ -24,76 +27,89 @@ def simulate_crowdsensing(blockchain: Blockchain, server: Server, workers: List[
         task_num: 當前任務編號
         requester: 請求者實例
         lambda_param: 泊松分佈的λ參數，控制平均參與率
+        spatial: 選用的 SpatialSelector，提供時任務帶有位置，只從附近的worker選擇參與者
     """
     logger.info(f"======== 開始第 {task_num} 輪模擬 ========")
 
-    # Step1: 創建任務
     task_description = f"Sensor data collection task #{task_num}"
     reward_amount = 20  # 設定任務獎勵金額
-    task_info = requester.create_task(task_description, reward_amount)
+
+    # 先確定任務位置與候選worker (空間模式下為覆蓋該區域者，有訂閱時只保留訂閱條件符合此任務者)，
+    # 沒有候選者時不創建任務 (避免獎勵被託管卻無人執行)
+    task_location = spatial.random_location() if spatial else None
+    candidates = spatial.candidates(task_location) if spatial else workers
+    if server.pubsub.subscriptions:
+        subscribed = server.pubsub.subscribers({"reward_amount": reward_amount, "location": task_location})
+        candidates = [worker for worker in candidates if worker.id in subscribed]
+    if not candidates:
+        logger.warning("沒有可參與此任務的worker，跳過此輪")
+        return False
+
+    # Step1: 創建任務
+    task_info = requester.create_task(task_description, reward_amount, blockchain.ledger)
     
     if not task_info:
         logger.warning("任務創建失敗，跳過此輪")
         return False
-        
     task_id = server.broadcast_task(
         task_data=task_description,
         requester_id=requester.id,
-        reward_amount=reward_amount
+        reward_amount=reward_amount,
+        location=task_location,
+        radius=spatial.task_radius if spatial else None
     )
+    blockchain.add_transaction(TaskCreation(requester.id, reward_amount, task_info["r_coin_change"],
+                                            task_info["s_coin_change"], task_info["timestamp"], task_id))
 
     # Step2: 選擇驗證者 (使用所有worker參與驗證者選擇，確保公平性)
     verifier = server.select_verifier(workers, blockchain)
     if not verifier:
         logger.warning("無法選擇驗證者，跳過此輪")
+        blockchain.refund_escrow(task_id)
         return False
+    server.update_task_status(task_id, TASK_ASSIGNED)
 
-    # Step3: 使用泊松分佈決定有多少worker參與任務
-    participant_count = get_participants_count(len(workers), lambda_param)
-    participants = select_random_participants(workers, participant_count)
+    # 有訂閱時參與者只從實際收到任務投遞的worker中選擇 (同時清空所有worker的 inbox)
+    if server.pubsub.subscriptions:
+        delivered = {worker.id for worker in server.collect_recipients(workers, task_id)}
+        candidates = [worker for worker in candidates if worker.id in delivered]
+
+    # Step3: 使用泊松分佈決定有多少worker參與任務 (空間模式下只從覆蓋任務區域的worker中選擇)
+    participant_count = get_participants_count(len(candidates), lambda_param)
+    participants = select_random_participants(candidates, participant_count)
     
-    logger.info(f"總共 {len(workers)} 個worker中，有 {len(participants)} 個參與本次任務")
+    logger.info(f"總共 {len(candidates)} 個候選worker中，有 {len(participants)} 個參與本次任務")
 
     # Step4: 參與workers提交任務結果
     task_submissions = []
     for worker in participants:
-        submission = worker.submit_task(task_description)
-        submission["task_id"] = task_id
-        task_submissions.append(submission)
+        task_submissions.append(worker.submit_task(task_description, task_id))
+    if spatial:
+        spatial.move(participants)
 
     # 將提交記錄添加到待處理交易
-    blockchain.add_transaction({
-        "type": "task_submissions",
-        "task_id": task_id,
-        "submissions": task_submissions,
-        "timestamp": datetime.now().isoformat()
-    })
+    blockchain.add_transaction(TaskSubmissions(task_id, tuple(task_submissions), now_micros()))
 
     # Step5: 評估參與者的任務完成度
-    evaluations = []
-    for worker in participants:
-        # 使用更現實的任務完成度模擬
-        task_completion = simulate_task_completion()
-        evaluation = qrm.evaluate_task(worker, task_completion)
-        evaluation["task_id"] = task_id
-        evaluations.append(evaluation)
+    # 使用更現實的任務完成度模擬，整輪一次評估
+    completions = [simulate_task_completion() for _ in participants]
+    evaluations = qrm.evaluate_batch(participants, completions, now=task_num, ledger=blockchain.ledger,
+                                     task_id=task_id)
+    server.update_task_status(task_id, TASK_EVALUATED)
 
     # 將評估記錄添加到待處理交易
-    blockchain.add_transaction({
-        "type": "task_evaluations",
-        "task_id": task_id,
-        "evaluations": evaluations,
-        "verifier_id": verifier.id,
-        "timestamp": datetime.now().isoformat()
-    })
-
-    # Step6: 創建新區塊
+    blockchain.add_transaction(TaskEvaluations(task_id, tuple(evaluations), verifier.id, now_micros()))
+    blockchain.refund_escrow(task_id)
+
+    # Step6: 獎勵驗證者，獎勵與本輪其他交易一起記錄在區塊中
+    verifier_reward = server.config.verifier_reward
+    blockchain.add_transaction(VerifierReward(verifier.id, verifier_reward, 0, now_micros()))
+
+    # Step7: 創建新區塊，本輪所有分錄在此一次結算
     new_block = blockchain.add_block(verifier)
 
     if new_block:
-        # 獎勵驗證者
-        verifier_reward = 5  # 驗證者的固定獎勵
-        verifier.update_coins(r_coin_change=verifier_reward)
+        server.on_block_committed(new_block)
         logger.info(f"驗證者 {verifier.id} 獲得 {verifier_reward} R-coin作為獎勵")
 
     logger.info(f"======== 第 {task_num} 輪模擬結束 ========\n")
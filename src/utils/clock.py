@@ -0,0 +1,36 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# 確定性時鐘的起點 (2024-01-01T00:00:00 UTC)，讓種子模擬的時間仍落在合理的日期
+DETERMINISTIC_START_NS = 1_704_067_200 * 10 ** 9
+
+_clock: Callable[[], int] = time.time_ns  # 返回紀元納秒
+
+
+def now_micros() -> int:
+    """當前時間 (紀元起的微秒)，來自目前使用的時鐘"""
+    return _clock() // 1000
+
+
+class SteppingClock:
+    """每次讀取前進固定步長的確定性時鐘，使種子模擬的時間戳 (及含時間戳的區塊哈希) 可重現"""
+
+    def __init__(self, start_ns: int = DETERMINISTIC_START_NS, step_ns: int = 1000):
+        self.current = start_ns
+        self.step_ns = step_ns
+
+    def __call__(self) -> int:
+        self.current += self.step_ns
+        return self.current
+
+
+@contextmanager
+def use_clock(clock: Callable[[], int]) -> Iterator[None]:
+    """在 with 區塊內以 clock 取代系統時鐘"""
+    global _clock
+    previous, _clock = _clock, clock
+    try:
+        yield
+    finally:
+        _clock = previous
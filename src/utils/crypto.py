@@ -1,6 +1,12 @@
 import hashlib
+import struct
 
 
 def generate_hash(data: str) -> str:
     """生成 SHA256 哈希"""
-    return hashlib.sha256(data.encode('utf-8')).hexdigest() 
\ No newline at end of file
+    return hashlib.sha256(data.encode('utf-8')).hexdigest() 
+
+
+def submission_signature(worker_id: int, task_hash: bytes, timestamp: int) -> bytes:
+    """計算任務提交的簽名 (worker ID、紀元微秒時間與原始任務哈希)"""
+    return hashlib.sha256(struct.pack("<qq", worker_id, timestamp) + task_hash).digest()
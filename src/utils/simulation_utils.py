@@ -1,20 +1,25 @@
 import random
+from typing import Optional
+
 import numpy as np
 
-def simulate_task_completion() -> float:
-    """模擬任務完成度，較現實的實現"""
+def simulate_task_completion(rng: Optional[np.random.Generator] = None) -> float:
+    """模擬任務完成度，較現實的實現；提供 rng 時由其抽樣，否則使用全域 random"""
     # 大多數任務完成得相當好，但有些可能有問題
     # 使用beta分布生成更真實的完成度分布
     # 偏向高完成度但有一定變化
-    return min(1.0, max(0.0, random.betavariate(5, 1.5)))
+    value = rng.beta(5, 1.5) if rng is not None else random.betavariate(5, 1.5)
+    return min(1.0, max(0.0, float(value)))
 
-def get_participants_count(total_workers: int, lambda_param: float = 0.7) -> int:
+def get_participants_count(total_workers: int, lambda_param: float = 0.7,
+                           rng: Optional[np.random.Generator] = None) -> int:
     """
     使用泊松分佈決定參與任務的worker數量
     
     參數:
         total_workers: 總可用worker數量
         lambda_param: 泊松分佈的λ參數，控制平均參與率 (0-1之間)
+        rng: 選用的 numpy Generator，未提供時使用 numpy 全域狀態
     
     返回:
         參與任務的worker數量
@@ -23,18 +28,19 @@ def get_participants_count(total_workers: int, lambda_param: float = 0.7) -> int
     expected_count = lambda_param * total_workers
     
     # 使用泊松分佈生成實際參與人數
-    count = np.random.poisson(expected_count)
+    count = (rng if rng is not None else np.random).poisson(expected_count)
     
     # 確保數量不超過可用worker總數且至少有1人參與
     return max(1, min(count, total_workers))
 
-def select_random_participants(workers_list, count):
+def select_random_participants(workers_list, count, rng: Optional[np.random.Generator] = None):
     """
     從worker列表中隨機選擇指定數量的參與者
     
     參數:
         workers_list: 所有可用worker的列表
         count: 要選擇的worker數量
+        rng: 選用的 numpy Generator，未提供時使用全域 random
         
     返回:
         選中的worker列表
@@ -42,4 +48,6 @@ def select_random_participants(workers_list, count):
     if count >= len(workers_list):
         return workers_list.copy()
     
+    if rng is not None:
+        return [workers_list[i] for i in rng.choice(len(workers_list), count, replace=False)]
     return random.sample(workers_list, count) 
\ No newline at end of file
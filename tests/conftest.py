@@ -0,0 +1,9 @@
+import pytest
+
+from src.simulation.main import run_simulation
+
+
+@pytest.fixture(scope="session")
+def simulation():
+    """小型的種子模擬，返回 (blockchain, workers, server, requester, successful_rounds)；各測試不得修改其狀態"""
+    return run_simulation(worker_count=6, simulation_rounds=8, lambda_param=0.7, seed=7)
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from src.blockchain.archive import CODECS, read_archive, write_archive
+from src.blockchain.export import load_any
+
+
+@pytest.mark.parametrize("codec", sorted(CODECS))
+def test_archive_round_trip(simulation, tmp_path, codec):
+    chain = simulation[0].to_dict()
+    filename = str(tmp_path / f"chain.{codec}")
+
+    write_archive(chain, filename, segment_size=3, codec=codec)
+
+    assert read_archive(filename) == chain
+    assert load_any(filename) == chain
+
+
+def test_irregular_transactions_round_trip(simulation, tmp_path):
+    chain = json.loads(json.dumps(simulation[0].to_dict()))
+    submissions = next(transaction for block in chain for transaction in block["transactions"]
+                       if transaction["type"] == "task_submissions")
+    submissions["submissions"][0]["note"] = "extra"
+    filename = str(tmp_path / "chain.archive")
+
+    write_archive(chain, filename)
+
+    assert read_archive(filename) == chain
+
+
+def test_rejects_non_archive(tmp_path):
+    filename = tmp_path / "blockchain.json"
+    filename.write_text("[]")
+
+    with pytest.raises(ValueError):
+        read_archive(str(filename))
+    assert load_any(str(filename)) == []
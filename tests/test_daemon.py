@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+from src.simulation.client import submit_job
+from src.simulation.daemon import SimulationDaemon, build_config
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    server = SimulationDaemon(str(tmp_path / "daemon.sock"))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_build_config_converts_json_lists():
+    config = build_config({"initial_r_coin_range": [5, 9], "pow_difficulty": 2})
+    assert config.initial_r_coin_range == (5, 9) and config.pow_difficulty == 2
+
+
+def test_streams_rounds_then_result(daemon):
+    events = list(submit_job({"workers": 3, "rounds": 2, "seed": 4}, daemon.socket_path))
+    assert [event["event"] for event in events] == ["round", "round", "result"]
+    assert [event["round"] for event in events[:2]] == [1, 2]
+    summary = events[-1]["summary"]
+    assert summary["cached"] is False and len(summary["workers"]) == 3
+
+
+def test_seeded_jobs_are_reproducible(daemon):
+    job = {"workers": 3, "rounds": 2, "seed": 4}
+    first, second = (list(submit_job(job, daemon.socket_path))[-1]["summary"] for _ in range(2))
+    assert first["head_hash"] == second["head_hash"]
+
+
+def test_reports_invalid_config(daemon):
+    events = list(submit_job({"config": {"no_such_field": 1}}, daemon.socket_path))
+    assert events[-1]["event"] == "error"
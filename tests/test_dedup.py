@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+
+from src.blockchain.dedup import DiskHashIndex, DuplicateDetector, ScalableBloomFilter, digest_key
+from src.blockchain.records import Submission, TaskSubmissions
+
+
+def test_index_grows_and_reopens(tmp_path):
+    path = str(tmp_path / "dedup.idx")
+    keys = [digest_key(f"key:{i}") for i in range(100)]
+    index = DiskHashIndex(path, initial_capacity=16)
+    for key in keys:
+        assert index.add(key)
+    assert not index.add(keys[0])
+    assert index.capacity >= 128 and index.count == 100
+    index.close()
+    assert not os.path.exists(path + ".tmp")
+
+    reopened = DiskHashIndex(path)
+    assert (reopened.capacity, reopened.count) == (index.capacity, 100)
+    assert all(key in reopened for key in keys)
+    assert digest_key("key:100") not in reopened
+    assert len(reopened.keys()) == 100
+    reopened.close()
+
+
+def test_bulk_rehash_keeps_every_key_reachable(tmp_path):
+    keys = [digest_key(f"key:{i}") for i in range(5000)]
+    index = DiskHashIndex(str(tmp_path / "dedup.idx"), initial_capacity=16)
+    for key in keys:
+        index.add(key)
+    assert index.count == 5000 and all(key in index for key in keys)
+    index.close()
+
+
+def test_bulk_bloom_matches_single_adds():
+    digests = [digest_key(f"key:{i}") for i in range(250)]
+    single = ScalableBloomFilter(initial_capacity=100)
+    for digest in digests:
+        single.add(digest)
+    bulk = ScalableBloomFilter(initial_capacity=100)
+    bulk.add_many(np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(-1, 16))
+    assert [(bloom.count, bloom.bits) for bloom in bulk.filters] == [(bloom.count, bloom.bits) for bloom in single.filters]
+
+
+def submissions(task_id, signature):
+    return TaskSubmissions(task_id, (Submission(1, b"\x01" * 32, 0, signature, task_id),), 0)
+
+
+class _Block:
+    def __init__(self, *transactions):
+        self.transactions = transactions
+
+
+def test_detector_rejects_duplicates_after_reopen(tmp_path):
+    path = str(tmp_path / "dedup.idx")
+    detector = DuplicateDetector(path, initial_capacity=1000)
+    transaction = submissions("task-1", b"\x02" * 64)
+    assert detector.check_and_reserve(transaction)
+    assert not detector.check_and_reserve(transaction)
+    detector.commit_block(_Block(transaction))
+    detector.close()
+
+    reopened = DuplicateDetector(path, initial_capacity=1000)
+    assert not reopened.check_and_reserve(transaction)
+    assert not reopened.check_and_reserve(transaction.to_dict())
+    assert not reopened.check_and_reserve(submissions("task-2", b"\x02" * 64))
+    assert reopened.check_and_reserve(submissions("task-2", b"\x03" * 64))
+    reopened.close()
+
+
+def test_owned_index_is_removed_on_close():
+    detector = DuplicateDetector(initial_capacity=1000)
+    path = detector.index.path
+    assert os.path.exists(path)
+    detector.close()
+    assert not os.path.exists(path) and not os.path.exists(path + ".tmp")
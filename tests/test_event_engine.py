@@ -0,0 +1,38 @@
+import pytest
+
+from src.config.system_config import EventConfig
+from src.simulation.event_engine import EventDrivenSimulation
+
+
+def test_idle_run_only_cuts_blocks_on_schedule():
+    simulation = EventDrivenSimulation(3, event_config=EventConfig(task_arrival_rate=0, block_interval=2.0), seed=1)
+    stats = simulation.run(9.0)
+    assert stats["events"] == 4 and simulation.now == 8.0
+    assert stats["blocks"] == 0 and len(simulation.blockchain.chain) == 1
+
+
+def test_seeded_runs_are_reproducible():
+    runs = [EventDrivenSimulation(5, event_config=EventConfig(worker_join_rate=0.5, mean_worker_session=6.0), seed=3)
+            for _ in range(2)]
+    stats = [simulation.run(20.0) for simulation in runs]
+    assert stats[0] == stats[1] and stats[0]["blocks"] > 0
+    assert runs[0].blockchain.get_last_block().hash == runs[1].blockchain.get_last_block().hash
+
+
+def test_churn_keeps_online_set_and_ledger_consistent():
+    event_config = EventConfig(task_arrival_rate=2.0, worker_join_rate=1.0, mean_worker_session=4.0)
+    simulation = EventDrivenSimulation(6, event_config=event_config, seed=5)
+    stats = simulation.run(30.0)
+
+    assert len(simulation.online) == 6 + stats["joins"] - stats["leaves"]
+    assert all(simulation.online[index].id == worker_id for worker_id, index in simulation._online_index.items())
+    for currency in simulation.blockchain.ledger.trial_balance().values():
+        assert currency["total"] == pytest.approx(0)
+    assert set(simulation.blockchain.ledger.escrows) <= \
+        set(simulation.open_tasks) | {task["task_id"] for task in simulation.staged}
+
+
+def test_submissions_after_deadline_are_counted_late():
+    event_config = EventConfig(task_deadline=0.1, mean_submission_latency=5.0)
+    stats = EventDrivenSimulation(8, lambda_param=1.0, event_config=event_config, seed=2).run(20.0)
+    assert stats["late_submissions"] > stats["submissions"]
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from src.blockchain.explorer import IMMUTABLE_CACHE_CONTROL, ChainIndex, ExplorerAPI, make_handler
+
+
+def make_block(index, previous_hash, transactions=()):
+    return {"index": index, "hash": f"{index:064x}"[::-1], "previous_hash": previous_hash,
+            "timestamp": f"2024-01-01T00:00:{index:02d}", "verifier_id": index % 3,
+            "transactions": list(transactions)}
+
+
+def make_chain(length):
+    chain = [make_block(0, "0")]
+    for index in range(1, length):
+        evaluations = {"type": "task_evaluations", "task_id": f"task-{index}", "verifier_id": 0,
+                       "evaluations": [{"worker_id": 7, "r_coin_change": index}]}
+        chain.append(make_block(index, chain[-1]["hash"], [evaluations]))
+    return chain
+
+
+def write_chain(path, chain, mtime):
+    path.write_text(json.dumps(chain))
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def explorer(tmp_path):
+    path = tmp_path / "blockchain.json"
+    write_chain(path, make_chain(10), 1_000)
+    index = ChainIndex(str(path), refresh_interval=0)
+    return ExplorerAPI(index, finality=3), path
+
+
+def test_routes_and_errors(explorer):
+    api, _ = explorer
+    block_hash = api.index.chain[2]["hash"]
+
+    assert json.loads(api.handle(f"/blocks/{block_hash}")[1])["index"] == 2
+    assert json.loads(api.handle("/blocks/2")[1])["hash"] == block_hash
+    assert json.loads(api.handle("/head")[1])["height"] == 9
+    assert json.loads(api.handle("/tasks/task-4")[1])["transactions"][0]["block"] == 4
+    page = json.loads(api.handle("/workers/7/evaluations?offset=2&limit=3")[1])
+    assert ([item["block"] for item in page["items"]], page["total"]) == ([3, 4, 5], 9)
+
+    assert api.handle("/blocks/abc")[0] == 404
+    assert api.handle("/blocks/" + "0" * 63 + "f")[0] == 404
+    assert api.handle("/blocks/99")[0] == 404
+    assert api.handle("/tasks/missing")[0] == 404
+    status, body, _, _ = api.handle("/blocks?offset=abc")
+    assert status == 400 and "int()" not in json.loads(body)["error"]
+
+
+def test_only_final_hash_addressed_blocks_are_immutable(explorer):
+    api, _ = explorer
+    assert api.handle(f"/blocks/{api.index.chain[2]['hash']}")[3] == IMMUTABLE_CACHE_CONTROL
+    assert api.handle(f"/blocks/{api.index.chain[8]['hash']}")[3] == "no-cache"
+    assert api.handle("/blocks/2")[3] == "no-cache"
+
+
+def test_reload_keeps_immutable_entries(explorer):
+    api, path = explorer
+    final = f"/blocks/{api.index.chain[2]['hash']}"
+    api.handle(final)
+    api.handle("/head")
+
+    write_chain(path, make_chain(12), 2_000)
+    misses = api.misses
+    api.handle(final)
+    assert api.misses == misses and api.index.version == 2
+    assert json.loads(api.handle("/head")[1])["height"] == 11
+    assert api.misses == misses + 1
+
+
+def test_partial_reload_keeps_previous_index(explorer):
+    api, path = explorer
+    path.write_text("[{")
+    os.utime(path, (3_000, 3_000))
+    assert json.loads(api.handle("/head")[1])["height"] == 9
+
+
+def test_http_etag_revalidation(explorer):
+    api, _ = explorer
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(api))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/head"
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers["ETag"]
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 304
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.blockchain.export import ColumnarExport, export_chain
+from src.blockchain.records import CoinAllocation, Evaluation, Submission, TaskEvaluations, TaskSubmissions
+
+
+def evaluation(worker_id, status, change):
+    return Evaluation(worker_id, 0.9, status, 10, 10 + change, change, 2_000_000, "task-1")
+
+
+def chain():
+    submissions = TaskSubmissions("task-1", tuple(
+        Submission(worker_id, b"\x01" * 32, 1_000_000, b"\x02" * 64, "task-1") for worker_id in (3, 1)
+    ), 1_000_000)
+    evaluations = TaskEvaluations("task-1", (evaluation(3, "accepted", 5), evaluation(1, "rejected", -2),
+                                             evaluation(3, "accepted", 4)), 7, 2_000_000)
+    return [
+        {"index": 0, "transactions": [CoinAllocation(1, 10, 0).to_dict()]},
+        {"index": 1, "transactions": [submissions.to_dict()]},
+        {"index": 2, "transactions": [evaluations.to_dict()]},
+    ]
+
+
+def test_worker_rows_slice_sorted_tables(tmp_path):
+    export_chain(chain(), str(tmp_path))
+    export = ColumnarExport(str(tmp_path))
+
+    rows = export.worker_rows("evaluations", 3)
+    assert rows["r_coin_change"].tolist() == [5, 4]
+    assert rows["verifier_id"].tolist() == [7, 7]
+    assert rows["timestamp"][0] == np.datetime64(2_000_000, "us")
+    assert [export.meta["statuses"][code] for code in export.worker_rows("evaluations", 1)["status"]] == ["rejected"]
+    assert len(export.worker_rows("evaluations", 99)["height"]) == 0
+
+
+def test_tables_count_every_row(tmp_path):
+    export_chain(chain(), str(tmp_path))
+    export = ColumnarExport(str(tmp_path), mmap=False)
+
+    assert export.meta["rows"] == {"evaluations": 3, "submissions": 2, "coin_changes": 4}
+    assert export.table("submissions")["worker_id"].tolist() == [1, 3]
+    coin_changes = export.worker_rows("coin_changes", 1)
+    assert coin_changes["r_coin_change"].tolist() == [10, -2]
+    assert [export.meta["events"][code] for code in coin_changes["event"]] == ["coin_allocation", "task_evaluations"]
+    assert export.meta["task_ids"] == ["task-1"]
@@ -0,0 +1,138 @@
+import pytest
+
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.ledger import ESCROW, ISSUANCE, InsufficientFunds, Ledger
+from src.blockchain.records import Evaluation, TaskCreation, TaskEvaluations, TaskRefund, VerifierSelection
+from src.models.worker import Worker
+
+
+def make_chain():
+    nodes = [Worker(0, 100, 0.3), Worker(1, 50, 0.0)]
+    return Blockchain(nodes), nodes
+
+
+def assert_conserved(ledger: Ledger):
+    for currency, balances in ledger.trial_balance().items():
+        assert balances["total"] == pytest.approx(0, abs=1e-9), currency
+
+
+def test_simulation_trial_balance_is_zero(simulation):
+    blockchain = simulation[0]
+    assert blockchain.ledger.pending == 0
+    assert blockchain.ledger.escrows == {}
+    assert blockchain.ledger.trial_balance()["r_coin"][ESCROW] == 0
+    assert_conserved(blockchain.ledger)
+
+
+def test_stage_does_not_change_balances_until_commit():
+    blockchain, (requester, worker) = make_chain()
+    blockchain.add_transaction(TaskCreation(requester.id, 30, -30, 0, 0, "task-1"))
+    blockchain.add_transaction(VerifierSelection(worker.id, 10, -10, 2.5, 0))
+
+    assert blockchain.ledger.balance(requester) == (70, 0.3)
+    settlement = blockchain.ledger.stage()
+    assert settlement.balance(worker) == (40, 2.5)
+    assert (requester.r_coin, worker.r_coin, worker.s_coin) == (100, 50, 0.0)
+
+    blockchain.add_block(worker)
+    assert (requester.r_coin, worker.r_coin, worker.s_coin) == (70, 40, 2.5)
+    assert blockchain.ledger.trial_balance()["r_coin"][ESCROW] == 30
+    assert_conserved(blockchain.ledger)
+
+
+def test_invalid_block_leaves_balances_and_state_root(monkeypatch):
+    blockchain, (requester, worker) = make_chain()
+    root = blockchain.state_tree.root
+    blockchain.add_transaction(TaskCreation(requester.id, 30, -30, 0, 0))
+    monkeypatch.setattr(blockchain, "is_valid_block", lambda block, previous: False)
+
+    assert blockchain.add_block(worker) is None
+    assert requester.r_coin == 100
+    assert blockchain.state_tree.root == root
+    assert blockchain.ledger.pending == 1
+
+
+def test_reversed_transaction_is_not_settled():
+    blockchain, (requester, _) = make_chain()
+    transaction = TaskCreation(requester.id, 30, -30, 0, 0)
+    blockchain.ledger.post(transaction, provisional=True)
+    assert blockchain.ledger.balance(requester)[0] == 70
+
+    blockchain.reject_transaction(transaction)
+    assert blockchain.ledger.balance(requester)[0] == 100
+    blockchain.ledger.settle()
+    assert requester.r_coin == 100
+    assert_conserved(blockchain.ledger)
+
+
+def test_overdraft_raises_and_rounding_residue_is_conserved():
+    blockchain, (requester, worker) = make_chain()
+    ledger = blockchain.ledger
+    with pytest.raises(InsufficientFunds):
+        ledger.transfer("r_coin", worker, ESCROW, 51)
+    assert ledger.transfer("r_coin", worker, ESCROW, 51, partial=True) == 50
+
+    # 0.3 - (0.1 + 0.2) 的浮點負殘差歸零，差額計入發行帳戶
+    ledger.post(TaskCreation(requester.id, 0, 0, -(0.1 + 0.2), 0))
+    ledger.settle()
+    assert requester.s_coin == 0
+    assert_conserved(ledger)
+
+    ledger.post(TaskCreation(requester.id, 0, 0, -1.0, 0))
+    with pytest.raises(InsufficientFunds):
+        ledger.stage()
+
+
+def evaluation(worker, change):
+    return Evaluation(worker.id, 0.9 if change > 0 else 0.1, "rewarded" if change > 0 else "punished",
+                      worker.r_coin, worker.r_coin + change, change, 0, "task-1")
+
+
+def test_rewards_are_paid_from_escrow_and_remainder_refunded():
+    blockchain, (requester, worker) = make_chain()
+    ledger = blockchain.ledger
+    blockchain.add_transaction(TaskCreation(requester.id, 30, -30, 0, 0, "task-1"))
+    blockchain.add_transaction(TaskEvaluations("task-1", (evaluation(worker, 10), evaluation(requester, -2)),
+                                               worker.id, 0))
+    assert ledger.escrow_balance("task-1") == (20, 0)
+
+    blockchain.refund_escrow("task-1")
+    blockchain.add_block(worker)
+
+    balances = ledger.trial_balance()["r_coin"]
+    assert (balances[ESCROW], balances[ISSUANCE]) == (0, -150)
+    assert (requester.r_coin, worker.r_coin) == (88, 60)
+    assert ledger.escrows == {}
+    assert_conserved(ledger)
+
+
+def test_rewards_beyond_escrow_come_from_issuance():
+    blockchain, (requester, worker) = make_chain()
+    ledger = blockchain.ledger
+    ledger.post(TaskCreation(requester.id, 5, -5, 0, 0, "task-1"))
+    ledger.post(TaskEvaluations("task-1", (evaluation(worker, 10),), worker.id, 0))
+    ledger.settle()
+
+    balances = ledger.trial_balance()["r_coin"]
+    assert (balances[ESCROW], balances[ISSUANCE]) == (0, -155)
+    assert ledger.escrow_balance("task-1") == (0, 0)
+
+
+def test_refund_is_limited_to_escrow_and_reversible():
+    blockchain, (requester, worker) = make_chain()
+    ledger = blockchain.ledger
+    ledger.post(TaskCreation(requester.id, 30, -30, 0, 0, "task-1"))
+    with pytest.raises(InsufficientFunds):
+        ledger.post(TaskRefund("task-1", requester.id, 31, 0, 0))
+    with pytest.raises(InsufficientFunds):
+        ledger.post(TaskRefund("task-1", worker.id, 30, 0, 0))
+
+    evaluations = TaskEvaluations("task-1", (evaluation(worker, 10),), worker.id, 0)
+    refund = TaskRefund("task-1", requester.id, 20, 0, 0)
+    ledger.post(evaluations, provisional=True)
+    ledger.post(refund, provisional=True)
+    ledger.reverse(refund)
+    ledger.reverse(evaluations)
+    assert ledger.escrow_balance("task-1") == (30, 0)
+    assert ledger.balance(requester)[0] == 70
+    assert ledger.balance(worker)[0] == 50
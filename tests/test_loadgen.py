@@ -0,0 +1,45 @@
+import math
+import random
+
+from src.simulation.loadgen import LatencyHistogram, LoadTarget, run_load
+
+
+def test_histogram_percentiles_within_relative_error():
+    rng = random.Random(1)
+    values = sorted(rng.randrange(1, 10 ** 9) for _ in range(5000))
+    histogram = LatencyHistogram(precision_bits=8)
+    for value in values:
+        histogram.record(value)
+
+    for q in (50, 99, 99.9):
+        exact = values[math.ceil(len(values) * q / 100) - 1]
+        assert exact <= histogram.percentile(q) <= exact * (1 + 2 ** -7)
+    assert histogram.percentile(100) == values[-1] == histogram.max_value
+
+
+def test_small_values_are_exact_and_merge_adds_counts():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for value in range(1, 101):
+        (first if value % 2 else second).record(value)
+    first.merge(second)
+    assert first.total == 100 and first.percentile(50) == 50 and first.percentile(1) == 1
+    assert LatencyHistogram().percentile(99) == 0
+
+
+def test_target_cuts_a_block_every_n_tasks():
+    target = LoadTarget(20, 0.5, payload_size=16, tasks_per_block=2)
+    try:
+        for _ in range(5):
+            target.run_task()
+    finally:
+        target.close()
+    assert target.completed_tasks == 5 and target.histograms["task"].total == 5
+    assert target.histograms["block"].total == 2 and target.blocks <= 2
+    assert target.histograms["submit"].total == target.submissions
+    assert target.blockchain.is_valid_chain()
+
+
+def test_closed_loop_reports_throughput():
+    result = run_load(10, 0.5, 16, "closed", concurrency=2, duration=0.2, tasks_per_block=5)
+    assert result["tasks_per_second"] > 0
+    assert result["latency"]["task"]["count"] == round(result["tasks_per_second"] * result["elapsed"])
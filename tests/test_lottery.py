@@ -0,0 +1,51 @@
+import random
+
+from src.blockchain.blockchain import Blockchain
+from src.config.system_config import SystemConfig
+from src.models.worker import Worker
+from src.services.server import Server
+from src.services.verifier_lottery import make_commitment, published_commitment, snapshot_stakes, verify_lottery
+
+
+def test_simulation_lotteries_verify_from_chain(simulation):
+    blockchain, workers, _, _, _ = simulation
+    chain = blockchain.to_dict()
+    node_ids = [worker.id for worker in workers]
+
+    for height in range(1, len(chain)):
+        block = chain[height]
+        stakes = snapshot_stakes(chain, height, node_ids)
+        assert verify_lottery(block["lottery"], chain[height - 1]["hash"], block["verifier_id"], stakes)
+
+        other = next(node_id for node_id in node_ids if node_id != block["verifier_id"])
+        assert not verify_lottery(block["lottery"], chain[height - 1]["hash"], other, stakes)
+        assert not verify_lottery(block["lottery"], block["hash"], block["verifier_id"], stakes)
+        stakes[other] += 1.0
+        assert not verify_lottery(block["lottery"], chain[height - 1]["hash"], block["verifier_id"], stakes)
+
+
+def test_reveal_must_match_previous_commitment():
+    workers = [Worker(i, 100, 0.0) for i in range(4)]
+    blockchain = Blockchain(workers)
+    server = Server(SystemConfig(), rng=random.Random(3))
+    first, second = b"\x01" * 32, b"\x02" * 32
+
+    verifier = server.select_verifier(workers, blockchain, commitment=make_commitment(first))
+    blockchain.add_block(verifier)
+
+    # 未公開承諾的 reveal 被拒絕，且不產生任何交易
+    assert server.select_verifier(workers, blockchain, reveal=second) is None
+    assert not blockchain.pending_transactions
+
+    verifier = server.select_verifier(workers, blockchain, reveal=first, commitment=make_commitment(second))
+    blockchain.add_block(verifier)
+
+    chain = blockchain.to_dict()
+    lottery = chain[2]["lottery"]
+    stakes = snapshot_stakes(chain, 2, [worker.id for worker in workers])
+    published = published_commitment(chain, 2)
+    assert published == make_commitment(first)
+    assert verify_lottery(lottery, chain[1]["hash"], verifier.id, stakes, published)
+    assert not verify_lottery(lottery, chain[1]["hash"], verifier.id, stakes)
+    # 同一區塊公開的承諾 (下一次 reveal 的承諾) 不能用來驗證本次 reveal
+    assert not verify_lottery(lottery, chain[1]["hash"], verifier.id, stakes, lottery["commitment"])
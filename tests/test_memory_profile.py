@@ -0,0 +1,61 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from src.simulation.memory_profile import MemoryBudgetExceeded, MemoryProfiler, deep_size
+
+
+class Slotted:
+    __slots__ = ("payload",)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+
+def test_deep_size_counts_shared_and_cyclic_objects_once():
+    payload = "x" * 1000
+    cycle = [payload]
+    cycle.append(cycle)
+    assert deep_size(cycle) == sys.getsizeof(cycle) + sys.getsizeof(payload)
+
+    seen = set()
+    first = deep_size(Slotted(payload), seen)
+    assert first > sys.getsizeof(payload)
+    assert deep_size([payload], seen) == sys.getsizeof([payload])
+
+
+def protocol(history_length):
+    node = SimpleNamespace(history=[{"round": i} for i in range(history_length)])
+    blockchain = SimpleNamespace(chain=[], pending_transactions=[])
+    server = SimpleNamespace(tasks={}, transactions=[])
+    return blockchain, server, [node]
+
+
+def test_reports_structure_growth_every_interval():
+    reports = []
+    profiler = MemoryProfiler(interval=2, sink=reports.append)
+    try:
+        assert profiler.observe(1, *protocol(0)) is None
+        profiler.observe(2, *protocol(10))
+        report = profiler.observe(4, *protocol(110))
+    finally:
+        profiler.stop()
+
+    assert [report["round"] for report in reports] == [2, 4]
+    assert "growth_per_round" not in reports[0]
+    assert report["structure_growth_per_round"]["node_history"] > 0
+    assert report["structure_growth_per_round"]["server_tasks"] == 0
+    assert len(report["top_allocations"]) <= profiler.top_n
+
+
+def test_raises_when_growth_exceeds_budget():
+    profiler = MemoryProfiler(interval=1, budget_per_round=1)
+    retained = []
+    try:
+        profiler.observe(1, *protocol(0))
+        retained.append(bytearray(1 << 20))
+        with pytest.raises(MemoryBudgetExceeded):
+            profiler.observe(2, *protocol(0))
+    finally:
+        profiler.stop()
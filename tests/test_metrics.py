@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.records import CoinAllocation, Evaluation, TaskEvaluations
+from src.simulation.metrics import EconomyMetrics, OrderedStakes
+
+
+def gini(values):
+    return sum(abs(a - b) for a in values for b in values) / (2 * len(values) * sum(values))
+
+
+def test_ordered_stakes_match_sorted_list():
+    rng = random.Random(3)
+    stakes, reference = OrderedStakes(), {}
+    for _ in range(300):
+        node_id = rng.randrange(40)
+        if node_id in reference and rng.random() < 0.4:
+            stakes.remove(reference.pop(node_id), node_id)
+        else:
+            if node_id in reference:
+                stakes.remove(reference[node_id], node_id)
+            reference[node_id] = float(rng.randrange(20))
+            stakes.insert(reference[node_id], node_id)
+
+    assert len(stakes) == len(reference)
+    assert stakes.total == pytest.approx(sum(reference.values()))
+    assert stakes.below(10.0) == (sum(v < 10.0 for v in reference.values()),
+                                  pytest.approx(sum(v for v in reference.values() if v < 10.0)))
+    expected = sorted(((v, node_id) for node_id, v in reference.items()), reverse=True)[:5]
+    assert stakes.top(5) == [(node_id, v) for v, node_id in expected]
+
+
+def block(verifier_id, *transactions):
+    return Block(1, transactions, "2024-01-01T00:00:00", "0", verifier_id)
+
+
+def test_incremental_gini_and_concentration():
+    metrics = EconomyMetrics(interval=2)
+    metrics.exclude(9)
+    metrics.observe_block(block(-1, *(CoinAllocation(node_id, 10, s) for node_id, s in enumerate((1.0, 2.0, 6.0))),
+                                CoinAllocation(9, 1000, 500.0)))
+    metrics.observe_block(block(0, CoinAllocation(1, 0, 3.0), TaskEvaluations("t", (
+        Evaluation(2, 1.0, "rewarded", 10, 13, 3, 0, "t"), Evaluation(0, 0.1, "punished", 10, 8, -2, 0, "t")), 0, 0)))
+    metrics.observe_block(block(0))
+    metrics.observe_block(block(1))
+
+    snapshot = metrics.snapshot(4)
+    assert snapshot["nodes"] == 3 and snapshot["total_r_coin"] == 31
+    assert snapshot["s_coin_gini"] == pytest.approx(gini([1.0, 5.0, 6.0]))
+    assert snapshot["top_stakes"][0] == (2, 6.0)
+    assert snapshot["verifier_hhi"] == pytest.approx((2 / 3) ** 2 + (1 / 3) ** 2)
+    assert snapshot["top_verifier_share"] == pytest.approx(2 / 3)
+    assert snapshot["evaluation_rates"]["rewarded"] == 0.5
+
+
+def test_snapshots_every_interval_to_sink():
+    received = []
+    metrics = EconomyMetrics(interval=2, sink=received.append)
+    for round_num in range(1, 6):
+        metrics.end_round(round_num)
+    assert [snapshot["round"] for snapshot in received] == [2, 4]
+    assert metrics.series == received
@@ -0,0 +1,38 @@
+import pytest
+
+from src.config.system_config import SystemConfig
+from src.simulation.monte_carlo import ReplicateScheduler, RunningStat, t_quantile
+
+CONFIGURATION = {"workers": 3, "rounds": 2, "lambda": 0.7, "config": SystemConfig()}
+
+
+@pytest.mark.parametrize("dof, expected", [(1, 12.7062), (2, 4.3027), (3, 3.1824), (5, 2.5706), (30, 2.0423)])
+def test_t_quantile_matches_table(dof, expected):
+    assert t_quantile(0.95, dof) == pytest.approx(expected, abs=1e-4)
+
+
+def test_running_stat_matches_sample_variance():
+    stat = RunningStat()
+    for value in (1.0, 2.0, 4.0, 7.0):
+        stat.add(value)
+    assert (stat.mean, stat.variance) == pytest.approx((3.5, 7.0))
+    assert RunningStat().half_width(0.95) == float("inf")
+
+
+def test_max_below_min_stops_at_max():
+    scheduler = ReplicateScheduler([CONFIGURATION], batch_size=2, min_replicates=8, max_replicates=3)
+    result, = scheduler.run()
+    assert result["replicates"] == 3
+
+
+def test_stops_once_precision_is_reached():
+    scheduler = ReplicateScheduler([CONFIGURATION, dict(CONFIGURATION, workers=4)], metrics=["success_rate"],
+                                   abs_precision=10.0, batch_size=2, min_replicates=4, max_replicates=50)
+    results = scheduler.run()
+    assert [result["replicates"] for result in results] == [4, 4]
+    assert "difference_from_baseline" in results[1]
+
+
+def test_rejects_unknown_metric():
+    with pytest.raises(ValueError):
+        ReplicateScheduler([CONFIGURATION], metrics=["unknown"])
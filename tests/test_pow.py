@@ -0,0 +1,61 @@
+import hashlib
+
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.pow import ProofOfWork, meets_target, pow_hash
+from src.blockchain.records import Submission, TaskSubmissions
+from src.models.worker import Worker
+
+DIGEST = hashlib.sha256(b"block").digest()
+
+
+def first_valid_nonce(difficulty):
+    return next(nonce for nonce in range(1 << 20) if meets_target(pow_hash(DIGEST, nonce), difficulty))
+
+
+def test_single_process_finds_smallest_nonce():
+    pow = ProofOfWork(8, workers=1, chunk_size=64)
+    assert pow.seal(DIGEST) == first_valid_nonce(8)
+
+
+def test_process_pool_matches_single_process():
+    pow = ProofOfWork(8, workers=2, chunk_size=64)
+    try:
+        assert pow.seal(DIGEST) == first_valid_nonce(8)
+    finally:
+        pow.close()
+    assert pow._pool is None
+
+
+def test_sealed_block_hash_meets_target():
+    block = Block(1, (), "2024-01-01T00:00:00", "0" * 64, 0, difficulty=8)
+    block.nonce = ProofOfWork(8, workers=1).seal(block.content_digest())
+    block.hash = block.calculate_hash()
+    assert meets_target(block.hash, 8)
+    assert block.to_dict()["nonce"] == block.nonce
+
+    block.nonce += 1
+    assert block.calculate_hash() != block.hash
+
+
+def test_chain_rejects_tampered_nonce_and_wrong_difficulty():
+    verifier = Worker(0, initial_r_coin=10)
+    blockchain = Blockchain([verifier], difficulty=6, pow_workers=1)
+    blockchain.add_transaction(TaskSubmissions("task-1", (Submission(0, b"\x01" * 32, 0, b"\x02" * 64, "task-1"),), 0))
+    block = blockchain.add_block(verifier)
+    assert block is not None and meets_target(block.hash, 6)
+    assert blockchain.is_valid_chain()
+
+    block.nonce += 1
+    assert not blockchain.is_valid_chain()
+    block.nonce -= 1
+    assert blockchain.is_valid_chain()
+    blockchain.pow = ProofOfWork(7, workers=1)
+    assert not blockchain.is_valid_chain()
+
+
+def test_rejects_difficulty_out_of_range():
+    with pytest.raises(ValueError):
+        ProofOfWork(257)
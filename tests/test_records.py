@@ -0,0 +1,61 @@
+import json
+import sys
+
+import pytest
+
+from src.blockchain.records import Evaluation, Submission, TaskCreation, TaskEvaluations, TaskSubmissions, \
+    export_transaction, from_iso, record_from_dict, to_iso
+
+SUBMISSION = Submission(3, bytes(range(32)), 1_704_067_200_000_001, b"\xff" * 32, "task-1")
+EVALUATION = Evaluation(3, 0.9, "rewarded", 100, 110, 10, 1_704_067_200_000_002, "task-1")
+
+
+def test_json_shape():
+    data = TaskSubmissions("task-1", (SUBMISSION,), 1_704_067_200_000_003).to_dict()
+
+    assert data == {
+        "type": "task_submissions",
+        "task_id": "task-1",
+        "submissions": [{
+            "worker_id": 3,
+            "task_hash": bytes(range(32)).hex(),
+            "timestamp": "2024-01-01T00:00:00.000001",
+            "signature": "ff" * 32,
+            "task_id": "task-1",
+        }],
+        "timestamp": "2024-01-01T00:00:00.000003",
+    }
+    # 值為 None 的選用欄位省略
+    assert "task_id" not in TaskCreation(1, 20, -20, 0, 0).to_dict()
+
+
+@pytest.mark.parametrize("record", [
+    TaskSubmissions("task-1", (SUBMISSION, SUBMISSION._replace(worker_id=4)), 5),
+    TaskEvaluations("task-1", (EVALUATION,), 7, 6),
+    TaskCreation(1, 20, -20, 0, 0, "task-1"),
+])
+def test_round_trip_through_json(record):
+    restored = record_from_dict(json.loads(json.dumps(export_transaction(record))))
+    assert restored == record
+    assert type(restored) is type(record)
+
+
+def test_records_keep_tuple_semantics():
+    worker_id, task_hash, timestamp, signature, task_id = SUBMISSION
+    assert (SUBMISSION[0], worker_id, task_id) == (3, 3, "task-1")
+    assert "task-1" in SUBMISSION and "task_id" not in SUBMISSION
+    assert SUBMISSION.timestamp == timestamp and isinstance(SUBMISSION.task_hash, bytes)
+    assert export_transaction({"type": "custom"}) == {"type": "custom"}
+
+
+def test_records_are_compact():
+    assert not hasattr(SUBMISSION, "__dict__")
+    assert sys.getsizeof(SUBMISSION) < sys.getsizeof(SUBMISSION.to_dict())
+
+
+def test_timestamp_encoding_is_lossless():
+    assert from_iso(to_iso(1_704_067_200_123_456)) == 1_704_067_200_123_456
+    with pytest.raises(ValueError):
+        from_iso("2024-01-01T00:00:00+00:00")
+    with pytest.raises(KeyError):
+        record_from_dict({"type": "task_creation", "requester_id": 1})
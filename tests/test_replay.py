@@ -0,0 +1,31 @@
+import json
+
+from src.blockchain.replay import LedgerReplay
+
+
+def test_replay_matches_node_balances(simulation):
+    blockchain, workers, _, requester, _ = simulation
+    balances = LedgerReplay(blockchain.to_dict()).balances_at()
+
+    for node in [*workers, requester]:
+        assert balances[node.id]["r_coin"] == node.r_coin
+        assert abs(balances[node.id]["s_coin"] - node.s_coin) < 1e-9
+
+
+def test_replay_at_height(simulation):
+    blockchain = simulation[0]
+    chain = blockchain.to_dict()
+    replay = LedgerReplay(chain)
+
+    genesis = replay.balances_at(0)
+    for transaction in chain[0]["transactions"]:
+        assert genesis[transaction["node_id"]]["r_coin"] == transaction["r_coin_change"]
+    assert replay.balances_at(len(chain) - 1) == replay.balances_at()
+
+
+def test_replay_from_saved_file(simulation, tmp_path):
+    blockchain = simulation[0]
+    filename = tmp_path / "blockchain.json"
+    filename.write_text(json.dumps(blockchain.to_dict()))
+
+    assert LedgerReplay.from_file(str(filename)).balances_at() == LedgerReplay(blockchain.to_dict()).balances_at()
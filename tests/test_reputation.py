@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from src.config.system_config import SystemConfig
+from src.models.worker import Worker
+from src.services.quality_reputation_manager import QualityReputationManager
+from src.services.reputation import ReputationEngine
+
+
+def test_score_halves_old_weight_each_half_life():
+    engine = ReputationEngine(half_life=1.0)
+    assert engine.update(0, 1.0, now=0.0) == 1.0
+    assert engine.update(0, 0.0, now=1.0) == pytest.approx(0.5 / 1.5)
+    assert engine.score(1) == engine.prior and engine.score(10_000) == engine.prior
+
+
+def test_batch_update_matches_sequential_updates():
+    rng = random.Random(9)
+    batch, sequential = ReputationEngine(half_life=3.0, capacity=4), ReputationEngine(half_life=3.0, capacity=4)
+    for now in range(5):
+        ids = [rng.choice([0, 2, 7, 2, 5000]) for _ in range(6)]
+        completions = [rng.random() for _ in ids]
+        scores = batch.update_batch(ids, completions, now)
+        for worker_id, completion in zip(ids, completions):
+            sequential.update(worker_id, completion, now)
+        assert scores[-1] == pytest.approx(sequential.score(ids[-1]))
+    assert batch.scores([0, 2, 7, 5000]) == pytest.approx(sequential.scores([0, 2, 7, 5000]))
+
+
+def test_batch_evaluation_matches_single_evaluations():
+    config = SystemConfig(reputation_reward_weight=0.5)
+    completions = [0.9, 0.2, 0.6, 0.95]
+    single_workers = [Worker(i, initial_r_coin=1) for i in range(4)]
+    batch_workers = [Worker(i, initial_r_coin=1) for i in range(4)]
+
+    single = [QualityReputationManager(config).evaluate_task(worker, completion, now=0.0)
+              for worker, completion in zip(single_workers, completions)]
+    batch = QualityReputationManager(config).evaluate_batch(batch_workers, completions, now=0.0)
+
+    assert [(e.status, e.r_coin_change) for e in batch] == [(e.status, e.r_coin_change) for e in single]
+    assert batch[1].status == "punished" and batch[1].r_coin_change == -1  # 扣款以餘額為上限
+    assert [worker.r_coin for worker in batch_workers] == [worker.r_coin for worker in single_workers]
@@ -0,0 +1,65 @@
+import os
+
+from src.config.system_config import SystemConfig
+from src.simulation.daemon import run_job
+from src.simulation.metrics import EconomyMetrics
+from src.simulation.run_cache import RunCache, cache_key, cached_run
+
+
+def test_key_ignores_paths_and_worker_counts():
+    base = cache_key(3, 2, 0.7, SystemConfig(), seed=1)
+    assert cache_key(3, 2, 0.7, SystemConfig(pow_workers=4, validation_workers=2, metrics_interval=1,
+                                             state_db_path="state.db"), seed=1) == base
+    assert cache_key(3, 2, 0.7, SystemConfig(pow_difficulty=3), seed=1) != base
+    assert cache_key(3, 2, 0.7, SystemConfig(), seed=2) != base
+
+
+def test_second_run_hits_cache(tmp_path):
+    cache = RunCache(str(tmp_path))
+    first = cached_run(3, 2, 0.7, seed=5, cache=cache, store_chain=True)
+    second = cached_run(3, 2, 0.7, SystemConfig(metrics_interval=1), seed=5, cache=cache)
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["head_hash"] == first["head_hash"]
+    assert cache.get_chain(first["cache_key"])[-1]["hash"] == first["head_hash"]
+
+
+def test_unseeded_and_state_db_runs_bypass_cache(tmp_path):
+    cache = RunCache(str(tmp_path / "cache"))
+    cached_run(3, 2, 0.7, cache=cache)
+    state_db = tmp_path / "state.db"
+    config = SystemConfig(state_db_path=str(state_db))
+    cached_run(3, 2, 0.7, config, seed=5, cache=cache)
+    assert os.listdir(cache.directory) == []
+    state_db.unlink()
+    assert cached_run(3, 2, 0.7, config, seed=5, cache=cache)["cached"] is False
+    assert state_db.exists()
+
+
+def test_metrics_request_misses_summary_without_metrics(tmp_path):
+    cache = RunCache(str(tmp_path))
+    cached_run(3, 2, 0.7, seed=5, cache=cache)
+    summary = cached_run(3, 2, 0.7, seed=5, cache=cache, metrics=EconomyMetrics(interval=2))
+    assert summary["cached"] is False and summary["metrics"]["round"] == 2
+    assert cached_run(3, 2, 0.7, seed=5, cache=cache, metrics=EconomyMetrics(interval=2))["cached"] is True
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = RunCache(str(tmp_path), max_bytes=1 << 20)
+    cache.put("old", {"value": 1})
+    cache.put("new", {"value": 2})
+    os.utime(tmp_path / "old.json", (0, 0))
+    cache.max_bytes = 15
+    assert cache.evict() == 1
+    assert cache.get("old") is None and cache.get("new") == {"value": 2}
+
+
+def test_run_job_streams_rounds_then_reuses_cache(tmp_path):
+    cache = RunCache(str(tmp_path))
+    events = []
+    job = {"workers": 3, "rounds": 2, "seed": 5, "config": {"metrics_interval": 1}}
+    summary = run_job(job, emit=events.append, cache=cache)
+    assert [event["event"] for event in events].count("round") == 2
+    assert any(event["event"] == "metrics" for event in events)
+    assert summary["cached"] is False and "elapsed" in summary
+    assert run_job(job, cache=cache)["cache_key"] == summary["cache_key"]
+    assert run_job(job, cache=cache)["cached"] is True
@@ -0,0 +1,90 @@
+import math
+import random
+
+from src.blockchain.blockchain import Blockchain
+from src.config.system_config import SystemConfig
+from src.models.requester import Requester
+from src.models.worker import Worker
+from src.services.quality_reputation_manager import QualityReputationManager
+from src.services.server import Server
+from src.services.spatial_index import GridIndex, SpatialSelector
+from src.simulation.simulator import simulate_crowdsensing
+
+
+def worker(worker_id, location, coverage_radius):
+    return Worker(worker_id, location=location, coverage_radius=coverage_radius)
+
+
+def test_query_matches_coverage_across_cells():
+    index = GridIndex(cell_size=10.0)
+    for item in (worker(0, (5.0, 5.0), 1.0), worker(1, (25.0, 5.0), 12.0), worker(2, (90.0, 90.0), 1.0)):
+        index.insert(item)
+    assert sorted(item.id for item in index.query((8.0, 5.0), 6.0)) == [0, 1]
+    assert index.query((60.0, 60.0), 1.0) == []
+
+
+def test_max_coverage_shrinks_when_widest_worker_leaves():
+    index = GridIndex(cell_size=10.0)
+    index.insert(worker(0, (5.0, 5.0), 2.0))
+    index.insert(worker(1, (15.0, 5.0), 50.0))
+    index.insert(worker(2, (25.0, 5.0), 50.0))
+    index.remove(1)
+    assert index.max_coverage == 50.0
+    index.remove(2)
+    assert index.max_coverage == 2.0
+    index.remove(0)
+    assert index.max_coverage == 0.0 and len(index) == 0
+
+
+def test_move_and_reinsert_keep_counts():
+    index = GridIndex(cell_size=10.0)
+    wide = worker(0, (5.0, 5.0), 30.0)
+    index.insert(wide)
+    index.insert(wide)
+    index.move(wide, (55.0, 55.0))
+    assert len(index) == 1 and [item.id for item in index.query((50.0, 50.0), 1.0)] == [0]
+    wide.coverage_radius = 3.0
+    index.move(wide, (75.0, 75.0))
+    assert index.max_coverage == 3.0
+
+
+def test_selector_candidates_match_brute_force():
+    random.seed(4)
+    selector = SpatialSelector(area_size=500.0, task_radius=40.0, coverage_radius=15.0, cell_size=25.0)
+    workers = [Worker(i) for i in range(200)] + [worker(200, (1.0, 1.0), 5.0)]
+    selector.place(workers)
+    assert workers[-1].location == (1.0, 1.0) and workers[0].coverage_radius == 15.0
+    assert all(0 <= x <= 500 and 0 <= y <= 500 for x, y in (item.location for item in workers))
+
+    for _ in range(20):
+        x, y = selector.random_location()
+        expected = {item.id for item in workers
+                    if math.dist(item.location, (x, y)) <= selector.task_radius + item.coverage_radius}
+        assert {item.id for item in selector.candidates((x, y))} == expected
+
+
+def test_moved_workers_stay_in_area_and_index():
+    random.seed(5)
+    selector = SpatialSelector(area_size=100.0, coverage_radius=1.0, worker_speed=30.0, cell_size=10.0)
+    workers = [Worker(i) for i in range(30)]
+    selector.place(workers)
+    before = [item.location for item in workers]
+    selector.move(workers)
+
+    for item, old in zip(workers, before):
+        assert 0 <= item.location[0] <= 100 and 0 <= item.location[1] <= 100
+        assert math.dist(item.location, old) <= 30.0 + 1e-9
+        assert item in selector.candidates(item.location, 0.0)
+
+
+def test_round_without_covering_workers_creates_no_task():
+    random.seed(6)
+    workers = [Worker(i, initial_r_coin=10) for i in range(5)]
+    requester = Requester(5, initial_r_coin=100)
+    blockchain = Blockchain(workers + [requester])
+    selector = SpatialSelector(area_size=10_000.0, task_radius=1.0, coverage_radius=0.0)
+    selector.place(workers)
+
+    assert not simulate_crowdsensing(blockchain, Server(SystemConfig()), workers,
+                                     QualityReputationManager(SystemConfig()), 1, requester, spatial=selector)
+    assert blockchain.pending_transactions == [] and blockchain.ledger.escrows == {}
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from src.models.requester import Requester
+from src.models.worker import Worker
+from src.services.state_store import SQLiteStateStore
+
+
+def block(index):
+    return SimpleNamespace(index=index, hash=f"hash-{index}")
+
+
+def history_rows(store, node_id):
+    return [record for (record,) in store.connection.execute(
+        "SELECT record FROM node_history WHERE node_id = ? ORDER BY seq", (node_id,))]
+
+
+def test_reopened_store_restores_modified_nodes(tmp_path):
+    path = str(tmp_path / "state.db")
+    worker, requester = Worker(0, initial_r_coin=10), Requester(1, initial_r_coin=100)
+    store = SQLiteStateStore(path)
+    store.commit_block(block(0), [worker, requester])
+    worker.update_coins(r_coin_change=5, s_coin_change=0.5)
+    assert store.commit_block(block(1), [worker]) == 1
+    store.close()
+
+    reopened = SQLiteStateStore(path)
+    restored = reopened.load_node(0)
+    assert isinstance(restored, Worker) and (restored.r_coin, restored.s_coin) == (15, 0.5)
+    assert restored.history == worker.history
+    assert isinstance(reopened.load_node(1), Requester)
+    assert reopened.load_node(2) is None
+    assert (reopened.height(), reopened.node_count()) == (1, 2)
+    reopened.close()
+
+
+def test_history_is_appended_not_rewritten(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / "state.db"))
+    worker = Worker(0, initial_r_coin=10)
+    for index in range(3):
+        worker.update_coins(r_coin_change=1)
+        store.commit_block(block(index), [worker])
+    assert history_rows(store, 0) == worker.history and len(worker.history) == 3
+    store.close()
+
+
+def test_node_loaded_without_history_continues_sequence(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SQLiteStateStore(path)
+    worker = Worker(0, initial_r_coin=10)
+    worker.update_coins(r_coin_change=1)
+    store.commit_block(block(0), [worker])
+    store.close()
+
+    store = SQLiteStateStore(path)
+    loaded = store.load_node(0, with_history=False)
+    assert loaded.history == []
+    loaded.update_coins(r_coin_change=2)
+    store.commit_block(block(1), [loaded])
+    assert history_rows(store, 0) == worker.history + loaded.history
+    store.close()
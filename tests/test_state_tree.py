@@ -0,0 +1,53 @@
+import pytest
+
+from src.blockchain.state_tree import SparseMerkleTree, verify_balance_proof
+
+
+def test_batch_update_matches_sequential_updates():
+    balances = [(3, 10, 0.5), (4, 7, 0.0), (1 << 20, 1, 2.25)]
+    batched = SparseMerkleTree()
+    sequential = SparseMerkleTree()
+
+    batched.update_many(balances)
+    for balance in reversed(balances):
+        sequential.update(*balance)
+
+    assert batched.root == sequential.root
+    assert batched.root != SparseMerkleTree().root
+
+
+def test_root_after_does_not_modify_tree():
+    tree = SparseMerkleTree()
+    tree.update(1, 5, 1.0)
+    root = tree.root
+
+    expected = tree.root_after([(1, 6, 1.0), (2, 3, 0.0)])
+
+    assert tree.root == root
+    assert tree.leaves == {1: (5, 1.0)}
+    assert tree.update_many([(1, 6, 1.0), (2, 3, 0.0)]) == expected
+
+
+def test_balance_proof_verifies_and_rejects_tampering():
+    tree = SparseMerkleTree()
+    tree.update_many([(0, 100, 0.0), (1, 50, 2.5), (9, 20, 1.0)])
+
+    proof = tree.prove(1)
+    assert verify_balance_proof(tree.root, proof)
+    assert not verify_balance_proof(tree.root, dict(proof, r_coin=51))
+    assert not verify_balance_proof(tree.root, dict(proof, siblings=proof["siblings"][:-1]))
+    with pytest.raises(KeyError):
+        tree.prove(2)
+    with pytest.raises(ValueError):
+        tree.update(1 << 32, 0, 0)
+
+
+def test_block_state_root_commits_node_balances(simulation):
+    blockchain, workers, _, requester, _ = simulation
+    root = blockchain.get_last_block().state_root
+
+    assert root == blockchain.state_tree.root
+    for node in [*workers, requester]:
+        proof = blockchain.get_balance_proof(node.id)
+        assert (proof["r_coin"], proof["s_coin"]) == (node.r_coin, node.s_coin)
+        assert verify_balance_proof(root, proof)
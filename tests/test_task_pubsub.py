@@ -0,0 +1,76 @@
+import math
+import random
+
+from src.config.system_config import SystemConfig
+from src.models.worker import Worker
+from src.services.server import Server
+from src.services.task_pubsub import TaskPubSub
+
+
+def matches(subscription, task):
+    if subscription["task_type"] is not None and subscription["task_type"] != task.get("task_type"):
+        return False
+    if subscription["min_reward"] > task["reward_amount"]:
+        return False
+    region = subscription["region"]
+    if region is None:
+        return True
+    return task.get("location") is not None and math.dist(region[:2], task["location"]) <= region[2]
+
+
+def test_matching_by_region_type_and_reward_equals_brute_force():
+    rng = random.Random(2)
+    pubsub = TaskPubSub(cell_size=50.0)
+    for subscriber_id in range(300):
+        region = (rng.uniform(0, 500), rng.uniform(0, 500), rng.uniform(5, 120)) if rng.random() < 0.7 else None
+        pubsub.subscribe(subscriber_id, lambda tasks: None, rng.choice([None, "air", "noise"]), region,
+                         rng.choice([0, 10, 20, 30]))
+
+    for number in range(50):
+        task = {"task_id": str(number), "reward_amount": rng.choice([5, 15, 25]),
+                "task_type": rng.choice([None, "air", "noise"]),
+                "location": (rng.uniform(0, 500), rng.uniform(0, 500)) if number % 5 else None}
+        expected = {subscription["subscriber_id"] for subscription in pubsub.subscriptions.values()
+                    if matches(subscription, task)}
+        assert pubsub.subscribers(task) == expected
+
+
+def test_unsubscribe_removes_index_entries_and_pending_batch():
+    received = []
+    pubsub = TaskPubSub()
+    first = pubsub.subscribe(1, received.append, region=(0.0, 0.0, 500.0))
+    second = pubsub.subscribe(1, received.append, task_type="air")
+    pubsub.publish({"task_id": "a", "reward_amount": 1, "task_type": "air", "location": (10.0, 10.0)})
+    pubsub.unsubscribe(first)
+    assert pubsub.subscribers({"reward_amount": 1, "location": (10.0, 10.0)}) == set()
+
+    pubsub.unsubscribe(second)
+    pubsub.unsubscribe(second)
+    assert pubsub.flush() == 0 and received == []
+    assert pubsub._index == {} and pubsub.subscriptions == {}
+
+
+def test_batches_flush_when_full_and_once_per_subscriber():
+    batches = {1: [], 2: []}
+    pubsub = TaskPubSub(max_batch=3)
+    pubsub.subscribe(1, batches[1].append)
+    pubsub.subscribe(1, batches[1].append, task_type="air")
+    pubsub.subscribe(2, batches[2].append, min_reward=10)
+    for number in range(4):
+        pubsub.publish({"task_id": str(number), "reward_amount": 5 * number, "task_type": "air"})
+
+    assert [[task["task_id"] for task in batch] for batch in batches[1]] == [["0", "1", "2"]]
+    assert pubsub.flush() == 2
+    assert [[task["task_id"] for task in batch] for batch in batches[1]][-1] == ["3"]
+    assert [[task["task_id"] for task in batch] for batch in batches[2]] == [["2", "3"]]
+    assert pubsub.stats == {"published": 4, "matched": 10, "batches": 3}
+
+
+def test_server_delivers_broadcasts_to_subscribed_workers():
+    server = Server(SystemConfig())
+    rich, poor = Worker(0), Worker(1)
+    server.subscribe_worker(rich, min_reward=10)
+    server.subscribe_worker(poor, min_reward=50)
+    task_id = server.broadcast_task("task", requester_id=9, reward_amount=20)
+    assert server.collect_recipients([rich, poor], task_id) == [rich]
+    assert rich.take_tasks() == []
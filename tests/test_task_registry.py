@@ -0,0 +1,68 @@
+import random
+
+from src.services.task_registry import TASK_ASSIGNED, TASK_COMMITTED, TASK_EVALUATED, TaskRegistry
+from src.utils.clock import SteppingClock, use_clock
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_tasks_expire_after_last_status_change():
+    clock = ManualClock()
+    registry = TaskRegistry(ttl_seconds=10, clock=clock)
+    idle = registry.register("idle", requester_id=1, reward_amount=5)["task_id"]
+    active = registry.register("active", requester_id=1, reward_amount=5)["task_id"]
+
+    clock.now = 8
+    assert registry.update_status(active, TASK_ASSIGNED)
+    clock.now = 12
+    assert registry.evict_expired() == 1
+    assert idle not in registry and active in registry
+    assert [task["task_id"] for task in registry.get_by_requester(1)] == [active]
+
+    clock.now = 18
+    assert registry.evict_expired() == 1
+    assert len(registry) == 0 and registry.get_by_requester(1) == []
+
+
+def test_status_transitions_and_commit_eviction():
+    registry = TaskRegistry(clock=ManualClock())
+    task_id = registry.register("task", requester_id=1, reward_amount=5)["task_id"]
+
+    assert not registry.update_status(task_id, TASK_EVALUATED)
+    assert registry.update_status(task_id, TASK_ASSIGNED)
+    assert registry.update_status(task_id, TASK_COMMITTED)
+    assert task_id not in registry
+    assert not registry.update_status(task_id, TASK_COMMITTED)
+
+
+def test_expiry_queue_stays_proportional_to_live_tasks():
+    registry = TaskRegistry(ttl_seconds=1000, clock=ManualClock())
+    for _ in range(10):
+        task_id = registry.register("task", requester_id=1, reward_amount=5)["task_id"]
+        registry.update_status(task_id, TASK_ASSIGNED)
+        registry.update_status(task_id, TASK_EVALUATED)
+    for _ in range(1000):
+        task_id = registry.register("task", requester_id=2, reward_amount=5)["task_id"]
+        registry.update_status(task_id, TASK_ASSIGNED)
+        registry.update_status(task_id, TASK_COMMITTED)
+
+    assert len(registry) == 10
+    assert len(registry._expiry) <= 2 * len(registry) + 17
+
+
+def test_expiry_follows_the_swappable_clock():
+    def run():
+        registry = TaskRegistry(ttl_seconds=0.0005, rng=random.Random(1))
+        with use_clock(SteppingClock(step_ns=100_000)):
+            task_ids = [registry.register("task", requester_id=1, reward_amount=5)["task_id"] for _ in range(20)]
+            evicted = registry.evict_expired()
+        return task_ids, evicted, sorted(registry._deadlines)
+
+    first, second = run(), run()
+    assert first == second and 0 < first[1] < 20
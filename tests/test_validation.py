@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.records import CoinAllocation, Evaluation, TaskCreation, TaskEvaluations, TaskRefund, \
+    TaskSubmissions, VerifierReward
+from src.blockchain.validation import TransactionPipeline
+from src.config.system_config import SystemConfig
+from src.models.worker import Worker
+
+
+@pytest.fixture
+def chain():
+    workers = [Worker(i, 100) for i in range(3)]
+    blockchain = Blockchain(workers)
+    pipeline = TransactionPipeline(blockchain, SystemConfig(validation_open_task_blocks=1), batch_size=64,
+                                   workers=1, executor="thread")
+    blockchain.attach_validator(pipeline)
+    yield blockchain, pipeline, workers
+    pipeline.close()
+
+
+def submissions(task_id, workers):
+    return TaskSubmissions(task_id, tuple(worker.submit_task(task_id, task_id) for worker in workers), 0)
+
+
+def evaluations(task_id, workers, verifier_id=0):
+    return TaskEvaluations(task_id, tuple(Evaluation(worker.id, 0.9, "rewarded", 100, 110, 10, 0, task_id)
+                                          for worker in workers), verifier_id, 0)
+
+
+def test_admits_in_submission_order(chain):
+    blockchain, pipeline, workers = chain
+    blockchain.add_transaction(evaluations("task-1", workers[:2]))
+    blockchain.add_transaction(submissions("task-1", workers[:2]))
+    blockchain.add_transaction(evaluations("task-1", workers[:2]))
+    blockchain.add_transaction(evaluations("task-1", workers[:2]))
+    pipeline.flush()
+
+    assert [transaction.TYPE for transaction in blockchain.pending_transactions] == \
+        ["task_submissions", "task_evaluations"]
+    assert pipeline.rejections == {"unknown_task": 2}
+    assert pipeline.open_tasks == {}
+
+
+def test_rejection_reasons(chain):
+    blockchain, pipeline, workers = chain
+    forged = submissions("task-2", workers[:1])
+    forged = forged._replace(submissions=(forged.submissions[0]._replace(signature=bytes(32)),))
+    blockchain.add_transaction(forged)
+    blockchain.add_transaction(json.dumps({"type": "task_submissions", "task_id": "task-3"}))
+    blockchain.add_transaction(json.dumps({"type": "mint"}))
+    blockchain.add_transaction(submissions("task-4", workers[:1]))
+    blockchain.add_transaction(submissions("task-4", workers[1:2]))
+    blockchain.add_transaction(evaluations("task-4", workers[1:2]))
+    blockchain.add_transaction(TaskCreation(workers[2].id, 150, -150, 0, 0))
+    pipeline.flush()
+
+    assert pipeline.rejections == {"bad_signature": 1, "malformed": 1, "unknown_type": 1, "duplicate_task": 1,
+                                   "unknown_submitter": 1, "insufficient_balance": 1}
+    assert pipeline.admitted == 1
+    assert blockchain.ledger.balance(workers[2]) == (100, 0)
+
+
+def test_verifier_reward_only_for_selected_verifier_once(chain):
+    blockchain, pipeline, workers = chain
+    blockchain.add_transaction(VerifierReward(workers[1].id, 5, 0, 0))
+    pipeline.flush()
+    assert pipeline.rejections == {"verifier_mismatch": 1}
+
+    blockchain.record_lottery({"seed": "01", "selected_id": workers[1].id})
+    blockchain.add_transaction(VerifierReward(workers[0].id, 5, 0, 0))
+    blockchain.add_transaction(VerifierReward(workers[1].id, 500, 0, 0))
+    blockchain.add_transaction(VerifierReward(workers[1].id, 5, 0, 0))
+    blockchain.add_transaction(VerifierReward(workers[1].id, 5, 0, 0))
+    pipeline.flush()
+
+    assert pipeline.rejections == {"verifier_mismatch": 2, "invalid_amount": 1, "duplicate_reward": 1}
+    assert blockchain.ledger.balance(workers[1])[0] == 105
+
+
+def test_coin_allocation_only_for_new_accounts(chain):
+    blockchain, pipeline, workers = chain
+    newcomer = Worker(3, 60)
+    blockchain.ledger.open_account(newcomer)
+    blockchain.add_transaction(CoinAllocation(workers[0].id, 1000, 0))
+    blockchain.add_transaction(CoinAllocation(99, 1000, 0))
+    blockchain.add_transaction(CoinAllocation(newcomer.id, 1000, 0))
+    blockchain.add_transaction(CoinAllocation(newcomer.id, 60, 0))
+    blockchain.add_transaction(CoinAllocation(newcomer.id, 60, 0))
+    pipeline.flush()
+
+    assert pipeline.rejections == {"unauthorized_allocation": 3, "invalid_amount": 1}
+    assert pipeline.balances[newcomer.id] == [60, 0]
+
+
+def test_unevaluated_tasks_expire(chain):
+    blockchain, pipeline, workers = chain
+    blockchain.add_transaction(submissions("task-5", workers[:1]))
+    blockchain.add_block(workers[0])
+    blockchain.add_transaction(submissions("task-6", workers[:1]))
+    blockchain.add_block(workers[0])
+    blockchain.add_transaction(evaluations("task-5", workers[:1]))
+    pipeline.flush()
+
+    assert list(pipeline.open_tasks) == ["task-6"]
+    assert pipeline.rejections == {"unknown_task": 1}
+
+
+def test_refund_must_match_remaining_escrow(chain):
+    blockchain, pipeline, workers = chain
+    blockchain.add_transaction(TaskCreation(workers[2].id, 30, -30, 0, 0, "task-7"))
+    blockchain.add_transaction(TaskCreation(workers[2].id, 30, -30, 0, 0, "task-7"))
+    blockchain.add_transaction(TaskRefund("task-8", workers[2].id, 30, 0, 0))
+    blockchain.add_transaction(TaskRefund("task-7", workers[1].id, 30, 0, 0))
+    pipeline.flush()
+    blockchain.refund_escrow("task-7")
+    pipeline.flush()
+
+    assert pipeline.rejections == {"duplicate_task": 1, "unknown_task": 2}
+    assert pipeline.escrows == {} and blockchain.ledger.escrows == {}
+    assert blockchain.ledger.balance(workers[2])[0] == 100